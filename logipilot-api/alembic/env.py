@@ -34,6 +34,12 @@ from app.models.user import User
 from app.models.client import Client
 from app.models.shipment import Shipment
 from app.models.alert import Alert
+from app.models.refresh_token import RefreshToken, RefreshTokenHistory
+from app.models.counter import Counter
+from app.models.change import Change
+from app.models.location import Location
+from app.models.shipment_status_history import ShipmentStatusHistory
+from app.models import search # noqa: F401 (search index DDL for create_all)
 
 target_metadata = Base.metadata
 
@@ -0,0 +1,52 @@
+"""add_list_query_composite_indexes
+
+Revision ID: 0006
+Revises: 0005
+Create Date: YYYY-MM-DD HH:MM:SS.ffffff # Replace with actual timestamp
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '0006'
+down_revision = '0005'
+branch_labels = None
+depends_on = None
+
+# The list endpoints filter on (at most) one column and sort on (createdAt, id) or (name, id).
+# A composite index whose leading column is the filter and whose tail is the sort key serves
+# both at once, so the database can seek and read rows in order without a sort step.
+# The single-column indexes they replace are prefixes of the new ones and are dropped.
+COMPOSITE_INDEXES = [
+    ('ix_shipments_createdAt_id', 'shipments', ['createdAt', 'id']),
+    ('ix_shipments_client_id_createdAt_id', 'shipments', ['client_id', 'createdAt', 'id']),
+    ('ix_shipments_status_createdAt_id', 'shipments', ['status', 'createdAt', 'id']),
+    ('ix_alerts_createdAt_id', 'alerts', ['createdAt', 'id']),
+    ('ix_alerts_shipment_id_createdAt_id', 'alerts', ['shipment_id', 'createdAt', 'id']),
+    ('ix_alerts_severity_createdAt_id', 'alerts', ['severity', 'createdAt', 'id']),
+    ('ix_clients_name_id', 'clients', ['name', 'id']),
+    ('ix_clients_status_name_id', 'clients', ['status', 'name', 'id']),
+]
+
+SUPERSEDED_INDEXES = [
+    ('ix_shipments_client_id', 'shipments', ['client_id']),
+    ('ix_shipments_status', 'shipments', ['status']),
+    ('ix_alerts_shipment_id', 'alerts', ['shipment_id']),
+    ('ix_alerts_severity', 'alerts', ['severity']),
+    ('ix_clients_name', 'clients', ['name']),
+]
+
+
+def upgrade():
+    for name, table, columns in COMPOSITE_INDEXES:
+        op.create_index(name, table, columns, unique=False)
+    for name, table, _ in SUPERSEDED_INDEXES:
+        op.drop_index(name, table_name=table)
+
+
+def downgrade():
+    for name, table, columns in SUPERSEDED_INDEXES:
+        op.create_index(name, table, columns, unique=False)
+    for name, table, _ in reversed(COMPOSITE_INDEXES):
+        op.drop_index(name, table_name=table)
@@ -0,0 +1,42 @@
+"""create_counters_table
+
+Revision ID: 0007
+Revises: 0006
+Create Date: YYYY-MM-DD HH:MM:SS.ffffff # Replace with actual timestamp
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '0007'
+down_revision = '0006'
+branch_labels = None
+depends_on = None
+
+# (entity, source table, bucket column) counted by the dashboard summary
+COUNTED = [
+    ('shipments', 'shipments', 'status'),
+    ('alerts', 'alerts', 'severity'),
+    ('clients', 'clients', 'status'),
+]
+
+
+def upgrade():
+    op.create_table(
+        'counters',
+        sa.Column('entity', sa.String(length=32), nullable=False),
+        sa.Column('bucket', sa.String(length=32), nullable=False),
+        sa.Column('count', sa.Integer(), nullable=False, server_default='0'),
+        sa.PrimaryKeyConstraint('entity', 'bucket')
+    )
+    # Seed from the existing rows; from here on the crud writes keep the counts current
+    for entity, table, column in COUNTED:
+        op.execute(
+            f"INSERT INTO counters (entity, bucket, count) "
+            f"SELECT '{entity}', CAST({column} AS VARCHAR(32)), COUNT(*) FROM {table} GROUP BY {column}"
+        )
+
+
+def downgrade():
+    op.drop_table('counters')
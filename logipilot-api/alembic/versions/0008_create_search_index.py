@@ -0,0 +1,60 @@
+"""create_search_index
+
+Revision ID: 0008
+Revises: 0007
+Create Date: YYYY-MM-DD HH:MM:SS.ffffff # Replace with actual timestamp
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '0008'
+down_revision = '0007'
+branch_labels = None
+depends_on = None
+
+# Contentless FTS5 index over clients, shipments and alerts (see app/models/search.py).
+# rowid = id * 4 + kind code; triggers keep it in sync. SQLite only: other backends
+# serve GET /search with LIKE queries and need nothing here.
+SOURCES = [
+    (1, 'clients', ['name', 'email', 'phone'], "{row}.name || ' ' || {row}.email || ' ' || coalesce({row}.phone, '')"),
+    (2, 'shipments', ['origin', 'destination'], "{row}.origin || ' ' || {row}.destination"),
+    (3, 'alerts', ['message'], "{row}.message"),
+]
+
+
+def upgrade():
+    if op.get_bind().dialect.name != 'sqlite':
+        return
+    op.execute(
+        "CREATE VIRTUAL TABLE search_index USING fts5("
+        "content, content='', tokenize='unicode61 remove_diacritics 2', prefix='2 3 4')"
+    )
+    for code, table, columns, text in SOURCES:
+        rowid = "{row}.id * 4 + %d" % code
+        insert = f"INSERT INTO search_index(rowid, content) VALUES ({rowid.format(row='new')}, {text.format(row='new')});"
+        remove = (
+            f"INSERT INTO search_index(search_index, rowid, content) "
+            f"VALUES ('delete', {rowid.format(row='old')}, {text.format(row='old')});"
+        )
+        op.execute(f"CREATE TRIGGER {table}_search_ai AFTER INSERT ON {table} BEGIN {insert} END")
+        op.execute(f"CREATE TRIGGER {table}_search_ad AFTER DELETE ON {table} BEGIN {remove} END")
+        op.execute(
+            f"CREATE TRIGGER {table}_search_au AFTER UPDATE OF {', '.join(columns)} ON {table} "
+            f"BEGIN {remove} {insert} END"
+        )
+        # Index the rows that already exist
+        op.execute(
+            f"INSERT INTO search_index(rowid, content) "
+            f"SELECT {rowid.format(row=table)}, {text.format(row=table)} FROM {table}"
+        )
+
+
+def downgrade():
+    if op.get_bind().dialect.name != 'sqlite':
+        return
+    for _, table, _, _ in SOURCES:
+        for suffix in ('ai', 'ad', 'au'):
+            op.execute(f"DROP TRIGGER IF EXISTS {table}_search_{suffix}")
+    op.execute("DROP TABLE IF EXISTS search_index")
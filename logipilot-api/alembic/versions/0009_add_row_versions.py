@@ -0,0 +1,29 @@
+"""add_row_versions
+
+Revision ID: 0009
+Revises: 0008
+Create Date: YYYY-MM-DD HH:MM:SS.ffffff # Replace with actual timestamp
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '0009'
+down_revision = '0008'
+branch_labels = None
+depends_on = None
+
+# Tables whose rows carry a version for the detail endpoint ETags
+VERSIONED = ['clients', 'shipments', 'alerts']
+
+
+def upgrade():
+    for table in VERSIONED:
+        op.add_column(table, sa.Column('version', sa.Integer(), nullable=False, server_default='1'))
+
+
+def downgrade():
+    # A plain DROP COLUMN (SQLite 3.35+): a batch table rebuild would drop the search triggers
+    for table in reversed(VERSIONED):
+        op.drop_column(table, 'version')
@@ -0,0 +1,39 @@
+"""create_changes_table
+
+Revision ID: 0010
+Revises: 0009
+Create Date: YYYY-MM-DD HH:MM:SS.ffffff # Replace with actual timestamp
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '0010'
+down_revision = '0009'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Change log behind GET /changes. Starts empty: mirrors of existing data begin
+    # with an export and follow the feed from the latest_seq it reported.
+    op.create_table(
+        'changes',
+        sa.Column('seq', sa.Integer(), nullable=False),
+        sa.Column('entity', sa.String(length=32), nullable=False),
+        sa.Column('entity_id', sa.Integer(), nullable=False),
+        sa.Column('op', sa.String(length=8), nullable=False),
+        sa.Column('diff', sa.Text(), nullable=True),
+        sa.Column('changedAt', sa.DateTime(timezone=True), server_default=sa.text('CURRENT_TIMESTAMP'), nullable=False),
+        sa.PrimaryKeyConstraint('seq'),
+        sqlite_autoincrement=True,
+    )
+    op.create_index('ix_changes_entity_seq', 'changes', ['entity', 'seq'], unique=False)
+    op.create_index('ix_changes_entity_entity_id_seq', 'changes', ['entity', 'entity_id', 'seq'], unique=False)
+
+
+def downgrade():
+    op.drop_index('ix_changes_entity_entity_id_seq', table_name='changes')
+    op.drop_index('ix_changes_entity_seq', table_name='changes')
+    op.drop_table('changes')
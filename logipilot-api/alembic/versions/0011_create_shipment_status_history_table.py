@@ -0,0 +1,47 @@
+"""create_shipment_status_history_table
+
+Revision ID: 0011
+Revises: 0010
+Create Date: YYYY-MM-DD HH:MM:SS.ffffff # Replace with actual timestamp
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+from app.models.shipment import ShipmentStatusEnum
+
+# revision identifiers, used by Alembic.
+revision = '0011'
+down_revision = '0010'
+branch_labels = None
+depends_on = None
+
+# The shipments.status enum type, which already exists (0003)
+status_enum = postgresql.ENUM(ShipmentStatusEnum, name='shipmentstatusenum', create_type=False)
+
+
+def upgrade():
+    # Status changes of shipments, for the lane transit-time statistics. Starts empty:
+    # earlier changes weren't recorded, so existing deliveries aren't counted.
+    op.create_table(
+        'shipment_status_history',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('shipment_id', sa.Integer(), nullable=False),
+        sa.Column('from_status', status_enum, nullable=False),
+        sa.Column('to_status', status_enum, nullable=False),
+        sa.Column('changedAt', sa.DateTime(timezone=True), server_default=sa.text('CURRENT_TIMESTAMP'), nullable=False),
+        sa.ForeignKeyConstraint(['shipment_id'], ['shipments.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('id'),
+    )
+    op.create_index('ix_shipment_status_history_to_status_id', 'shipment_status_history', ['to_status', 'id'], unique=False)
+    op.create_index(
+        'ix_shipment_status_history_shipment_id_to_status_changedAt', 'shipment_status_history',
+        ['shipment_id', 'to_status', 'changedAt'], unique=False,
+    )
+
+
+def downgrade():
+    op.drop_index('ix_shipment_status_history_shipment_id_to_status_changedAt', table_name='shipment_status_history')
+    op.drop_index('ix_shipment_status_history_to_status_id', table_name='shipment_status_history')
+    op.drop_table('shipment_status_history')
@@ -0,0 +1,171 @@
+"""dictionary_encode_shipment_locations
+
+Revision ID: 0012
+Revises: 0011
+Create Date: YYYY-MM-DD HH:MM:SS.ffffff # Replace with actual timestamp
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+from app.models.location import location_key, normalize_location_name
+
+# revision identifiers, used by Alembic.
+revision = '0012'
+down_revision = '0011'
+branch_labels = None
+depends_on = None
+
+# Shipments converted per round trip of the backfill
+CHUNK_SIZE = 5000
+
+shipments = sa.table(
+    'shipments',
+    sa.column('id', sa.Integer), sa.column('origin', sa.String), sa.column('destination', sa.String),
+    sa.column('origin_id', sa.Integer), sa.column('destination_id', sa.Integer),
+)
+locations = sa.table('locations', sa.column('id', sa.Integer), sa.column('name', sa.String), sa.column('key', sa.String))
+
+# The shipments side of the search index (0008, app/models/search.py), before and after
+OLD_SEARCH_TEXT = ("{row}.origin || ' ' || {row}.destination", ['origin', 'destination'])
+NEW_SEARCH_TEXT = (
+    "(SELECT name FROM locations WHERE id = {row}.origin_id) || ' ' || (SELECT name FROM locations WHERE id = {row}.destination_id)",
+    ['origin_id', 'destination_id'],
+)
+
+
+def _drop_search_triggers():
+    for suffix in ('ai', 'ad', 'au'):
+        op.execute(f"DROP TRIGGER IF EXISTS shipments_search_{suffix}")
+
+
+def _create_search_triggers(search_text):
+    text, columns = search_text
+    rowid = "{row}.id * 4 + 2"
+    insert = f"INSERT INTO search_index(rowid, content) VALUES ({rowid.format(row='new')}, {text.format(row='new')});"
+    remove = (
+        f"INSERT INTO search_index(search_index, rowid, content) "
+        f"VALUES ('delete', {rowid.format(row='old')}, {text.format(row='old')});"
+    )
+    op.execute(f"CREATE TRIGGER shipments_search_ai AFTER INSERT ON shipments BEGIN {insert} END")
+    op.execute(f"CREATE TRIGGER shipments_search_ad AFTER DELETE ON shipments BEGIN {remove} END")
+    op.execute(f"CREATE TRIGGER shipments_search_au AFTER UPDATE OF {', '.join(columns)} ON shipments BEGIN {remove} {insert} END")
+
+
+def _reindex(bind, row_ids, old_texts, new_texts):
+    # Contentless index: a row is removed by replaying the text it was indexed with
+    bind.execute(
+        sa.text("INSERT INTO search_index(search_index, rowid, content) VALUES ('delete', :rowid, :content)"),
+        [{"rowid": row_id * 4 + 2, "content": text} for row_id, text in zip(row_ids, old_texts)],
+    )
+    bind.execute(
+        sa.text("INSERT INTO search_index(rowid, content) VALUES (:rowid, :content)"),
+        [{"rowid": row_id * 4 + 2, "content": text} for row_id, text in zip(row_ids, new_texts)],
+    )
+
+
+def upgrade():
+    bind = op.get_bind()
+    sqlite = bind.dialect.name == 'sqlite'
+    op.create_table(
+        'locations',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('name', sa.String(length=200), nullable=False),
+        sa.Column('key', sa.String(length=200), nullable=False),
+        sa.PrimaryKeyConstraint('id'),
+    )
+    op.create_index('ix_locations_key', 'locations', ['key'], unique=True)
+    op.add_column('shipments', sa.Column('origin_id', sa.Integer(), nullable=True))
+    op.add_column('shipments', sa.Column('destination_id', sa.Integer(), nullable=True))
+    if sqlite:
+        _drop_search_triggers()
+
+    # Backfill in primary-key chunks: intern the chunk's new names, then point its rows at them.
+    # The search index is re-fed with the stored (normalized) names, which may differ in
+    # case and spacing from what was indexed.
+    known = {} # location_key -> (id, name)
+    last_id = 0
+    while True:
+        rows = bind.execute(
+            sa.select(shipments.c.id, shipments.c.origin, shipments.c.destination)
+            .where(shipments.c.id > last_id).order_by(shipments.c.id).limit(CHUNK_SIZE)
+        ).all()
+        if not rows:
+            break
+        new = {}
+        for _, origin, destination in rows:
+            for name in (origin, destination):
+                key = location_key(name)
+                if key not in known:
+                    new.setdefault(key, normalize_location_name(name))
+        if new:
+            bind.execute(locations.insert(), [{"name": name, "key": key} for key, name in new.items()])
+            known.update(
+                (key, (location_id, name))
+                for location_id, name, key in bind.execute(sa.select(locations).where(locations.c.key.in_(new))).all()
+            )
+        bind.execute(
+            shipments.update().where(shipments.c.id == sa.bindparam('row_id'))
+            .values(origin_id=sa.bindparam('new_origin_id'), destination_id=sa.bindparam('new_destination_id')),
+            [
+                {"row_id": row_id, "new_origin_id": known[location_key(origin)][0], "new_destination_id": known[location_key(destination)][0]}
+                for row_id, origin, destination in rows
+            ],
+        )
+        if sqlite:
+            _reindex(
+                bind, [row_id for row_id, _, _ in rows],
+                [f"{origin} {destination}" for _, origin, destination in rows],
+                [f"{known[location_key(origin)][1]} {known[location_key(destination)][1]}" for _, origin, destination in rows],
+            )
+        last_id = rows[-1][0]
+
+    with op.batch_alter_table('shipments') as batch_op:
+        batch_op.alter_column('origin_id', existing_type=sa.Integer(), nullable=False)
+        batch_op.alter_column('destination_id', existing_type=sa.Integer(), nullable=False)
+        batch_op.create_foreign_key('fk_shipments_origin_id_locations', 'locations', ['origin_id'], ['id'])
+        batch_op.create_foreign_key('fk_shipments_destination_id_locations', 'locations', ['destination_id'], ['id'])
+        batch_op.drop_column('origin')
+        batch_op.drop_column('destination')
+    if sqlite:
+        _create_search_triggers(NEW_SEARCH_TEXT)
+
+
+def downgrade():
+    bind = op.get_bind()
+    sqlite = bind.dialect.name == 'sqlite'
+    op.add_column('shipments', sa.Column('origin', sa.String(), nullable=True))
+    op.add_column('shipments', sa.Column('destination', sa.String(), nullable=True))
+    if sqlite:
+        _drop_search_triggers()
+    # The index already holds the stored names, which are what the columns get back
+    names = dict(bind.execute(sa.select(locations.c.id, locations.c.name)).all())
+    last_id = 0
+    while True:
+        rows = bind.execute(
+            sa.select(shipments.c.id, shipments.c.origin_id, shipments.c.destination_id)
+            .where(shipments.c.id > last_id).order_by(shipments.c.id).limit(CHUNK_SIZE)
+        ).all()
+        if not rows:
+            break
+        bind.execute(
+            shipments.update().where(shipments.c.id == sa.bindparam('row_id'))
+            .values(origin=sa.bindparam('new_origin'), destination=sa.bindparam('new_destination')),
+            [
+                {"row_id": row_id, "new_origin": names[origin_id], "new_destination": names[destination_id]}
+                for row_id, origin_id, destination_id in rows
+            ],
+        )
+        last_id = rows[-1][0]
+
+    with op.batch_alter_table('shipments') as batch_op:
+        batch_op.drop_constraint('fk_shipments_destination_id_locations', type_='foreignkey')
+        batch_op.drop_constraint('fk_shipments_origin_id_locations', type_='foreignkey')
+        batch_op.drop_column('destination_id')
+        batch_op.drop_column('origin_id')
+        batch_op.alter_column('origin', existing_type=sa.String(), nullable=False)
+        batch_op.alter_column('destination', existing_type=sa.String(), nullable=False)
+    if sqlite:
+        _create_search_triggers(OLD_SEARCH_TEXT)
+    op.drop_index('ix_locations_key', table_name='locations')
+    op.drop_table('locations')
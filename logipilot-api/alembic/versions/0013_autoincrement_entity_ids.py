@@ -0,0 +1,65 @@
+"""autoincrement_entity_ids
+
+Revision ID: 0013
+Revises: 0012
+Create Date: YYYY-MM-DD HH:MM:SS.ffffff # Replace with actual timestamp
+
+"""
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = '0013'
+down_revision = '0012'
+branch_labels = None
+depends_on = None
+
+# A plain INTEGER PRIMARY KEY lets SQLite hand the id of the highest deleted row to the
+# next insert, which would then start over at version 1 and match the deleted row's
+# detail ETag (0009). AUTOINCREMENT never reuses an id. The tables are rebuilt, which
+# drops their search triggers, so those are created again. Other backends use sequences
+# that don't reuse ids and need nothing here.
+TABLES = ['clients', 'shipments', 'alerts']
+
+# The search triggers on those tables as of 0012 (see app/models/search.py)
+SEARCH_SOURCES = [
+    (1, 'clients', ['name', 'email', 'phone'], "{row}.name || ' ' || {row}.email || ' ' || coalesce({row}.phone, '')"),
+    (
+        2, 'shipments', ['origin_id', 'destination_id'],
+        "(SELECT name FROM locations WHERE id = {row}.origin_id) || ' ' || (SELECT name FROM locations WHERE id = {row}.destination_id)",
+    ),
+    (3, 'alerts', ['message'], "{row}.message"),
+]
+
+
+def _rebuild(autoincrement):
+    for table in TABLES:
+        for suffix in ('ai', 'ad', 'au'):
+            op.execute(f"DROP TRIGGER IF EXISTS {table}_search_{suffix}")
+    for table in TABLES:
+        with op.batch_alter_table(table, recreate='always', table_kwargs={'sqlite_autoincrement': autoincrement}):
+            pass
+    for code, table, columns, text in SEARCH_SOURCES:
+        rowid = "{row}.id * 4 + %d" % code
+        insert = f"INSERT INTO search_index(rowid, content) VALUES ({rowid.format(row='new')}, {text.format(row='new')});"
+        remove = (
+            f"INSERT INTO search_index(search_index, rowid, content) "
+            f"VALUES ('delete', {rowid.format(row='old')}, {text.format(row='old')});"
+        )
+        op.execute(f"CREATE TRIGGER {table}_search_ai AFTER INSERT ON {table} BEGIN {insert} END")
+        op.execute(f"CREATE TRIGGER {table}_search_ad AFTER DELETE ON {table} BEGIN {remove} END")
+        op.execute(
+            f"CREATE TRIGGER {table}_search_au AFTER UPDATE OF {', '.join(columns)} ON {table} "
+            f"BEGIN {remove} {insert} END"
+        )
+
+
+def upgrade():
+    if op.get_bind().dialect.name != 'sqlite':
+        return
+    _rebuild(True)
+
+
+def downgrade():
+    if op.get_bind().dialect.name != 'sqlite':
+        return
+    _rebuild(False)
@@ -0,0 +1,53 @@
+"""create_refresh_token_history_table
+
+Revision ID: 0014
+Revises: 0013
+Create Date: YYYY-MM-DD HH:MM:SS.ffffff # Replace with actual timestamp
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '0014'
+down_revision = '0013'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Every token a session rotated away from, so replaying any of them (not only the
+    # last one) is detected as reuse. Replaces refresh_tokens.previous_token_hash.
+    op.create_table(
+        'refresh_token_history',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('session_id', sa.Integer(), nullable=False),
+        sa.Column('token_hash', sa.String(length=64), nullable=False),
+        sa.Column('rotatedAt', sa.DateTime(timezone=True), server_default=sa.text('CURRENT_TIMESTAMP'), nullable=False),
+        sa.ForeignKeyConstraint(['session_id'], ['refresh_tokens.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('id'),
+    )
+    op.create_index(op.f('ix_refresh_token_history_session_id'), 'refresh_token_history', ['session_id'], unique=False)
+    op.create_index(op.f('ix_refresh_token_history_token_hash'), 'refresh_token_history', ['token_hash'], unique=True)
+    # Only the last rotated token of each existing session is known
+    op.execute(
+        "INSERT INTO refresh_token_history (session_id, token_hash) "
+        "SELECT id, previous_token_hash FROM refresh_tokens WHERE previous_token_hash IS NOT NULL"
+    )
+    op.drop_index(op.f('ix_refresh_tokens_previous_token_hash'), table_name='refresh_tokens')
+    with op.batch_alter_table('refresh_tokens') as batch_op:
+        batch_op.drop_column('previous_token_hash')
+
+
+def downgrade():
+    with op.batch_alter_table('refresh_tokens') as batch_op:
+        batch_op.add_column(sa.Column('previous_token_hash', sa.String(length=64), nullable=True))
+    # The most recently rotated token of each session goes back in the column
+    op.execute(
+        "UPDATE refresh_tokens SET previous_token_hash = ("
+        "SELECT token_hash FROM refresh_token_history WHERE session_id = refresh_tokens.id ORDER BY id DESC LIMIT 1)"
+    )
+    op.create_index(op.f('ix_refresh_tokens_previous_token_hash'), 'refresh_tokens', ['previous_token_hash'], unique=True)
+    op.drop_index(op.f('ix_refresh_token_history_token_hash'), table_name='refresh_token_history')
+    op.drop_index(op.f('ix_refresh_token_history_session_id'), table_name='refresh_token_history')
+    op.drop_table('refresh_token_history')
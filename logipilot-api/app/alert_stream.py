@@ -0,0 +1,188 @@
+import asyncio
+import secrets
+import threading
+from collections import deque
+from typing import AsyncIterator, Deque, FrozenSet, Iterable, List, NamedTuple, Optional, Set
+
+from .core.config import settings
+from .schemas.alert import AlertPublic, AlertSeverity
+
+# In-process pub/sub for alert changes, feeding GET /alerts/stream (Server-Sent Events)
+# and the /alerts/ws WebSocket.
+#
+# crud_alert publishes after each commit (alert.created / alert.updated / alert.deleted).
+# Every event gets a sequence number and the last `replay_size` events are kept, so a
+# client reconnecting with Last-Event-ID receives what it missed. Event ids are
+# "<epoch>-<seq>" with a random epoch per process: an id from before a restart (or from
+# another worker), or one older than the buffer, can't be replayed, and the client gets a
+# `reset` event telling it to re-fetch GET /alerts instead.
+#
+# Each subscriber has a bounded queue and its filters (severity, shipment_id) are applied
+# before anything is queued. A subscriber that falls `queue_size` events behind doesn't
+# hold memory or slow down writers: its backlog is dropped for a single `reset` event.
+# Publishing never blocks; callers outside a subscriber's event loop (sync scripts) hand
+# events over with call_soon_threadsafe.
+#
+# The broker lives in the process: with several workers, a client only sees the alerts
+# written through the worker it is connected to.
+
+RETRY_MS = 3000 # SSE reconnection delay suggested to clients
+
+
+class AlertEvent(NamedTuple):
+    seq: int
+    event: str # "alert.created", "alert.updated", "alert.deleted" or "reset"
+    shipment_id: int
+    severity: str
+    data: str # AlertPublic as JSON
+
+
+def _reset(seq: int) -> AlertEvent:
+    # Carries the newest seq so a client that re-fetched resumes from there
+    return AlertEvent(seq, "reset", 0, "", "{}")
+
+
+class Subscription:
+    def __init__(self, loop: asyncio.AbstractEventLoop, severities: FrozenSet[str], shipment_id: Optional[int], queue_size: int):
+        self.loop = loop
+        self.severities = severities
+        self.shipment_id = shipment_id
+        self.queue: "asyncio.Queue[AlertEvent]" = asyncio.Queue(max(queue_size, 1))
+        self.dropped = 0
+
+    def wants(self, event: AlertEvent) -> bool:
+        return (not self.severities or event.severity in self.severities) and (self.shipment_id is None or event.shipment_id == self.shipment_id)
+
+    def offer(self, event: AlertEvent) -> None:
+        # Runs on the subscriber's loop
+        if self.queue.full():
+            self.dropped += self.queue.qsize()
+            while not self.queue.empty():
+                self.queue.get_nowait()
+            event = _reset(event.seq)
+        self.queue.put_nowait(event)
+
+    def deliver(self, event: AlertEvent) -> None:
+        try:
+            running = asyncio.get_running_loop()
+        except RuntimeError:
+            running = None
+        if running is self.loop:
+            self.offer(event)
+            return
+        try:
+            self.loop.call_soon_threadsafe(self.offer, event)
+        except RuntimeError: # The subscriber's loop is closed; it is going away
+            pass
+
+    async def next(self, timeout: float) -> Optional[AlertEvent]:
+        """The next event, or None if nothing arrived within `timeout` seconds (time for a heartbeat)."""
+        try:
+            return await asyncio.wait_for(self.queue.get(), timeout)
+        except asyncio.TimeoutError:
+            return None
+
+
+class AlertBroker:
+    def __init__(self, replay_size: int = 1000, queue_size: int = 100):
+        self.epoch = secrets.token_hex(4)
+        self.queue_size = queue_size
+        self._seq = 0
+        self._recent: Deque[AlertEvent] = deque(maxlen=max(replay_size, 0))
+        self._subscribers: Set[Subscription] = set()
+        self._lock = threading.Lock()
+
+    def event_id(self, event: AlertEvent) -> str:
+        return f"{self.epoch}-{event.seq}"
+
+    def publish(self, event_type: str, alert) -> None:
+        """Publishes a committed alert row (or anything AlertPublic validates) to the subscribers."""
+        data = AlertPublic.model_validate(alert).model_dump_json()
+        with self._lock:
+            self._seq += 1
+            event = AlertEvent(self._seq, f"alert.{event_type}", alert.shipment_id, AlertSeverity(alert.severity).value, data)
+            self._recent.append(event)
+            # Delivered under the lock so every subscriber sees events in seq order
+            for subscription in self._subscribers:
+                if subscription.wants(event):
+                    subscription.deliver(event)
+
+    def subscribe(self, severities: Iterable[str] = (), shipment_id: Optional[int] = None, last_event_id: Optional[str] = None) -> Subscription:
+        """
+        A subscription on the running event loop. With `last_event_id`, the events after it
+        are queued first (or a reset, if they are no longer available).
+        """
+        subscription = Subscription(asyncio.get_running_loop(), frozenset(severities), shipment_id, self.queue_size)
+        with self._lock:
+            if last_event_id:
+                missed = self._events_after(last_event_id)
+                if missed is None:
+                    subscription.offer(_reset(self._seq))
+                for event in missed or ():
+                    if subscription.wants(event):
+                        subscription.offer(event)
+            self._subscribers.add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription) -> None:
+        with self._lock:
+            self._subscribers.discard(subscription)
+
+    def _events_after(self, last_event_id: str) -> Optional[List[AlertEvent]]:
+        # None when the events after that id can't be replayed
+        epoch, _, seq = last_event_id.strip().rpartition("-")
+        if epoch != self.epoch or not seq.isdigit() or int(seq) > self._seq:
+            return None
+        oldest = self._recent[0].seq if self._recent else self._seq + 1
+        if int(seq) < oldest - 1:
+            return None
+        return [event for event in self._recent if event.seq > int(seq)]
+
+    def __len__(self) -> int:
+        return len(self._subscribers)
+
+
+alert_broker = AlertBroker(replay_size=settings.ALERT_STREAM_REPLAY_SIZE, queue_size=settings.ALERT_STREAM_QUEUE_SIZE)
+
+
+def sse_message(broker: AlertBroker, event: AlertEvent) -> str:
+    return f"id: {broker.event_id(event)}\nevent: {event.event}\ndata: {event.data}\n\n"
+
+
+def websocket_message(broker: AlertBroker, event: AlertEvent) -> str:
+    return f'{{"id":"{broker.event_id(event)}","event":"{event.event}","data":{event.data}}}'
+
+
+async def sse_events(broker: AlertBroker, subscription: Subscription, heartbeat: float) -> AsyncIterator[str]:
+    """The SSE body for a subscription; unsubscribes when the client goes away."""
+    try:
+        # Sent right away: response headers and a first byte reach the client (and any proxy) immediately
+        yield f"retry: {RETRY_MS}\n\n"
+        while True:
+            event = await subscription.next(heartbeat)
+            yield sse_message(broker, event) if event is not None else ": ping\n\n"
+    finally:
+        broker.unsubscribe(subscription)
+
+
+async def _wait_for_disconnect(websocket) -> None:
+    # Anything the client sends after authenticating is ignored
+    while (await websocket.receive())["type"] != "websocket.disconnect":
+        pass
+
+
+async def websocket_events(websocket, broker: AlertBroker, subscription: Subscription, heartbeat: float) -> None:
+    """Sends a subscription's events (and pings) as JSON text frames until the client disconnects."""
+    disconnected = asyncio.ensure_future(_wait_for_disconnect(websocket))
+    try:
+        while True:
+            next_event = asyncio.ensure_future(subscription.next(heartbeat))
+            await asyncio.wait((next_event, disconnected), return_when=asyncio.FIRST_COMPLETED)
+            if disconnected.done():
+                next_event.cancel()
+                return
+            event = next_event.result()
+            await websocket.send_text(websocket_message(broker, event) if event is not None else '{"event":"ping"}')
+    finally:
+        disconnected.cancel()
+        broker.unsubscribe(subscription)
@@ -1,5 +1,7 @@
 from datetime import datetime, timedelta, timezone
-from typing import Optional
+from typing import Optional, Tuple
+import hashlib
+import secrets
 
 from jose import JWTError, jwt
 from fastapi import Depends, HTTPException, status
@@ -7,15 +9,17 @@ from fastapi.security import OAuth2PasswordBearer
 
 from ..schemas.user import TokenData, UserRole as PydanticUserRole # Renamed to avoid confusion
 from ..core.config import settings
-from ..crud import crud_user
+from ..crud import crud_user, crud_refresh_token
 from ..models.user import User as DBUser, UserRoleEnum as DBUserRoleEnum
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from ..database import get_db
+from .principal_cache import principal_cache, CachedPrincipal
 
 # Configuration for JWT
 SECRET_KEY = settings.SECRET_KEY
 ALGORITHM = settings.ALGORITHM
 ACCESS_TOKEN_EXPIRE_MINUTES = settings.ACCESS_TOKEN_EXPIRE_MINUTES
+REFRESH_TOKEN_EXPIRE_DAYS = settings.REFRESH_TOKEN_EXPIRE_DAYS
 
 # Path will be /api/v1/auth/login if we use a prefix for the auth router
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/api/v1/auth/login") # Added leading / and prefix
@@ -32,7 +36,65 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -
     encoded_jwt = jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
     return encoded_jwt
 
-async def get_current_user_from_token(token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)) -> DBUser:
+def hash_refresh_token(token: str) -> str:
+    # Refresh tokens are 256-bit random values, so a plain SHA-256 is enough; no KDF needed
+    return hashlib.sha256(token.encode("utf-8")).hexdigest()
+
+def _refresh_token_expiry() -> datetime:
+    return datetime.now(timezone.utc) + timedelta(days=REFRESH_TOKEN_EXPIRE_DAYS)
+
+async def create_refresh_token(db: AsyncSession, user: DBUser) -> str:
+    # Starts a new refresh session for the user and returns the opaque token (only its hash is stored)
+    token = secrets.token_urlsafe(32)
+    await crud_refresh_token.create_refresh_token_async(
+        db, user_id=user.id, token_hash=hash_refresh_token(token), expires_at=_refresh_token_expiry()
+    )
+    return token
+
+async def rotate_refresh_token(db: AsyncSession, refresh_token: str) -> Tuple[CachedPrincipal, str]:
+    """
+    Exchanges a refresh token for its successor: one indexed SELECT, one UPDATE and one
+    INSERT into the session's token history. Presenting any token the session was already
+    rotated away from revokes the whole session (reuse detection).
+    """
+    invalid_exception = HTTPException(
+        status_code=status.HTTP_401_UNAUTHORIZED,
+        detail="Invalid or expired refresh token",
+    )
+    presented_hash = hash_refresh_token(refresh_token)
+    db_token = await crud_refresh_token.get_refresh_token_by_hash_async(db, token_hash=presented_hash)
+    if db_token is None or db_token.revoked:
+        raise invalid_exception
+
+    if db_token.token_hash != presented_hash:
+        # An old token came back after rotation: it leaked, or a client replayed it. Kill the session.
+        await crud_refresh_token.revoke_refresh_token_async(db, token_id=db_token.id)
+        raise invalid_exception
+
+    expires_at = db_token.expiresAt
+    if expires_at.tzinfo is None: # SQLite returns naive UTC datetimes
+        expires_at = expires_at.replace(tzinfo=timezone.utc)
+    if expires_at <= datetime.now(timezone.utc):
+        raise invalid_exception
+
+    user = db_token.user
+    if user is None:
+        raise invalid_exception
+    if not user.is_active:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Inactive user")
+
+    # Snapshot before the commit below expires the ORM instance (avoids a reload SELECT)
+    principal = CachedPrincipal.from_user(user)
+    new_token = secrets.token_urlsafe(32)
+    rotated = await crud_refresh_token.rotate_refresh_token_async(
+        db, db_token=db_token, old_hash=presented_hash, new_hash=hash_refresh_token(new_token),
+        expires_at=_refresh_token_expiry()
+    )
+    if not rotated: # Lost a race with a concurrent refresh of the same token
+        raise invalid_exception
+    return principal, new_token
+
+async def get_current_user_from_token(token: str = Depends(oauth2_scheme), db: AsyncSession = Depends(get_db)) -> CachedPrincipal:
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
@@ -52,7 +114,15 @@ async def get_current_user_from_token(token: str = Depends(oauth2_scheme), db: S
     except JWTError:
         raise credentials_exception
 
-    user = crud_user.get_user_by_email(db, email=email)
+    # Signature and expiry are verified above on every request; only the DB lookup is cached.
+    # crud_user.update_user/delete_user invalidate entries so role and is_active changes apply immediately.
+    principal = principal_cache.get(token)
+    if principal is not None:
+        return principal
+
+    # Taken before the read: set() skips caching if the user is updated or deleted meanwhile
+    generation = principal_cache.generation()
+    user = await crud_user.get_user_by_email_async(db, email=email)
     if user is None:
         raise credentials_exception
     # Role consistency check (optional, as DB is source of truth)
@@ -60,15 +130,18 @@ async def get_current_user_from_token(token: str = Depends(oauth2_scheme), db: S
     # if token_role_str != user.role.value: # user.role is DBUserRoleEnum
     #     raise credentials_exception # Token role does not match DB role
 
-    return user
+    # Hits and misses both return a CachedPrincipal (id, email, role, is_active) so callers see one shape
+    principal = CachedPrincipal.from_user(user)
+    principal_cache.set(token, principal, token_exp=payload.get("exp"), generation=generation)
+    return principal
 
-async def get_current_active_user(current_user: DBUser = Depends(get_current_user_from_token)) -> DBUser:
+async def get_current_active_user(current_user: CachedPrincipal = Depends(get_current_user_from_token)) -> CachedPrincipal:
     if not crud_user.is_user_active(current_user): # uses crud_user helper
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Inactive user")
     return current_user
 
 def require_role(required_role: DBUserRoleEnum): # Takes SQLAlchemy Enum member
-    async def role_checker(current_user: DBUser = Depends(get_current_active_user)):
+    async def role_checker(current_user: CachedPrincipal = Depends(get_current_active_user)):
         # current_user.role is DBUserRoleEnum (e.g. UserRoleEnum.ADMIN)
         # required_role is also DBUserRoleEnum (e.g. UserRoleEnum.ADMIN)
         if current_user.role != required_role:
@@ -87,7 +160,7 @@ require_manager = require_role(DBUserRoleEnum.MANAGER)
 
 # Dependency for requiring one of multiple roles
 def require_roles(allowed_roles: list[DBUserRoleEnum]):
-    async def role_checker(current_user: DBUser = Depends(get_current_active_user)):
+    async def role_checker(current_user: CachedPrincipal = Depends(get_current_active_user)):
         if current_user.role not in allowed_roles:
             allowed_role_values = [role.value for role in allowed_roles]
             raise HTTPException(
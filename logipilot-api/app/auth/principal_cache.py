@@ -0,0 +1,132 @@
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Optional, Set
+
+from ..core.config import settings
+from ..models.user import UserRoleEnum
+
+
+class CachedPrincipal:
+    """
+    The subset of a User row needed to authorize a request.
+    Exposes the same attribute names as the ORM model so routers and role checks
+    (current_user.id, current_user.role, ...) work unchanged.
+    """
+    __slots__ = ("id", "email", "role", "is_active")
+
+    def __init__(self, id: int, email: str, role: UserRoleEnum, is_active: bool):
+        self.id = id
+        self.email = email
+        self.role = role
+        self.is_active = is_active
+
+    @classmethod
+    def from_user(cls, user) -> "CachedPrincipal":
+        return cls(id=user.id, email=user.email, role=user.role, is_active=user.is_active)
+
+    def __repr__(self):
+        return f"<CachedPrincipal(id={self.id}, email='{self.email}', role='{self.role.value}')>"
+
+
+class PrincipalCache:
+    """
+    Bounded in-process cache of resolved principals keyed by a hash of the bearer token.
+    Entries expire after `ttl_seconds` (or at token expiry, whichever comes first) and the
+    least recently used entry is evicted once `max_entries` is reached.
+
+    A miss reads the user row and then calls set(); invalidate_user() may run in between.
+    Callers take generation() before the read and pass it to set(), which drops the
+    entry if the user was invalidated since, so a stale row is never cached.
+    """
+
+    def __init__(self, max_entries: int, ttl_seconds: int):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[str, tuple[float, CachedPrincipal]]" = OrderedDict()
+        self._keys_by_user: Dict[int, Set[str]] = {}
+        self._generation = 0 # Advanced by every invalidate_user()
+        self._invalidated_at: Dict[int, int] = {} # user id -> generation of its last invalidation
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def key_for_token(token: str) -> str:
+        # Never keep raw tokens in memory longer than the request needs them
+        return hashlib.sha256(token.encode("utf-8")).hexdigest()
+
+    def get(self, token: str) -> Optional[CachedPrincipal]:
+        key = self.key_for_token(token)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires_at, principal = entry
+            if expires_at <= time.monotonic():
+                self._remove(key)
+                return None
+            self._entries.move_to_end(key)
+            return principal
+
+    def generation(self) -> int:
+        """Take before reading the user row whose principal will be passed to set()."""
+        with self._lock:
+            return self._generation
+
+    def set(self, token: str, principal: CachedPrincipal, token_exp: Optional[float] = None, generation: Optional[int] = None) -> None:
+        if self.max_entries <= 0 or self.ttl_seconds <= 0:
+            return
+        ttl = float(self.ttl_seconds)
+        if token_exp is not None:
+            # Don't serve a principal for a token past its own 'exp' claim
+            ttl = min(ttl, token_exp - time.time())
+            if ttl <= 0:
+                return
+        key = self.key_for_token(token)
+        with self._lock:
+            if generation is not None and self._invalidated_at.get(principal.id, 0) > generation:
+                return # The row was updated or deleted after it was read
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = (time.monotonic() + ttl, principal)
+            self._keys_by_user.setdefault(principal.id, set()).add(key)
+            while len(self._entries) > self.max_entries:
+                oldest_key = next(iter(self._entries))
+                self._remove(oldest_key)
+
+    def invalidate_user(self, user_id: int) -> None:
+        # Drops every cached token for the user, e.g. after a role change or deactivation
+        with self._lock:
+            self._generation += 1
+            self._invalidated_at[user_id] = self._generation
+            for key in list(self._keys_by_user.get(user_id, ())):
+                self._remove(key)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._keys_by_user.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def _remove(self, key: str) -> None:
+        # Caller must hold self._lock
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return
+        user_id = entry[1].id
+        keys = self._keys_by_user.get(user_id)
+        if keys is not None:
+            keys.discard(key)
+            if not keys:
+                del self._keys_by_user[user_id]
+
+
+# Process-wide cache used by the auth dependencies.
+# Invalidation is per process; with several workers the TTL bounds how long
+# another worker can keep serving a stale role or is_active flag.
+principal_cache = PrincipalCache(
+    max_entries=settings.PRINCIPAL_CACHE_MAX_ENTRIES,
+    ttl_seconds=settings.PRINCIPAL_CACHE_TTL_SECONDS,
+)
@@ -43,3 +43,48 @@ jwt_settings = JWTSettings(
     ALGORITHM=settings.ALGORITHM,
     ACCESS_TOKEN_EXPIRE_MINUTES=settings.ACCESS_TOKEN_EXPIRE_MINUTES
 )
+
+# bcrypt is deliberately slow (tens of ms per call) and would stall the event loop
+# if called from an async endpoint, so async callers go through a dedicated, bounded pool.
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+class PasswordHashingBusy(Exception):
+    """Raised when more than PASSWORD_HASH_MAX_PENDING hash jobs are already running or queued."""
+    pass
+
+_hash_executor = ThreadPoolExecutor(
+    max_workers=settings.PASSWORD_HASH_WORKERS,
+    thread_name_prefix="password-hash",
+)
+_pending_lock = threading.Lock()
+_pending_jobs = 0
+
+def _release_hash_job(_future=None) -> None:
+    global _pending_jobs
+    with _pending_lock:
+        _pending_jobs -= 1
+
+async def _run_hash_job(func, *args):
+    global _pending_jobs
+    with _pending_lock:
+        if _pending_jobs >= settings.PASSWORD_HASH_MAX_PENDING:
+            raise PasswordHashingBusy()
+        _pending_jobs += 1
+    try:
+        job = _hash_executor.submit(func, *args)
+    except BaseException:
+        _release_hash_job()
+        raise
+    # The slot is released when the job itself finishes, not when this request stops
+    # waiting: a cancelled request (client disconnect) cancels a job that is still
+    # queued, but one already running keeps its slot until bcrypt returns.
+    job.add_done_callback(_release_hash_job)
+    return await asyncio.wrap_future(job)
+
+async def verify_password_async(plain_password: str, hashed_password: str) -> bool:
+    return await _run_hash_job(verify_password, plain_password, hashed_password)
+
+async def get_password_hash_async(password: str) -> str:
+    return await _run_hash_job(get_password_hash, password)
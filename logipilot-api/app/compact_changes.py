@@ -0,0 +1,26 @@
+import logging
+
+from .core.config import settings
+from .database import SessionLocal
+from .crud import crud_change
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# One-shot compaction and retention of the change log behind GET /changes (the API also
+# runs it every CHANGE_LOG_MAINTENANCE_SECONDS), e.g. from cron when that task is off:
+#   cd logipilot-api
+#   python -m app.compact_changes
+
+def main() -> None:
+    db = SessionLocal()
+    try:
+        compacted, pruned = crud_change.compact_and_prune(
+            db, compact_after_hours=settings.CHANGE_LOG_COMPACT_AFTER_HOURS, retention_days=settings.CHANGE_LOG_RETENTION_DAYS
+        )
+        logger.info(f"Change log: {compacted} entries compacted, {pruned} pruned")
+    finally:
+        db.close()
+
+if __name__ == "__main__":
+    main()
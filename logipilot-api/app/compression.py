@@ -0,0 +1,151 @@
+import gzip
+import zlib
+from typing import List, Optional, Sequence, Tuple
+
+try: # Optional: `pip install brotli` enables Content-Encoding: br
+    import brotli
+except ImportError:
+    brotli = None
+
+# Response compression (gzip, or brotli when the package is installed).
+#
+# CompressionMiddleware picks an encoding from Accept-Encoding (q-values honoured, br
+# preferred) for text-like responses: JSON, NDJSON, CSV, text/*. Server-sent events
+# (text/event-stream) are never compressed: each event must reach the client as it is
+# sent, and encoded streams invite proxies to buffer them. The first body messages are
+# held until `minimum_size` bytes have arrived or the body ends; a body that ends sooner
+# is sent as is. A body complete by then is compressed whole; a longer stream (the
+# /export endpoints) is compressed chunk by chunk from there, each chunk flushed so the
+# client receives it without the middleware buffering the rest. Responses that already
+# have a Content-Encoding, non-text types and small bodies pass through untouched.
+#
+# A compressed response's ETag is made weak (W/"..."): the bytes differ from the identity
+# representation, but If-None-Match still matches it (app/etags.py ignores the W/ prefix).
+
+_COMPRESSIBLE_TYPES = (b"text/", b"application/json", b"application/x-ndjson", b"application/xml", b"application/javascript")
+_UNCOMPRESSED_TYPES = (b"text/event-stream",)
+
+
+def _header(headers: Sequence[Tuple[bytes, bytes]], name: bytes) -> Optional[bytes]:
+    for key, value in headers:
+        if key.lower() == name:
+            return value
+    return None
+
+
+def choose_encoding(accept_encoding: str, brotli_available: bool = brotli is not None) -> Optional[str]:
+    """'br', 'gzip' or None (identity) for an Accept-Encoding header value."""
+    accepted = {}
+    for part in accept_encoding.split(","):
+        coding, _, params = part.strip().partition(";")
+        quality = 1.0
+        for param in params.split(";"):
+            name, _, value = param.strip().partition("=")
+            if name == "q":
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        if coding:
+            accepted[coding.lower()] = quality
+    candidates = (["br"] if brotli_available else []) + ["gzip"]
+    best = max(candidates, key=lambda coding: accepted.get(coding, accepted.get("*", 0.0)))
+    return best if accepted.get(best, accepted.get("*", 0.0)) > 0 else None
+
+
+class _Compressor:
+    """Incremental gzip or brotli stream: compress() returns the bytes to send now (flushed)."""
+
+    def __init__(self, encoding: str, gzip_level: int, brotli_quality: int):
+        self.encoding = encoding
+        if encoding == "br":
+            self._brotli = brotli.Compressor(quality=brotli_quality)
+        else:
+            self._zlib = zlib.compressobj(gzip_level, zlib.DEFLATED, 16 + zlib.MAX_WBITS) # gzip container
+
+    def compress(self, data: bytes) -> bytes:
+        if self.encoding == "br":
+            return self._brotli.process(data) + self._brotli.flush()
+        return self._zlib.compress(data) + self._zlib.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self) -> bytes:
+        if self.encoding == "br":
+            return self._brotli.finish()
+        return self._zlib.flush(zlib.Z_FINISH)
+
+
+def compress_body(body: bytes, encoding: str, gzip_level: int, brotli_quality: int) -> bytes:
+    if encoding == "br":
+        return brotli.compress(body, quality=brotli_quality)
+    return gzip.compress(body, compresslevel=gzip_level, mtime=0)
+
+
+class CompressionMiddleware:
+    def __init__(self, app, minimum_size: int = 1024, gzip_level: int = 6, brotli_quality: int = 4):
+        self.app = app
+        self.minimum_size = minimum_size
+        self.gzip_level = gzip_level
+        self.brotli_quality = brotli_quality
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+        encoding = choose_encoding((_header(scope["headers"], b"accept-encoding") or b"").decode("latin-1"))
+        if encoding is None:
+            return await self.app(scope, receive, send)
+
+        start: dict = {}
+        held = bytearray() # Body bytes received before the encoding is decided
+        compressor: Optional[_Compressor] = None
+        passthrough = False
+
+        async def send_compressed(message):
+            nonlocal compressor, passthrough
+            if message["type"] == "http.response.start":
+                start.update(message) # Held until the body shows the type and size
+                return
+            if message["type"] != "http.response.body" or passthrough:
+                return await send(message)
+            body = message.get("body", b"")
+            more_body = message.get("more_body", False)
+
+            if compressor is None:
+                headers: List[Tuple[bytes, bytes]] = list(start.get("headers", []))
+                content_type = _header(headers, b"content-type") or b""
+                text_like = (
+                    _header(headers, b"content-encoding") is None
+                    and content_type.startswith(_COMPRESSIBLE_TYPES)
+                    and not content_type.startswith(_UNCOMPRESSED_TYPES)
+                )
+                if not text_like:
+                    passthrough = True
+                    await send(start)
+                    return await send(message)
+                held.extend(body)
+                if more_body and len(held) < self.minimum_size:
+                    return # Not enough to decide yet
+                body, headers = bytes(held), headers + [(b"vary", b"Accept-Encoding")]
+                held.clear()
+                if not more_body and len(body) < self.minimum_size:
+                    passthrough = True
+                    await send({**start, "headers": headers})
+                    return await send({"type": "http.response.body", "body": body})
+                headers = [(k, v) for k, v in headers if k.lower() != b"content-length"]
+                headers = [(k, b"W/" + v if k.lower() == b"etag" and not v.startswith(b"W/") else v) for k, v in headers]
+                headers.append((b"content-encoding", encoding.encode()))
+                if not more_body:
+                    # Whole body in hand: one-shot compression, with a Content-Length
+                    body = compress_body(body, encoding, self.gzip_level, self.brotli_quality)
+                    headers.append((b"content-length", str(len(body)).encode()))
+                    passthrough = True
+                    await send({**start, "headers": headers})
+                    return await send({"type": "http.response.body", "body": body})
+                compressor = _Compressor(encoding, self.gzip_level, self.brotli_quality)
+                await send({**start, "headers": headers})
+
+            chunk = compressor.compress(body) if body else b""
+            if not more_body:
+                chunk += compressor.finish()
+            await send({"type": "http.response.body", "body": chunk, "more_body": more_body})
+
+        await self.app(scope, receive, send_compressed)
@@ -1,11 +1,61 @@
-from pydantic_settings import BaseSettings
+from pydantic_settings import BaseSettings, SettingsConfigDict
 from functools import lru_cache # For caching settings
+from typing import Optional
 
 class Settings(BaseSettings):
     DATABASE_URL: str = "sqlite:///./logipilot.db"
+    # Optional explicit async URL; by default derived from DATABASE_URL (sqlite -> sqlite+aiosqlite, ...)
+    ASYNC_DATABASE_URL: Optional[str] = None
     SECRET_KEY: str = "your-secret-key-please-change-in-prod"
     ALGORITHM: str = "HS256"
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 30
+    REFRESH_TOKEN_EXPIRE_DAYS: int = 14 # Sliding: every refresh extends the session
+
+    # In-process cache of authenticated principals (see app/auth/principal_cache.py)
+    PRINCIPAL_CACHE_TTL_SECONDS: int = 60
+    PRINCIPAL_CACHE_MAX_ENTRIES: int = 10000
+
+    # bcrypt runs in a dedicated thread pool (see app/auth/security.py)
+    PASSWORD_HASH_WORKERS: int = 4
+    PASSWORD_HASH_MAX_PENDING: int = 64 # Running + queued hash jobs before requests get a 503
+
+    BULK_CREATE_MAX_ITEMS: int = 1000 # Max items per POST /shipments/bulk or /alerts/bulk request
+    BATCH_FETCH_MAX_IDS: int = 500 # Max ids per /shipments/batch, /alerts/batch or /clients/batch request
+    FIELDSET_INCLUDE_LIMIT: int = 20 # Max children embedded per row by ?include=alerts (shipments) or ?include=shipments (clients)
+    EXPORT_BATCH_SIZE: int = 1000 # Rows fetched (and flushed to the client) per batch by the /export endpoints
+
+    # Cached list totals for ?include_total=true (see app/crud/count_cache.py)
+    COUNT_CACHE_MAX_ENTRIES: int = 10000
+    COUNT_CACHE_RECONCILE_SECONDS: int = 300 # Re-count every cached total this often; 0 disables the task
+
+    # Write-invalidated cache of GET responses (see app/response_cache.py)
+    RESPONSE_CACHE_TTL_SECONDS: int = 30 # 0 disables the cache
+    RESPONSE_CACHE_MAX_ENTRIES: int = 5000
+    RESPONSE_CACHE_MAX_BODY_BYTES: int = 1048576 # Larger responses are served but not stored
+    RESPONSE_CACHE_BACKEND: str = "memory" # "memory" (per process) or "sqlite" (a file shared by the workers on a host)
+    RESPONSE_CACHE_SQLITE_PATH: str = "./response_cache.db"
+    RESPONSE_COALESCING: bool = True # Identical concurrent GETs (same role) share one response, even with the cache off
+
+    # gzip/brotli response compression (see app/compression.py)
+    COMPRESSION_ENABLED: bool = True
+    COMPRESSION_MINIMUM_SIZE: int = 1024 # Smaller bodies are sent as is
+    COMPRESSION_GZIP_LEVEL: int = 6 # 1 (fastest) .. 9 (smallest)
+    COMPRESSION_BROTLI_QUALITY: int = 4 # 0 .. 11; used when the brotli package is installed
+
+    # Push stream of alert changes: GET /alerts/stream (SSE) and /alerts/ws (see app/alert_stream.py)
+    ALERT_STREAM_HEARTBEAT_SECONDS: int = 15 # An idle stream sends a ping this often (keeps proxies from closing it)
+    ALERT_STREAM_QUEUE_SIZE: int = 100 # Events a slow subscriber may fall behind before it gets a reset instead
+    ALERT_STREAM_REPLAY_SIZE: int = 1000 # Recent events kept for Last-Event-ID resume
+
+    # Change log behind GET /changes (see app/crud/crud_change.py)
+    CHANGE_LOG_COMPACT_AFTER_HOURS: int = 24 # Older entries are merged to one per row
+    CHANGE_LOG_RETENTION_DAYS: int = 30 # Older entries are deleted; readers further behind must re-sync
+    CHANGE_LOG_MAINTENANCE_SECONDS: int = 3600 # Compact and prune this often; 0 disables the task
+
+    # Lane transit-time statistics behind GET /analytics/lanes (see app/crud/lane_stats.py)
+    LANE_STATS_REBUILD_SECONDS: int = 3600 # Full rebuild this often, for deletes and lane edits made through other workers
+
+    SEARCH_RANK_CANDIDATES: int = 1000 # GET /search ranks at most this many (newest) matches by relevance
 
     ADMIN_EMAIL: str = "admin@logipilot.com"
     ADMIN_PASSWORD: str = "admin123"
@@ -13,9 +63,7 @@ class Settings(BaseSettings):
     # Optional: Add other settings as needed
     # API_V1_STR: str = "/api/v1"
 
-    class Config:
-        env_file = ".env"
-        env_file_encoding = 'utf-8'
+    model_config = SettingsConfigDict(env_file=".env", env_file_encoding="utf-8")
 
 @lru_cache()
 def get_settings():
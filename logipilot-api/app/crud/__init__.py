@@ -3,7 +3,7 @@
 # from .crud_user import user
 # from .crud_item import item
 
-# For now, we'll leave it empty and import specific modules as needed.
-# This helps in organizing CRUD operations for different models.
-# Each model (e.g., User, Client, Shipment) will have its own crud_*.py file.
-pass
+# Routers access the CRUD modules as attributes of this package (e.g. crud.crud_client),
+# so the submodules must be imported here for those lookups to resolve.
+# Each model (e.g., User, Client, Shipment) has its own crud_*.py file.
+from . import crud_user, crud_client, crud_shipment, crud_alert, crud_refresh_token, crud_counter, crud_change, crud_location, crud_search, client_suggest, lane_stats
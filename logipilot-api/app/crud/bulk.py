@@ -0,0 +1,47 @@
+from collections import defaultdict, deque
+from typing import Any, Callable, Dict, Hashable, Iterable, List, Optional, Sequence, Tuple
+
+# Helpers for the bulk create and batch fetch functions in crud_*.
+#
+# A multi-row INSERT .. RETURNING is one round trip, but not every database promises that
+# RETURNING rows come back in VALUES order (SQLite does not). Asking SQLAlchemy for
+# sort_by_parameter_order makes it fall back to one INSERT per row on such backends, so
+# instead the returned rows are matched back to their inputs by the values just inserted.
+
+def match_returned_rows(
+    inputs: Sequence[Any],
+    returned: Sequence[Any],
+    input_key: Callable[[Any], Hashable],
+    row_key: Callable[[Any], Hashable],
+) -> List[Any]:
+    """
+    Returns `returned` reordered to line up with `inputs`. Inputs with identical keys are
+    interchangeable, so they receive their rows in id order.
+    """
+    by_key: Dict[Hashable, deque] = defaultdict(deque)
+    for row in sorted(returned, key=lambda r: r.id):
+        by_key[row_key(row)].append(row)
+    return [by_key[input_key(item)].popleft() for item in inputs]
+
+def unique_ids(ids: Iterable[int], max_ids: int) -> List[int]:
+    """De-duplicates `ids` keeping first-occurrence order. Raises ValueError if empty or over `max_ids`."""
+    unique = list(dict.fromkeys(ids))
+    if not unique:
+        raise ValueError("At least one id is required.")
+    if len(unique) > max_ids:
+        raise ValueError(f"At most {max_ids} ids can be fetched per request.")
+    return unique
+
+def parse_id_list(raw: str, max_ids: int) -> List[int]:
+    """Parses a comma-separated ?ids= value ("1,2,3"). Raises ValueError on anything else."""
+    try:
+        ids = [int(part) for part in raw.split(",") if part.strip()]
+    except ValueError:
+        raise ValueError("ids must be a comma-separated list of integers.")
+    return unique_ids(ids, max_ids)
+
+def split_found(ids: Sequence[int], rows: Sequence[Optional[Any]]) -> Tuple[List[Any], List[int]]:
+    """Splits a *_by_ids result (aligned with `ids`, None where missing) into (found rows, missing ids)."""
+    found = [row for row in rows if row is not None]
+    missing = [id_ for id_, row in zip(ids, rows) if row is None]
+    return found, missing
@@ -0,0 +1,126 @@
+import bisect
+import threading
+from array import array
+from typing import Dict, Iterable, List, Tuple
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from ..models.client import Client as ClientModel
+
+# In-process prefix index over client names and emails for GET /clients/suggest.
+#
+# Two parallel sorted arrays: casefolded keys (one per name and one per email) and the
+# client id each key belongs to. A lookup is a binary search for the prefix followed by a
+# short forward scan, so it costs O(log n + k) with no database round trip. Keys live in a
+# plain list of str and ids in a compact array('q') (8 bytes each, no int objects), and a
+# key that is already lowercase (typically the email) shares the client's string rather
+# than storing a copy. See benchmarks/client_suggest.py for the measured footprint.
+#
+# Loaded at startup and kept current by crud_client's create/update/delete. Like the
+# other caches it is per process; writes made outside the API show up after a restart.
+
+
+class ClientSuggestIndex:
+    def __init__(self):
+        self._keys: List[str] = []
+        self._ids = array("q")
+        self._clients: Dict[int, Tuple[str, str]] = {} # id -> (name, email)
+        self._lock = threading.Lock()
+        self.loaded = False
+
+    @staticmethod
+    def _key(value: str) -> str:
+        key = value.casefold()
+        return value if key == value else key
+
+    def load(self, rows: Iterable[Tuple[int, str, str]]) -> None:
+        """Replaces the index with (id, name, email) rows, sorting once instead of inserting one by one."""
+        clients = {client_id: (name, email) for client_id, name, email in rows}
+        entries = sorted(
+            (self._key(value), client_id)
+            for client_id, (name, email) in clients.items()
+            for value in (name, email)
+        )
+        with self._lock:
+            self._keys = [key for key, _ in entries]
+            self._ids = array("q", (client_id for _, client_id in entries))
+            self._clients = clients
+            self.loaded = True
+
+    def _insert(self, key: str, client_id: int) -> None:
+        position = bisect.bisect_left(self._keys, key)
+        # Equal keys are kept ordered by id so removal can find the exact entry
+        while position < len(self._keys) and self._keys[position] == key and self._ids[position] < client_id:
+            position += 1
+        self._keys.insert(position, key)
+        self._ids.insert(position, client_id)
+
+    def _delete(self, key: str, client_id: int) -> None:
+        position = bisect.bisect_left(self._keys, key)
+        while position < len(self._keys) and self._keys[position] == key:
+            if self._ids[position] == client_id:
+                del self._keys[position]
+                del self._ids[position]
+                return
+            position += 1
+
+    def put(self, client_id: int, name: str, email: str) -> None:
+        with self._lock:
+            self._remove_locked(client_id)
+            self._clients[client_id] = (name, email)
+            for value in (name, email):
+                self._insert(self._key(value), client_id)
+
+    def _remove_locked(self, client_id: int) -> None:
+        previous = self._clients.pop(client_id, None)
+        if previous is not None:
+            for value in previous:
+                self._delete(self._key(value), client_id)
+
+    def remove(self, client_id: int) -> None:
+        with self._lock:
+            self._remove_locked(client_id)
+
+    def suggest(self, prefix: str, limit: int = 10) -> List[Tuple[int, str, str]]:
+        """Up to `limit` (id, name, email) whose name or email starts with `prefix` (case-insensitive), in key order."""
+        prefix = prefix.casefold()
+        results: List[Tuple[int, str, str]] = []
+        seen = set()
+        with self._lock:
+            position = bisect.bisect_left(self._keys, prefix)
+            while position < len(self._keys) and len(results) < limit and self._keys[position].startswith(prefix):
+                client_id = self._ids[position]
+                if client_id not in seen: # Name and email may both match
+                    seen.add(client_id)
+                    name, email = self._clients[client_id]
+                    results.append((client_id, name, email))
+                position += 1
+        return results
+
+    def __len__(self) -> int:
+        return len(self._clients)
+
+
+# Process-wide index used by crud_client and GET /clients/suggest
+client_suggest_index = ClientSuggestIndex()
+
+
+def load_client_suggest_index(db: Session) -> int:
+    """(Re)builds the index from the clients table. Returns the number of clients indexed."""
+    client_suggest_index.load(db.execute(select(ClientModel.id, ClientModel.name, ClientModel.email)).tuples())
+    return len(client_suggest_index)
+
+
+def suggest_clients(db: Session, prefix: str, limit: int = 10) -> List[Tuple[int, str, str]]:
+    # Loads the index on first use if startup didn't (e.g. scripts, test clients without lifespan)
+    if not client_suggest_index.loaded:
+        load_client_suggest_index(db)
+    return client_suggest_index.suggest(prefix, limit)
+
+
+async def suggest_clients_async(db: AsyncSession, prefix: str, limit: int = 10) -> List[Tuple[int, str, str]]:
+    if client_suggest_index.loaded:
+        return client_suggest_index.suggest(prefix, limit) # No database access needed
+    return await db.run_sync(suggest_clients, prefix=prefix, limit=limit)
@@ -0,0 +1,196 @@
+import asyncio
+import itertools
+import logging
+import functools
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterable, Optional, Tuple
+
+from sqlalchemy.orm import Session
+
+from ..core.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Cached COUNT(*) results for the list endpoints, keyed by table and filter values,
+# e.g. ("shipments", (("status", IN_TRANSIT),)) or ("alerts", (("shipment_id", 7),)).
+#
+# Entries are filled by a COUNT query on first use, then kept current by the crud
+# writes: creates and deletes apply +1/-1 to every cached key the row matches, so a
+# count stays exact without another query. Updates that move a row between filter
+# values (e.g. a status change) only know the new value, so the affected entries are
+# flagged as estimated until the next reconcile re-counts them.
+#
+# A COUNT runs outside the lock, so a write can land while it is in flight: its delta
+# could be lost (the entry doesn't exist yet) or applied on top of a count that already
+# saw the row. Each table has a write generation, advanced when a crud write starts
+# (tracks_writes) and again by its delta, estimate flag or invalidation and when it ends.
+# A count is stored as exact only if no write was in progress when it started and the
+# generation hadn't moved by the time it is stored; otherwise it is stored as estimated.
+#
+# Like the principal cache this is per process: writes served by other workers are
+# only picked up by the periodic reconcile, which bounds how long a count can drift.
+
+FilterKey = Tuple[Tuple[str, Any], ...]
+
+
+def _filter_key(filters: Dict[str, Any]) -> FilterKey:
+    return tuple(sorted(((k, v) for k, v in filters.items() if v is not None), key=lambda item: item[0]))
+
+
+class CountCache:
+    """
+    Bounded in-process map of (table, filters) -> [count, exact]. The least recently
+    read entry is evicted once `max_entries` is reached; 0 disables caching.
+    """
+
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[Tuple[str, FilterKey], list]" = OrderedDict()
+        self._generations: Dict[str, int] = {} # table -> write generation
+        self._pending: Dict[str, int] = {} # table -> writes in progress
+        self._lock = threading.Lock()
+
+    def _advance(self, table: str) -> None:
+        # Caller must hold self._lock
+        self._generations[table] = self._generations.get(table, 0) + 1
+
+    def write_generation(self, table: str) -> Optional[int]:
+        """Take before counting `table`; None while a write to it is in progress (the count can't be exact)."""
+        with self._lock:
+            return None if self._pending.get(table) else self._generations.get(table, 0)
+
+    @contextmanager
+    def writing(self, *tables: str):
+        """Brackets a write to `tables`, from before its first statement to after its cache updates."""
+        with self._lock:
+            for table in tables:
+                self._pending[table] = self._pending.get(table, 0) + 1
+                self._advance(table)
+        try:
+            yield
+        finally:
+            with self._lock:
+                for table in tables:
+                    self._pending[table] -= 1
+                    self._advance(table)
+
+    def get(self, table: str, filters: Dict[str, Any]) -> Optional[Tuple[int, bool]]:
+        key = (table, _filter_key(filters))
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            self._entries.move_to_end(key)
+            return entry[0], entry[1]
+
+    def set(self, table: str, filters: Dict[str, Any], count: int, generation: Optional[int]) -> bool:
+        """
+        Stores a freshly counted value, started at write_generation() `generation`. Returns
+        whether it is exact: no write was in progress then and none has happened since.
+        """
+        key = (table, _filter_key(filters))
+        with self._lock:
+            exact = generation is not None and generation == self._generations.get(table, 0)
+            if self.max_entries <= 0:
+                return exact
+            self._entries[key] = [count, exact]
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+            return exact
+
+    def apply_delta(self, table: str, row: Dict[str, Any], delta: int) -> None:
+        """Adjusts every cached count whose filters match `row` (a created or deleted row's filter columns)."""
+        items = [(k, v) for k, v in row.items() if v is not None]
+        with self._lock:
+            self._advance(table)
+            # A row matches the unfiltered count, each single filter, and each combination of them
+            for size in range(len(items) + 1):
+                for subset in itertools.combinations(items, size):
+                    entry = self._entries.get((table, _filter_key(dict(subset))))
+                    if entry is not None:
+                        entry[0] = max(0, entry[0] + delta)
+
+    def mark_estimated(self, table: str, columns: Iterable[str]) -> None:
+        """Flags cached counts filtered on any of `columns` after an update changed those columns."""
+        columns = set(columns)
+        with self._lock:
+            self._advance(table)
+            for (entry_table, key), entry in self._entries.items():
+                if entry_table == table and any(name in columns for name, _ in key):
+                    entry[1] = False
+
+    def invalidate_table(self, table: str) -> None:
+        # Used when rows disappear through cascades whose filter values we don't have
+        with self._lock:
+            self._advance(table)
+            for key in [key for key in self._entries if key[0] == table]:
+                del self._entries[key]
+
+    def keys(self):
+        with self._lock:
+            return list(self._entries.keys())
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+# Process-wide cache used by crud_shipment, crud_alert and crud_client
+count_cache = CountCache(max_entries=settings.COUNT_CACHE_MAX_ENTRIES)
+
+# table -> count function taking the filters as keyword arguments; registered by the crud modules
+_counters: Dict[str, Callable[..., int]] = {}
+
+
+def register_counter(table: str, counter: Callable[..., int]) -> None:
+    _counters[table] = counter
+
+
+def tracks_writes(*tables: str):
+    """Decorates a crud write to `tables` so counts taken while it runs aren't stored as exact."""
+    def decorator(write):
+        @functools.wraps(write)
+        def wrapper(*args, **kwargs):
+            with count_cache.writing(*tables):
+                return write(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def cached_count(db: Session, table: str, filters: Dict[str, Any]) -> Tuple[int, bool]:
+    """Returns (count, exact), running the COUNT query only on a cache miss."""
+    cached = count_cache.get(table, filters)
+    if cached is not None:
+        return cached
+    generation = count_cache.write_generation(table)
+    count = _counters[table](db, **filters)
+    return count, count_cache.set(table, filters, count, generation)
+
+
+def reconcile_counts(db: Session) -> int:
+    """Re-counts every cached entry from the database. Returns the number of entries refreshed."""
+    refreshed = 0
+    for table, key in count_cache.keys():
+        filters = dict(key)
+        generation = count_cache.write_generation(table)
+        count_cache.set(table, filters, _counters[table](db, **filters), generation)
+        refreshed += 1
+    return refreshed
+
+
+async def reconcile_periodically(interval_seconds: float) -> None:
+    from ..database import AsyncSessionLocal
+    while True:
+        await asyncio.sleep(interval_seconds)
+        try:
+            async with AsyncSessionLocal() as db:
+                refreshed = await db.run_sync(reconcile_counts)
+            logger.debug("Reconciled %d cached counts", refreshed)
+        except Exception:
+            logger.exception("Count cache reconcile failed")
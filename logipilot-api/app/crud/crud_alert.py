@@ -1,69 +1,243 @@
 from sqlalchemy.orm import Session, joinedload
-from typing import Optional, List
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import func, insert, select, update
+from sqlalchemy.sql import Select
+from typing import Optional, List, Tuple
+from datetime import datetime
 
 from ..models.alert import Alert as AlertModel, AlertSeverityEnum
 from ..models.shipment import Shipment as ShipmentModel # To validate shipment_id
 from ..schemas.alert import AlertCreate, AlertUpdate, AlertSeverity as PydanticAlertSeverity
+from ..schemas.shipment import ShipmentPublicWithClientId
+from .. import fieldsets
+from . import pagination, bulk, errors, crud_counter, crud_change
+from .count_cache import count_cache, cached_count, register_counter, tracks_writes
+from ..response_cache import response_cache
+from ..alert_stream import alert_broker
 
-def get_alert(db: Session, alert_id: int) -> Optional[AlertModel]:
-    # Optionally join shipment details if needed, but AlertPublic doesn't nest them by default.
-    # return db.query(AlertModel).options(joinedload(AlertModel.shipment)).filter(AlertModel.id == alert_id).first()
-    return db.query(AlertModel).filter(AlertModel.id == alert_id).first()
+# Alerts are listed newest first; id breaks ties so the order (and cursors) are deterministic
+ALERT_CURSOR_KINDS = (datetime, int)
+
+def alert_cursor_key(alert: AlertModel) -> tuple:
+    return (alert.createdAt, alert.id)
+
+# ?fields= / ?include= for the alert read endpoints (see app/fieldsets.py)
+ALERT_FIELDS = fieldsets.Resource(
+    columns={name: getattr(AlertModel, name) for name in ("id", "shipment_id", "message", "severity", "createdAt")},
+    required=(AlertModel.id, AlertModel.createdAt),
+    relations={"shipment": fieldsets.Relation(AlertModel.shipment, ShipmentPublicWithClientId)},
+)
+
+def _alert_query(db: Session, fieldset: Optional[fieldsets.Fieldset]):
+    # AlertPublic doesn't nest the shipment; ?include=shipment joins it in
+    if fieldset is None:
+        return db.query(AlertModel)
+    return db.query(AlertModel).options(*fieldsets.load_options(ALERT_FIELDS, fieldset))
+
+def get_alert(db: Session, alert_id: int, fieldset: Optional[fieldsets.Fieldset] = None) -> Optional[AlertModel]:
+    return _alert_query(db, fieldset).filter(AlertModel.id == alert_id).first()
+
+def get_alert_version(db: Session, alert_id: int) -> Optional[int]:
+    # Primary-key lookup of the version alone, for If-None-Match checks
+    return db.scalar(select(AlertModel.version).where(AlertModel.id == alert_id))
+
+def get_alerts_by_ids(db: Session, alert_ids: List[int], fieldset: Optional[fieldsets.Fieldset] = None) -> List[Optional[AlertModel]]:
+    """One entry per id, in the given order: the alert, or None if it doesn't exist."""
+    found = {alert.id: alert for alert in _alert_query(db, fieldset).filter(AlertModel.id.in_(alert_ids)).all()}
+    return [found.get(alert_id) for alert_id in alert_ids]
+
+def filter_alerts(query, shipment_id: Optional[int] = None, severity: Optional[PydanticAlertSeverity] = None):
+    # Shared by the list and export queries; works on a Query or a select()
+    if shipment_id is not None:
+        query = query.filter(AlertModel.shipment_id == shipment_id)
+    if severity:
+        query = query.filter(AlertModel.severity == AlertSeverityEnum(severity.value))
+    return query
 
 def get_alerts(
     db: Session,
     skip: int = 0,
     limit: int = 100,
     shipment_id: Optional[int] = None,
-    severity: Optional[PydanticAlertSeverity] = None
+    severity: Optional[PydanticAlertSeverity] = None,
+    after: Optional[tuple] = None,
+    before: Optional[tuple] = None,
+    fieldset: Optional[fieldsets.Fieldset] = None
 ) -> List[AlertModel]:
-    query = db.query(AlertModel)
+    query = filter_alerts(_alert_query(db, fieldset), shipment_id=shipment_id, severity=severity)
 
-    if shipment_id is not None:
-        query = query.filter(AlertModel.shipment_id == shipment_id)
-    if severity:
-        query = query.filter(AlertModel.severity == AlertSeverityEnum(severity.value))
+    # after/before are (createdAt, id) keys from a cursor; they replace OFFSET with an index seek
+    query = pagination.apply_keyset(
+        query, (AlertModel.createdAt, AlertModel.id), descending=True, after=after, before=before
+    )
+    if after is None and before is None:
+        query = query.offset(skip) # Legacy offset paging, kept for backward compatibility
+    return pagination.reverse_if_before(query.limit(limit).all(), before, after)
 
-    return query.order_by(AlertModel.createdAt.desc()).offset(skip).limit(limit).all()
+def count_alerts(db: Session, shipment_id: Optional[int] = None, severity: Optional[PydanticAlertSeverity] = None) -> int:
+    return db.scalar(filter_alerts(select(func.count()).select_from(AlertModel), shipment_id=shipment_id, severity=severity))
 
-def create_alert(db: Session, alert: AlertCreate) -> Optional[AlertModel]:
-    # Validate if shipment_id exists
-    shipment = db.query(ShipmentModel).filter(ShipmentModel.id == alert.shipment_id).first()
-    if not shipment:
-        return None # Or raise ValueError(f"Shipment with id {alert.shipment_id} not found")
+def get_alerts_total(db: Session, shipment_id: Optional[int] = None, severity: Optional[PydanticAlertSeverity] = None) -> Tuple[int, bool]:
+    # (total, exact) for the list filters, from the count cache when possible
+    return cached_count(db, "alerts", {"shipment_id": shipment_id, "severity": severity})
 
-    db_alert = AlertModel(
-        shipment_id=alert.shipment_id,
-        message=alert.message,
-        severity=AlertSeverityEnum(alert.severity.value)
-        # createdAt will be handled by server_default
-    )
-    db.add(db_alert)
-    db.commit()
-    db.refresh(db_alert)
+def _count_filters(db_alert: AlertModel) -> dict:
+    # The filterable columns of a row, as count_cache keys them
+    return {"shipment_id": db_alert.shipment_id, "severity": db_alert.severity}
+
+def export_alerts_statement(shipment_id: Optional[int] = None, severity: Optional[PydanticAlertSeverity] = None) -> Select:
+    # Same filters and (index-backed) order as get_alerts, without paging; streamed by app/export.py
+    statement = filter_alerts(select(AlertModel), shipment_id=shipment_id, severity=severity)
+    return pagination.apply_keyset(statement, (AlertModel.createdAt, AlertModel.id), descending=True)
+
+@tracks_writes("alerts")
+def create_alert(db: Session, alert: AlertCreate) -> AlertModel:
+    # Single INSERT .. RETURNING (createdAt comes back with it).
+    # A missing shipment is rejected by the FK constraint and raised as errors.ForeignKeyViolation.
+    with errors.translate_integrity_errors(db):
+        db_alert = db.scalars(
+            insert(AlertModel).values(
+                shipment_id=alert.shipment_id,
+                message=alert.message,
+                severity=AlertSeverityEnum(alert.severity.value)
+            ).returning(AlertModel)
+        ).one()
+        crud_counter.increment(db, "alerts", [db_alert.severity])
+        crud_change.record(db, [crud_change.created("alerts", db_alert)])
+        db.commit()
+    count_cache.apply_delta("alerts", _count_filters(db_alert), 1)
+    response_cache.invalidate("alerts")
+    alert_broker.publish("created", db_alert)
     return db_alert
 
-def update_alert(db: Session, db_alert: AlertModel, alert_in: AlertUpdate) -> AlertModel:
-    alert_data = alert_in.dict(exclude_unset=True)
+@tracks_writes("alerts")
+def create_alerts_bulk(db: Session, alerts: List[AlertCreate]) -> List[Optional[AlertModel]]:
+    """
+    Inserts many alerts in one transaction. Returns one entry per input, in order:
+    the created alert, or None if its shipment does not exist (that item is skipped).
+    A shipment deleted between that check and the INSERT raises errors.ForeignKeyViolation
+    and nothing is created.
+    """
+    # One IN query validates every referenced shipment
+    shipment_ids = {alert.shipment_id for alert in alerts}
+    existing = set(db.scalars(select(ShipmentModel.id).where(ShipmentModel.id.in_(shipment_ids))).all()) if shipment_ids else set()
 
-    # shipment_id is generally not changed for an existing alert.
-    # If it were, validation for the new shipment_id would be needed here.
+    rows = [
+        {
+            "shipment_id": alert.shipment_id,
+            "message": alert.message,
+            "severity": AlertSeverityEnum(alert.severity.value),
+        }
+        for alert in alerts if alert.shipment_id in existing
+    ]
+    created = iter([])
+    with errors.translate_integrity_errors(db):
+        if rows:
+            # ORM bulk INSERT .. RETURNING: batched into multi-row statements, ids and createdAt come back with it
+            returned = db.scalars(insert(AlertModel).returning(AlertModel), rows).all()
+            created = iter(bulk.match_returned_rows(
+                rows, returned,
+                input_key=lambda r: (r["shipment_id"], r["message"], r["severity"]),
+                row_key=lambda a: (a.shipment_id, a.message, a.severity),
+            ))
+            crud_counter.increment(db, "alerts", [row["severity"] for row in rows])
+            crud_change.record(db, [crud_change.created("alerts", db_alert) for db_alert in returned])
+        db.commit()
 
-    for field, value in alert_data.items():
-        if value is not None:
-            if field == "severity":
-                setattr(db_alert, field, AlertSeverityEnum(value))
-            else:
-                setattr(db_alert, field, value)
+    results = [next(created) if alert.shipment_id in existing else None for alert in alerts]
+    for db_alert in results:
+        if db_alert is not None:
+            count_cache.apply_delta("alerts", _count_filters(db_alert), 1)
+    if rows:
+        response_cache.invalidate("alerts")
+    for db_alert in results:
+        if db_alert is not None:
+            alert_broker.publish("created", db_alert)
+    return results
+
+@tracks_writes("alerts")
+def update_alert(db: Session, alert_id: int, alert_in: AlertUpdate) -> Optional[AlertModel]:
+    # Single UPDATE .. RETURNING; returns None if the alert doesn't exist.
+    # shipment_id is generally not changed for an existing alert.
+    alert_data = alert_in.model_dump(exclude_unset=True, exclude_none=True)
+    if "severity" in alert_data:
+        alert_data["severity"] = AlertSeverityEnum(alert_data["severity"])
+    if not alert_data:
+        return get_alert(db, alert_id) # Nothing to change
 
-    db.add(db_alert)
+    if "severity" in alert_data:
+        crud_counter.move(db, "alerts", alert_id, alert_data["severity"])
+    db_alert = db.scalars(
+        update(AlertModel)
+        .where(AlertModel.id == alert_id)
+        .values(**alert_data, version=AlertModel.version + 1)
+        .returning(AlertModel)
+        .execution_options(populate_existing=True)
+    ).one_or_none()
+    if db_alert is not None and "severity" not in alert_data:
+        crud_counter.touch(db, "alerts") # move() already did for severity changes
+    if db_alert is not None:
+        crud_change.record(db, [crud_change.updated("alerts", db_alert, alert_data)])
     db.commit()
-    db.refresh(db_alert)
+    if db_alert is not None and alert_data.keys() & {"shipment_id", "severity"}:
+        # The previous values aren't returned, so counts filtered on them become estimates
+        count_cache.mark_estimated("alerts", alert_data.keys())
+    if db_alert is not None:
+        response_cache.invalidate("alerts")
+        alert_broker.publish("updated", db_alert)
     return db_alert
 
+@tracks_writes("alerts")
 def delete_alert(db: Session, alert_id: int) -> Optional[AlertModel]:
     db_alert = db.query(AlertModel).filter(AlertModel.id == alert_id).first()
     if db_alert:
         db.delete(db_alert)
+        crud_counter.increment(db, "alerts", [db_alert.severity], by=-1)
+        crud_change.record(db, [crud_change.deleted("alerts", db_alert)])
         db.commit()
+        count_cache.apply_delta("alerts", _count_filters(db_alert), -1)
+        response_cache.invalidate("alerts")
+        alert_broker.publish("deleted", db_alert)
     return db_alert
+
+# --- Async versions ---
+# Awaited by the async routers. Each runs the sync implementation above through
+# AsyncSession.run_sync, so DB round trips are awaited instead of blocking the event loop.
+
+async def get_alert_async(db: AsyncSession, alert_id: int, fieldset: Optional[fieldsets.Fieldset] = None) -> Optional[AlertModel]:
+    return await db.run_sync(get_alert, alert_id=alert_id, fieldset=fieldset)
+
+async def get_alert_version_async(db: AsyncSession, alert_id: int) -> Optional[int]:
+    return await db.run_sync(get_alert_version, alert_id=alert_id)
+
+async def get_alerts_by_ids_async(db: AsyncSession, alert_ids: List[int], fieldset: Optional[fieldsets.Fieldset] = None) -> List[Optional[AlertModel]]:
+    return await db.run_sync(get_alerts_by_ids, alert_ids=alert_ids, fieldset=fieldset)
+
+async def get_alerts_async(
+    db: AsyncSession,
+    skip: int = 0,
+    limit: int = 100,
+    shipment_id: Optional[int] = None,
+    severity: Optional[PydanticAlertSeverity] = None,
+    after: Optional[tuple] = None,
+    before: Optional[tuple] = None,
+    fieldset: Optional[fieldsets.Fieldset] = None
+) -> List[AlertModel]:
+    return await db.run_sync(get_alerts, skip=skip, limit=limit, shipment_id=shipment_id, severity=severity, after=after, before=before, fieldset=fieldset)
+
+async def get_alerts_total_async(db: AsyncSession, shipment_id: Optional[int] = None, severity: Optional[PydanticAlertSeverity] = None) -> Tuple[int, bool]:
+    return await db.run_sync(get_alerts_total, shipment_id=shipment_id, severity=severity)
+
+async def create_alert_async(db: AsyncSession, alert: AlertCreate) -> AlertModel:
+    return await db.run_sync(create_alert, alert=alert)
+
+async def create_alerts_bulk_async(db: AsyncSession, alerts: List[AlertCreate]) -> List[Optional[AlertModel]]:
+    return await db.run_sync(create_alerts_bulk, alerts=alerts)
+
+async def update_alert_async(db: AsyncSession, alert_id: int, alert_in: AlertUpdate) -> Optional[AlertModel]:
+    return await db.run_sync(update_alert, alert_id=alert_id, alert_in=alert_in)
+
+async def delete_alert_async(db: AsyncSession, alert_id: int) -> Optional[AlertModel]:
+    return await db.run_sync(delete_alert, alert_id=alert_id)
+
+register_counter("alerts", count_alerts)
@@ -0,0 +1,209 @@
+import asyncio
+import enum
+import json
+import logging
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import delete, func, insert, inspect, select, tuple_, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from ..models.change import Change as ChangeModel
+from ..models.counter import Counter as CounterModel
+from .upsert import dialect_insert
+
+logger = logging.getLogger(__name__)
+
+# Change log behind GET /changes, for downstream systems that mirror clients, shipments
+# and alerts. The crud writes add their entries before they commit, so an entry exists
+# exactly when its write does, and a mirror catches up by reading the entries after the
+# last seq it applied: a primary-key range scan whose cost follows the number of
+# changes, not the size of the tables.
+#
+# Entries: create carries the full row, update the columns it set (plus the new
+# version), delete nothing. Mirrors apply create as an upsert and update as a patch;
+# that keeps compacted entries (below) correct for a reader positioned anywhere in them.
+# ORM cascades are logged too: deleting a client logs the deletes of its alerts and
+# shipments first, children before parents.
+#
+# Maintenance (compact_and_prune, run by the API in the background and by
+# `python -m app.compact_changes`):
+#   compaction  entries older than CHANGE_LOG_COMPACT_AFTER_HOURS are merged to one per
+#               row, kept at the row's highest seq
+#   pruning     entries older than CHANGE_LOG_RETENTION_DAYS are deleted; the highest
+#               pruned seq is kept in the counters table, and GET /changes answers 410
+#               to a reader whose `since` is below it (it must re-sync from an export)
+#
+# seq comes from SQLite's AUTOINCREMENT; writers are serialized, so seq order is commit
+# order. (On a backend with concurrent writers, a sequence value can commit after a
+# higher one; readers should then stay a few seconds behind the head.)
+
+# Bookkeeping rows in the counters table (entity "changes"), next to crud_counter's change generations
+LOG_ENTITY = "changes"
+PRUNED_BUCKET = "_pruned_through"
+COMPACTED_BUCKET = "_compacted_through"
+
+# Rows merged per compaction round trip
+COMPACT_BATCH_SIZE = 500
+
+
+def _json_value(value):
+    if isinstance(value, enum.Enum):
+        return value.value
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return value
+
+
+def _dump(values: dict) -> str:
+    return json.dumps({key: _json_value(value) for key, value in values.items()}, separators=(",", ":"))
+
+
+def created(entity: str, row) -> dict:
+    """The entry for a row just inserted (after INSERT .. RETURNING, so server defaults are set)."""
+    values = {attr.key: getattr(row, attr.key) for attr in inspect(row).mapper.column_attrs}
+    return {"entity": entity, "entity_id": row.id, "op": "create", "diff": _dump(values)}
+
+
+def updated(entity: str, row, values: dict) -> dict:
+    return {"entity": entity, "entity_id": row.id, "op": "update", "diff": _dump({**values, "version": row.version})}
+
+
+def deleted(entity: str, row) -> dict:
+    return {"entity": entity, "entity_id": row.id, "op": "delete", "diff": None}
+
+
+def record(db: Session, entries: Iterable[dict]) -> None:
+    # One executemany for any number of entries; the caller commits
+    entries = list(entries)
+    if entries:
+        db.execute(insert(ChangeModel), entries)
+
+
+def _bookkeeping(db: Session, bucket: str) -> int:
+    return db.scalar(select(CounterModel.count).where(CounterModel.entity == LOG_ENTITY, CounterModel.bucket == bucket)) or 0
+
+
+def _set_bookkeeping(db: Session, bucket: str, value: int) -> None:
+    statement = dialect_insert(db)(CounterModel.__table__).values(entity=LOG_ENTITY, bucket=bucket, count=value)
+    db.execute(statement.on_conflict_do_update(index_elements=["entity", "bucket"], set_={"count": statement.excluded["count"]}))
+
+
+def get_feed_bounds(db: Session) -> Tuple[int, int]:
+    """(latest seq, highest pruned seq), in one round trip of primary-key reads."""
+    latest = select(func.max(ChangeModel.seq)).scalar_subquery()
+    pruned = select(CounterModel.count).where(CounterModel.entity == LOG_ENTITY, CounterModel.bucket == PRUNED_BUCKET).scalar_subquery()
+    row = db.execute(select(latest, pruned)).one()
+    # An emptied log still reports the position pruning reached
+    return max(row[0] or 0, row[1] or 0), row[1] or 0
+
+
+def get_changes(db: Session, since: int, limit: int, entity: Optional[str] = None) -> List[ChangeModel]:
+    # Index range scan: the primary key, or (entity, seq) with ?entity=
+    query = select(ChangeModel).where(ChangeModel.seq > since)
+    if entity is not None:
+        query = query.where(ChangeModel.entity == entity)
+    return list(db.scalars(query.order_by(ChangeModel.seq).limit(limit)).all())
+
+
+def _first_seq_at_or_after(db: Session, moment: datetime) -> Optional[int]:
+    # changedAt follows seq, so walking the primary key stops at the first recent entry
+    return db.scalar(select(ChangeModel.seq).where(ChangeModel.changedAt >= moment).order_by(ChangeModel.seq).limit(1))
+
+
+def _merge(entries: List[ChangeModel]) -> Tuple[str, Optional[dict]]:
+    # The net effect of one row's entries, in seq order
+    op, diff = "update", {}
+    for entry in entries:
+        if entry.op == "delete":
+            op, diff = "delete", None
+        elif entry.op == "create":
+            op, diff = "create", json.loads(entry.diff)
+        else:
+            diff = {**(diff or {}), **json.loads(entry.diff)}
+    return op, diff
+
+
+def compact_changes(db: Session, older_than: datetime) -> int:
+    """
+    Merges each row's entries older than `older_than` into one entry at its highest seq.
+    Only rows with entries added since the last compaction are looked at. Returns the
+    number of entries removed.
+    """
+    start = _bookkeeping(db, COMPACTED_BUCKET)
+    end = _first_seq_at_or_after(db, older_than) or (db.scalar(select(func.max(ChangeModel.seq))) or 0) + 1
+    if end <= start + 1:
+        return 0
+    keys = db.execute(
+        select(ChangeModel.entity, ChangeModel.entity_id)
+        .where(ChangeModel.seq > start, ChangeModel.seq < end)
+        .group_by(ChangeModel.entity, ChangeModel.entity_id)
+    ).tuples().all()
+    removed = 0
+    for i in range(0, len(keys), COMPACT_BATCH_SIZE):
+        by_row: Dict[tuple, List[ChangeModel]] = {}
+        for entry in db.scalars(
+            select(ChangeModel)
+            .where(tuple_(ChangeModel.entity, ChangeModel.entity_id).in_(keys[i:i + COMPACT_BATCH_SIZE]), ChangeModel.seq < end)
+            .order_by(ChangeModel.seq)
+        ):
+            by_row.setdefault((entry.entity, entry.entity_id), []).append(entry)
+        drop = []
+        for entries in by_row.values():
+            if len(entries) < 2:
+                continue
+            op, diff = _merge(entries)
+            last = entries[-1]
+            if last.op != op or (diff is not None and json.loads(last.diff or "null") != diff):
+                db.execute(update(ChangeModel).where(ChangeModel.seq == last.seq).values(op=op, diff=None if diff is None else json.dumps(diff, separators=(",", ":"))))
+            drop += [entry.seq for entry in entries[:-1]]
+        if drop:
+            db.execute(delete(ChangeModel).where(ChangeModel.seq.in_(drop)))
+            removed += len(drop)
+    _set_bookkeeping(db, COMPACTED_BUCKET, end - 1)
+    db.commit()
+    return removed
+
+
+def prune_changes(db: Session, older_than: datetime) -> int:
+    """Deletes the entries older than `older_than` and records the highest seq removed."""
+    end = _first_seq_at_or_after(db, older_than)
+    if end is None:
+        end = (db.scalar(select(func.max(ChangeModel.seq))) or 0) + 1
+    if end - 1 <= _bookkeeping(db, PRUNED_BUCKET):
+        return 0
+    removed = db.execute(delete(ChangeModel).where(ChangeModel.seq < end)).rowcount
+    _set_bookkeeping(db, PRUNED_BUCKET, end - 1)
+    db.commit()
+    return removed
+
+
+def compact_and_prune(db: Session, compact_after_hours: float, retention_days: float) -> Tuple[int, int]:
+    """(entries removed by compaction, entries removed by pruning)."""
+    now = datetime.now(timezone.utc)
+    return (
+        compact_changes(db, now - timedelta(hours=compact_after_hours)),
+        prune_changes(db, now - timedelta(days=retention_days)),
+    )
+
+async def maintain_periodically(interval_seconds: float, compact_after_hours: float, retention_days: float) -> None:
+    from ..database import AsyncSessionLocal
+    while True:
+        await asyncio.sleep(interval_seconds)
+        try:
+            async with AsyncSessionLocal() as db:
+                compacted, pruned = await db.run_sync(compact_and_prune, compact_after_hours=compact_after_hours, retention_days=retention_days)
+            logger.debug("Change log: %d entries compacted, %d pruned", compacted, pruned)
+        except Exception:
+            logger.exception("Change log maintenance failed")
+
+# --- Async versions ---
+# Awaited by the async routers. Each runs the sync implementation above through
+# AsyncSession.run_sync, so DB round trips are awaited instead of blocking the event loop.
+
+async def get_feed_bounds_async(db: AsyncSession) -> Tuple[int, int]:
+    return await db.run_sync(get_feed_bounds)
+
+async def get_changes_async(db: AsyncSession, since: int, limit: int, entity: Optional[str] = None) -> List[ChangeModel]:
+    return await db.run_sync(get_changes, since=since, limit=limit, entity=entity)
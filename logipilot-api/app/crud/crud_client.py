@@ -1,55 +1,220 @@
 from sqlalchemy.orm import Session
-from typing import Optional, List
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import func, insert, select, update
+from sqlalchemy.sql import Select
+from typing import Optional, List, Tuple
 
 from ..models.client import Client as ClientModel, ClientStatusEnum
+from ..models.shipment import Shipment as ShipmentModel
 from ..schemas.client import ClientCreate, ClientUpdate, ClientStatus as PydanticClientStatus
+from ..schemas.shipment import ShipmentPublicWithClientId
+from .. import fieldsets
+from . import pagination, errors, crud_counter, crud_change
+from .count_cache import count_cache, cached_count, register_counter, tracks_writes
+from .client_suggest import client_suggest_index
+from .lane_stats import lane_stats
+from ..response_cache import response_cache
 
-def get_client(db: Session, client_id: int) -> Optional[ClientModel]:
-    return db.query(ClientModel).filter(ClientModel.id == client_id).first()
+# Clients are listed by name; id breaks ties between equal names
+CLIENT_CURSOR_KINDS = (str, int)
+
+def client_cursor_key(client: ClientModel) -> tuple:
+    return (client.name, client.id)
+
+# ?fields= / ?include= for the client read endpoints (see app/fieldsets.py)
+CLIENT_FIELDS = fieldsets.Resource(
+    columns={name: getattr(ClientModel, name) for name in ("id", "name", "email", "phone", "status", "createdAt")},
+    required=(ClientModel.id, ClientModel.name),
+    relations={
+        "shipments": fieldsets.Relation(ClientModel.shipments, ShipmentPublicWithClientId, order_by=(ShipmentModel.createdAt.desc(), ShipmentModel.id.desc())),
+    },
+)
+
+def _client_query(db: Session, fieldset: Optional[fieldsets.Fieldset]):
+    if fieldset is None:
+        return db.query(ClientModel)
+    return db.query(ClientModel).options(*fieldsets.load_options(CLIENT_FIELDS, fieldset))
+
+def _load_includes(db: Session, clients: List[ClientModel], fieldset: Optional[fieldsets.Fieldset]) -> List[ClientModel]:
+    if fieldset is not None:
+        fieldsets.load_includes(db, CLIENT_FIELDS, fieldset, clients)
+    return clients
+
+def get_client(db: Session, client_id: int, fieldset: Optional[fieldsets.Fieldset] = None) -> Optional[ClientModel]:
+    client = _client_query(db, fieldset).filter(ClientModel.id == client_id).first()
+    if client is not None:
+        _load_includes(db, [client], fieldset)
+    return client
 
 def get_client_by_email(db: Session, email: str) -> Optional[ClientModel]:
     return db.query(ClientModel).filter(ClientModel.email == email).first()
 
-def get_clients(db: Session, skip: int = 0, limit: int = 100, status: Optional[PydanticClientStatus] = None) -> List[ClientModel]:
-    query = db.query(ClientModel)
+def get_client_version(db: Session, client_id: int) -> Optional[int]:
+    # Primary-key lookup of the version alone, for If-None-Match checks
+    return db.scalar(select(ClientModel.version).where(ClientModel.id == client_id))
+
+def get_clients_by_ids(db: Session, client_ids: List[int], fieldset: Optional[fieldsets.Fieldset] = None) -> List[Optional[ClientModel]]:
+    """One entry per id, in the given order: the client, or None if it doesn't exist."""
+    clients = _load_includes(db, _client_query(db, fieldset).filter(ClientModel.id.in_(client_ids)).all(), fieldset)
+    found = {client.id: client for client in clients}
+    return [found.get(client_id) for client_id in client_ids]
+
+def filter_clients(query, status: Optional[PydanticClientStatus] = None):
+    # Shared by the list and export queries; works on a Query or a select()
     if status:
         query = query.filter(ClientModel.status == ClientStatusEnum(status.value)) # Convert Pydantic enum to SQLAlchemy enum
-    return query.order_by(ClientModel.name).offset(skip).limit(limit).all()
+    return query
 
-def create_client(db: Session, client: ClientCreate) -> ClientModel:
-    db_client = ClientModel(
-        name=client.name,
-        email=client.email,
-        phone=client.phone,
-        status=ClientStatusEnum(client.status.value) # Convert Pydantic enum to SQLAlchemy enum
-        # createdAt will be handled by server_default
+def get_clients(
+    db: Session,
+    skip: int = 0,
+    limit: int = 100,
+    status: Optional[PydanticClientStatus] = None,
+    after: Optional[tuple] = None,
+    before: Optional[tuple] = None,
+    fieldset: Optional[fieldsets.Fieldset] = None
+) -> List[ClientModel]:
+    query = filter_clients(_client_query(db, fieldset), status=status)
+    # after/before are (name, id) keys from a cursor; they replace OFFSET with an index seek
+    query = pagination.apply_keyset(
+        query, (ClientModel.name, ClientModel.id), descending=False, after=after, before=before
     )
-    db.add(db_client)
-    db.commit()
-    db.refresh(db_client)
-    return db_client
+    if after is None and before is None:
+        query = query.offset(skip) # Legacy offset paging, kept for backward compatibility
+    return _load_includes(db, pagination.reverse_if_before(query.limit(limit).all(), before, after), fieldset)
 
-def update_client(db: Session, db_client: ClientModel, client_in: ClientUpdate) -> ClientModel:
-    client_data = client_in.dict(exclude_unset=True) # Pydantic V1
-    # client_data = client_in.model_dump(exclude_unset=True) # Pydantic V2
+def count_clients(db: Session, status: Optional[PydanticClientStatus] = None) -> int:
+    return db.scalar(filter_clients(select(func.count()).select_from(ClientModel), status=status))
 
-    for field, value in client_data.items():
-        if value is not None:
-            if field == "status":
-                setattr(db_client, field, ClientStatusEnum(value)) # Convert Pydantic string/enum to SQLAlchemy enum
-            else:
-                setattr(db_client, field, value)
+def get_clients_total(db: Session, status: Optional[PydanticClientStatus] = None) -> Tuple[int, bool]:
+    # (total, exact) for the list filters, from the count cache when possible
+    return cached_count(db, "clients", {"status": status})
 
-    db.add(db_client)
-    db.commit()
-    db.refresh(db_client)
+def export_clients_statement(status: Optional[PydanticClientStatus] = None) -> Select:
+    # Same filter and (index-backed) order as get_clients, without paging; streamed by app/export.py
+    statement = filter_clients(select(ClientModel), status=status)
+    return pagination.apply_keyset(statement, (ClientModel.name, ClientModel.id), descending=False)
+
+@tracks_writes("clients")
+def create_client(db: Session, client: ClientCreate) -> ClientModel:
+    # Single INSERT .. RETURNING (createdAt comes back with it).
+    # A taken email is rejected by the unique index and raised as errors.UniqueViolation.
+    with errors.translate_integrity_errors(db):
+        db_client = db.scalars(
+            insert(ClientModel).values(
+                name=client.name,
+                email=client.email,
+                phone=client.phone,
+                status=ClientStatusEnum(client.status.value) # Convert Pydantic enum to SQLAlchemy enum
+            ).returning(ClientModel)
+        ).one()
+        crud_counter.increment(db, "clients", [db_client.status])
+        crud_change.record(db, [crud_change.created("clients", db_client)])
+        db.commit()
+    count_cache.apply_delta("clients", {"status": db_client.status}, 1)
+    client_suggest_index.put(db_client.id, db_client.name, db_client.email)
+    response_cache.invalidate("clients")
     return db_client
 
+@tracks_writes("clients")
+def update_client(db: Session, client_id: int, client_in: ClientUpdate) -> Optional[ClientModel]:
+    # Single UPDATE .. RETURNING; returns None if the client doesn't exist.
+    # An email taken by another client raises errors.UniqueViolation.
+    client_data = client_in.model_dump(exclude_unset=True, exclude_none=True)
+    if "status" in client_data:
+        client_data["status"] = ClientStatusEnum(client_data["status"]) # Convert Pydantic string/enum to SQLAlchemy enum
+    if not client_data:
+        return get_client(db, client_id) # Nothing to change
+
+    with errors.translate_integrity_errors(db):
+        if "status" in client_data:
+            crud_counter.move(db, "clients", client_id, client_data["status"])
+        db_client = db.scalars(
+            update(ClientModel)
+            .where(ClientModel.id == client_id)
+            .values(**client_data, version=ClientModel.version + 1)
+            .returning(ClientModel)
+            .execution_options(populate_existing=True)
+        ).one_or_none()
+        if db_client is not None and "status" not in client_data:
+            crud_counter.touch(db, "clients") # move() already did for status changes
+        if db_client is not None:
+            crud_change.record(db, [crud_change.updated("clients", db_client, client_data)])
+        db.commit()
+    if db_client is not None and "status" in client_data:
+        # The previous status isn't returned, so counts filtered on status become estimates
+        count_cache.mark_estimated("clients", ["status"])
+    if db_client is not None and client_data.keys() & {"name", "email"}:
+        client_suggest_index.put(db_client.id, db_client.name, db_client.email)
+    if db_client is not None:
+        response_cache.invalidate("clients")
+    return db_client
+
+@tracks_writes("clients", "shipments", "alerts")
 def delete_client(db: Session, client_id: int) -> Optional[ClientModel]:
     db_client = db.query(ClientModel).filter(ClientModel.id == client_id).first()
     if db_client:
         # Consider related data (e.g., shipments). Soft delete might be better.
         # For now, hard delete.
+        deltas = crud_counter.tally({}, "clients", [db_client.status], -1)
+        # Its shipments and their alerts are deleted by the cascade (which loads them anyway)
+        entries = []
+        for db_shipment in db_client.shipments:
+            crud_counter.tally(deltas, "shipments", [db_shipment.status], -1)
+            crud_counter.tally(deltas, "alerts", [alert.severity for alert in db_shipment.alerts], -1)
+            entries += [crud_change.deleted("alerts", alert) for alert in db_shipment.alerts]
+            entries.append(crud_change.deleted("shipments", db_shipment))
+        crud_change.record(db, [*entries, crud_change.deleted("clients", db_client)])
         db.delete(db_client)
+        crud_counter.apply_deltas(db, deltas)
         db.commit()
+        count_cache.apply_delta("clients", {"status": db_client.status}, -1)
+        # Its shipments (and their alerts) went with it (cascade)
+        count_cache.invalidate_table("shipments")
+        count_cache.invalidate_table("alerts")
+        if db_client.shipments:
+            lane_stats.invalidate() # Their status history too (ON DELETE CASCADE)
+        client_suggest_index.remove(db_client.id)
+        response_cache.invalidate("clients", "shipments", "alerts")
     return db_client
+
+# --- Async versions ---
+# Awaited by the async routers. Each runs the sync implementation above through
+# AsyncSession.run_sync, so DB round trips are awaited instead of blocking the event loop.
+
+async def get_client_async(db: AsyncSession, client_id: int, fieldset: Optional[fieldsets.Fieldset] = None) -> Optional[ClientModel]:
+    return await db.run_sync(get_client, client_id=client_id, fieldset=fieldset)
+
+async def get_client_by_email_async(db: AsyncSession, email: str) -> Optional[ClientModel]:
+    return await db.run_sync(get_client_by_email, email=email)
+
+async def get_client_version_async(db: AsyncSession, client_id: int) -> Optional[int]:
+    return await db.run_sync(get_client_version, client_id=client_id)
+
+async def get_clients_by_ids_async(db: AsyncSession, client_ids: List[int], fieldset: Optional[fieldsets.Fieldset] = None) -> List[Optional[ClientModel]]:
+    return await db.run_sync(get_clients_by_ids, client_ids=client_ids, fieldset=fieldset)
+
+async def get_clients_async(
+    db: AsyncSession,
+    skip: int = 0,
+    limit: int = 100,
+    status: Optional[PydanticClientStatus] = None,
+    after: Optional[tuple] = None,
+    before: Optional[tuple] = None,
+    fieldset: Optional[fieldsets.Fieldset] = None
+) -> List[ClientModel]:
+    return await db.run_sync(get_clients, skip=skip, limit=limit, status=status, after=after, before=before, fieldset=fieldset)
+
+async def get_clients_total_async(db: AsyncSession, status: Optional[PydanticClientStatus] = None) -> Tuple[int, bool]:
+    return await db.run_sync(get_clients_total, status=status)
+
+async def create_client_async(db: AsyncSession, client: ClientCreate) -> ClientModel:
+    return await db.run_sync(create_client, client=client)
+
+async def update_client_async(db: AsyncSession, client_id: int, client_in: ClientUpdate) -> Optional[ClientModel]:
+    return await db.run_sync(update_client, client_id=client_id, client_in=client_in)
+
+async def delete_client_async(db: AsyncSession, client_id: int) -> Optional[ClientModel]:
+    return await db.run_sync(delete_client, client_id=client_id)
+
+register_counter("clients", count_clients)
@@ -0,0 +1,123 @@
+import enum
+from typing import Dict, Iterable, Sequence, Tuple
+
+from sqlalchemy import String, cast, delete, exists, func, literal, select, true, union_all
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from ..models.counter import Counter as CounterModel
+from ..models.shipment import Shipment as ShipmentModel, ShipmentStatusEnum
+from ..models.alert import Alert as AlertModel, AlertSeverityEnum
+from ..models.client import Client as ClientModel, ClientStatusEnum
+from .upsert import dialect_insert
+
+# Per-bucket row counts behind GET /summary. The crud writes call into this module
+# before they commit, so a count changes in the same transaction as the rows it counts
+# and reading the summary never has to scan or group the source tables.
+#
+# Each entity also has a change generation, stored as the CHANGES_BUCKET row: every
+# create, update and delete advances it, so the list ETags (app/etags.py) can tell
+# whether anything changed with one primary-key read.
+
+# entity -> (model, bucket column, enum)
+COUNTED = {
+    "shipments": (ShipmentModel, ShipmentModel.status, ShipmentStatusEnum),
+    "alerts": (AlertModel, AlertModel.severity, AlertSeverityEnum),
+    "clients": (ClientModel, ClientModel.status, ClientStatusEnum),
+}
+
+CounterDeltas = Dict[Tuple[str, str], int]
+
+# Not an enum member name, so get_counts never reports it
+CHANGES_BUCKET = "_changes"
+
+def _upsert(db: Session, rows=None):
+    # INSERT .. ON CONFLICT DO UPDATE adds to the stored count, so a bucket's row needn't exist yet
+    statement = dialect_insert(db)(CounterModel.__table__)
+    if rows is not None:
+        statement = statement.from_select(["entity", "bucket", "count"], rows)
+    return statement.on_conflict_do_update(
+        index_elements=["entity", "bucket"],
+        set_={"count": CounterModel.count + statement.excluded["count"]},
+    )
+
+def tally(deltas: CounterDeltas, entity: str, buckets: Iterable[enum.Enum], by: int) -> CounterDeltas:
+    """Adds `by` to `deltas` once per bucket value (e.g. the statuses of rows created or deleted)."""
+    for bucket in buckets:
+        key = (entity, bucket.name)
+        deltas[key] = deltas.get(key, 0) + by
+    return deltas
+
+def apply_deltas(db: Session, deltas: CounterDeltas) -> None:
+    # One executemany for any number of buckets; the caller commits.
+    # Rows created or deleted also advance their entity's change generation.
+    deltas = dict(deltas)
+    for entity in {entity for (entity, _), by in deltas.items() if by}:
+        deltas[(entity, CHANGES_BUCKET)] = 1
+    params = [{"entity": entity, "bucket": bucket, "count": by} for (entity, bucket), by in deltas.items() if by]
+    if params:
+        db.execute(_upsert(db), params)
+
+def increment(db: Session, entity: str, buckets: Iterable[enum.Enum], by: int = 1) -> None:
+    apply_deltas(db, tally({}, entity, buckets, by))
+
+def touch(db: Session, entity: str) -> None:
+    # Advances the change generation after an update that moved no counts
+    apply_deltas(db, {(entity, CHANGES_BUCKET): 1})
+
+def move(db: Session, entity: str, row_id: int, new_bucket: enum.Enum) -> None:
+    """
+    Moves one row's count to `new_bucket`. Must run before the UPDATE that changes the
+    row: the old bucket is read from the row itself, in the same statement, so the
+    caller doesn't need to load it. The counts are left alone if the row is missing or
+    unchanged. The change generation advances if the row exists (the UPDATE that
+    follows bumps its version); a missing row writes nothing, so a 404 leaves every
+    ETag valid.
+    """
+    model, column, _ = COUNTED[entity]
+    changed = (model.id == row_id) & (column != new_bucket)
+    rows = union_all(
+        select(literal(entity), cast(column, String), literal(-1)).where(changed),
+        select(literal(entity), literal(new_bucket.name), literal(1)).where(exists().where(changed)),
+        select(literal(entity), literal(CHANGES_BUCKET), literal(1)).where(exists().where(model.id == row_id)),
+    )
+    db.execute(_upsert(db, rows))
+
+def get_counts(db: Session) -> Dict[str, Dict[str, int]]:
+    """entity -> {enum value: count}, with every enum member present. Reads the (small) counters table only."""
+    counts = {entity: {member.value: 0 for member in enum_cls} for entity, (_, _, enum_cls) in COUNTED.items()}
+    for counter in db.query(CounterModel).all():
+        if counter.entity in COUNTED:
+            enum_cls = COUNTED[counter.entity][2]
+            if counter.bucket in enum_cls.__members__:
+                counts[counter.entity][enum_cls[counter.bucket].value] = counter.count
+    return counts
+
+def get_generations(db: Session, entities: Sequence[str]) -> Tuple[int, ...]:
+    """The change generation of each entity, in order (0 if it never changed)."""
+    rows = dict(db.execute(
+        select(CounterModel.entity, CounterModel.count)
+        .where(CounterModel.entity.in_(entities), CounterModel.bucket == CHANGES_BUCKET)
+    ).tuples().all())
+    return tuple(rows.get(entity, 0) for entity in entities)
+
+def reconcile_counters(db: Session) -> Dict[str, Dict[str, int]]:
+    """Rebuilds every counter from the source tables (full GROUP BY scans). Returns the new counts."""
+    # Change generations are kept: resetting one could make an old ETag match again
+    # so is the change log's bookkeeping (entity "changes", see crud_change)
+    db.execute(delete(CounterModel).where(CounterModel.entity.in_(list(COUNTED)), CounterModel.bucket != CHANGES_BUCKET))
+    for entity, (_, column, _) in COUNTED.items():
+        # WHERE true keeps SQLite from parsing ON CONFLICT as a join constraint of the SELECT
+        db.execute(_upsert(db, select(literal(entity), cast(column, String), func.count()).where(true()).group_by(column)))
+    db.commit()
+    return get_counts(db)
+
+# --- Async versions ---
+# Awaited by the async routers. Each runs the sync implementation above through
+# AsyncSession.run_sync, so DB round trips are awaited instead of blocking the event loop.
+
+async def get_counts_async(db: AsyncSession) -> Dict[str, Dict[str, int]]:
+    return await db.run_sync(get_counts)
+
+async def get_generations_async(db: AsyncSession, entities: Sequence[str]) -> Tuple[int, ...]:
+    return await db.run_sync(get_generations, entities=entities)
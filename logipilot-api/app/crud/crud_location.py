@@ -0,0 +1,96 @@
+import threading
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from ..models.location import Location as LocationModel, location_key, normalize_location_name
+from .upsert import dialect_insert
+
+# Interning of shipment origins and destinations into the locations table.
+#
+# The API still takes and returns names; shipments store the ids. intern_locations maps
+# names to ids through an in-process cache of the (small) locations table, so creating
+# or updating a shipment with known locations costs no query at all. A name not in the
+# cache costs one INSERT .. ON CONFLICT DO NOTHING and one SELECT for the whole batch,
+# and works whether another process already added it or not.
+#
+# New locations are committed right away, before the caller's own write: an unused
+# dictionary entry is harmless, and it means the cache only ever holds ids that exist.
+# Locations are never renamed or deleted, so cached entries can't go stale; entries
+# added by other workers are picked up the first time they are needed.
+
+
+class LocationCache:
+    def __init__(self):
+        self._by_key: Dict[str, Tuple[int, str]] = {} # location_key -> (id, name)
+        self._names: Dict[int, str] = {} # id -> name
+        self._lock = threading.Lock()
+
+    def add(self, rows: Iterable[Tuple[int, str, str]]) -> None:
+        """Caches committed (id, name, key) rows."""
+        with self._lock:
+            for location_id, name, key in rows:
+                self._by_key[key] = (location_id, name)
+                self._names[location_id] = name
+
+    def get(self, key: str) -> Optional[Tuple[int, str]]:
+        return self._by_key.get(key)
+
+    def name(self, location_id: int) -> Optional[str]:
+        return self._names.get(location_id)
+
+    def __len__(self) -> int:
+        return len(self._names)
+
+
+location_cache = LocationCache()
+
+
+def _fetch(db: Session, where) -> List[Tuple[int, str, str]]:
+    rows = db.execute(select(LocationModel.id, LocationModel.name, LocationModel.key).where(where)).tuples().all()
+    location_cache.add(rows)
+    return rows
+
+
+def load_location_cache(db: Session) -> None:
+    """Caches every location; run at startup so the first writes find their names cached."""
+    location_cache.add(db.execute(select(LocationModel.id, LocationModel.name, LocationModel.key)).tuples().all())
+
+
+def intern_locations(db: Session, names: Iterable[str]) -> Dict[str, Tuple[int, str]]:
+    """
+    location_key -> (id, stored name) for each of `names`, adding the missing ones to the
+    locations table. Commits if it added any, so call it before the write that uses the ids.
+    """
+    wanted = {location_key(name): normalize_location_name(name) for name in names}
+    found = {key: location_cache.get(key) for key in wanted}
+    missing = {key: name for key, name in wanted.items() if found[key] is None}
+    if missing:
+        db.execute(
+            dialect_insert(db)(LocationModel).on_conflict_do_nothing(index_elements=["key"]),
+            [{"name": name, "key": key} for key, name in missing.items()],
+        )
+        db.commit()
+        for location_id, name, key in _fetch(db, LocationModel.key.in_(missing)):
+            found[key] = (location_id, name)
+    return found
+
+
+def find_location_id(db: Session, name: str) -> Optional[int]:
+    """The id of an existing location (for filters); None if no shipment ever used the name."""
+    key = location_key(name)
+    cached = location_cache.get(key)
+    if cached is None:
+        rows = _fetch(db, LocationModel.key == key)
+        return rows[0][0] if rows else None
+    return cached[0]
+
+
+def get_location_names(db: Session, location_ids: Iterable[int]) -> Dict[int, str]:
+    """id -> name, reading only the ids the cache doesn't have."""
+    location_ids = set(location_ids)
+    missing = [location_id for location_id in location_ids if location_cache.name(location_id) is None]
+    if missing:
+        _fetch(db, LocationModel.id.in_(missing))
+    return {location_id: location_cache.name(location_id) for location_id in location_ids}
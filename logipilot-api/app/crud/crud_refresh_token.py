@@ -0,0 +1,75 @@
+from sqlalchemy.orm import Session, joinedload
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import insert, or_, select, update
+from sqlalchemy.sql import func
+from datetime import datetime
+from typing import Optional
+
+from ..models.refresh_token import RefreshToken as RefreshTokenModel, RefreshTokenHistory as RefreshTokenHistoryModel
+
+def get_refresh_token_by_hash(db: Session, token_hash: str) -> Optional[RefreshTokenModel]:
+    # Matches the session whose live hash this is, or the one that rotated away from it
+    # (reuse detection: the caller compares token_hash), each a unique index seek.
+    # The owning user is loaded in the same statement so no second lookup is needed.
+    rotated_from = select(RefreshTokenHistoryModel.session_id).where(RefreshTokenHistoryModel.token_hash == token_hash).scalar_subquery()
+    return (
+        db.query(RefreshTokenModel)
+        .options(joinedload(RefreshTokenModel.user))
+        .filter(or_(RefreshTokenModel.token_hash == token_hash, RefreshTokenModel.id == rotated_from))
+        .first()
+    )
+
+def create_refresh_token(db: Session, user_id: int, token_hash: str, expires_at: datetime) -> RefreshTokenModel:
+    db_token = RefreshTokenModel(
+        user_id=user_id,
+        token_hash=token_hash,
+        expiresAt=expires_at,
+        revoked=False
+    )
+    db.add(db_token)
+    db.commit()
+    return db_token
+
+def rotate_refresh_token(db: Session, db_token: RefreshTokenModel, old_hash: str, new_hash: str, expires_at: datetime) -> bool:
+    # Compare-and-swap on the presented hash: if a concurrent refresh already rotated this
+    # session, no row matches and the caller must treat the presented token as stale.
+    result = db.execute(
+        update(RefreshTokenModel)
+        .where(
+            RefreshTokenModel.id == db_token.id,
+            RefreshTokenModel.token_hash == old_hash,
+            RefreshTokenModel.revoked == False, # noqa: E712 (SQL expression)
+        )
+        .values(token_hash=new_hash, expiresAt=expires_at, lastUsedAt=func.now())
+        .execution_options(synchronize_session=False)
+    )
+    rotated = result.rowcount == 1
+    if rotated: # Recorded in the rotation's transaction, so no replay of it can go unnoticed
+        db.execute(insert(RefreshTokenHistoryModel).values(session_id=db_token.id, token_hash=old_hash))
+    db.commit()
+    return rotated
+
+def revoke_refresh_token(db: Session, token_id: int) -> None:
+    db.execute(
+        update(RefreshTokenModel)
+        .where(RefreshTokenModel.id == token_id)
+        .values(revoked=True)
+        .execution_options(synchronize_session=False)
+    )
+    db.commit()
+
+# --- Async versions ---
+# Awaited by the async routers. Each runs the sync implementation above through
+# AsyncSession.run_sync, so DB round trips are awaited instead of blocking the event loop.
+
+async def get_refresh_token_by_hash_async(db: AsyncSession, token_hash: str) -> Optional[RefreshTokenModel]:
+    return await db.run_sync(get_refresh_token_by_hash, token_hash=token_hash)
+
+async def create_refresh_token_async(db: AsyncSession, user_id: int, token_hash: str, expires_at: datetime) -> RefreshTokenModel:
+    return await db.run_sync(create_refresh_token, user_id=user_id, token_hash=token_hash, expires_at=expires_at)
+
+async def rotate_refresh_token_async(db: AsyncSession, db_token: RefreshTokenModel, old_hash: str, new_hash: str, expires_at: datetime) -> bool:
+    return await db.run_sync(rotate_refresh_token, db_token=db_token, old_hash=old_hash, new_hash=new_hash, expires_at=expires_at)
+
+async def revoke_refresh_token_async(db: AsyncSession, token_id: int) -> None:
+    return await db.run_sync(revoke_refresh_token, token_id=token_id)
@@ -0,0 +1,88 @@
+import re
+from typing import Any, Dict, List, Tuple
+
+from sqlalchemy import and_, or_, select, text
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session, joinedload
+
+from ..core.config import settings
+from ..models.search import SEARCH_TABLE, SEARCH_KIND_CODES
+from ..models.client import Client as ClientModel
+from ..models.shipment import Shipment as ShipmentModel
+from ..models.alert import Alert as AlertModel
+
+# kind -> (model, searched columns, extra loader options)
+SEARCHED = {
+    "Client": (ClientModel, (ClientModel.name, ClientModel.email, ClientModel.phone), ()),
+    "Shipment": (ShipmentModel, (ShipmentModel.origin, ShipmentModel.destination), (joinedload(ShipmentModel.client),)),
+    "Alert": (AlertModel, (AlertModel.message,), ()),
+}
+
+MAX_QUERY_TERMS = 8
+_TERM = re.compile(r"\w+", re.UNICODE)
+
+def search_terms(q: str) -> List[str]:
+    return _TERM.findall(q)[:MAX_QUERY_TERMS]
+
+def fts_query(terms: List[str]) -> str:
+    # Terms are quoted (FTS5 syntax in user input is matched literally) and ANDed.
+    # Only the last one is a prefix, as it is the word still being typed; a prefix on every
+    # term would expand short words like "client" into thousands of index terms.
+    quoted = [f'"{term}"' for term in terms]
+    quoted[-1] += "*"
+    return " ".join(quoted)
+
+def _search_fts(db: Session, terms: List[str], limit: int) -> List[Tuple[str, int]]:
+    # `rank` is bm25(); the rowid encodes (id, kind), see app/models/search.py.
+    # BM25 is computed for the newest SEARCH_RANK_CANDIDATES matches only (rowid DESC walks the
+    # index backwards), so a broad term costs the same as a selective one. Selective queries have
+    # fewer matches than that and are ranked in full.
+    rowids = db.execute(
+        text(
+            f"SELECT rowid FROM ("
+            f"SELECT rowid, rank FROM {SEARCH_TABLE} WHERE {SEARCH_TABLE} MATCH :query ORDER BY rowid DESC LIMIT :candidates"
+            f") ORDER BY rank LIMIT :limit"
+        ),
+        {"query": fts_query(terms), "candidates": settings.SEARCH_RANK_CANDIDATES, "limit": limit},
+    ).scalars().all()
+    return [(SEARCH_KIND_CODES[rowid % 4], rowid // 4) for rowid in rowids]
+
+def _search_like(db: Session, terms: List[str], limit: int) -> List[Tuple[str, int]]:
+    # Backends without the FTS index: unranked substring match, newest rows first within each kind
+    hits: List[Tuple[str, int]] = []
+    for kind, (model, columns, _) in SEARCHED.items():
+        if len(hits) >= limit:
+            break
+        condition = and_(*(or_(*(column.ilike(f"%{term}%") for column in columns)) for term in terms))
+        ids = db.scalars(select(model.id).where(condition).order_by(model.id.desc()).limit(limit - len(hits))).all()
+        hits += [(kind, id_) for id_ in ids]
+    return hits
+
+def search(db: Session, q: str, limit: int = 20) -> List[Tuple[str, Any]]:
+    """
+    Best matches for `q` across clients, shipments and alerts as (kind, row) pairs,
+    best first. Every word must match; the last may be a prefix (so "par" finds "Paris").
+    """
+    terms = search_terms(q)
+    if not terms:
+        return []
+    if db.get_bind().dialect.name == "sqlite":
+        hits = _search_fts(db, terms, limit)
+    else:
+        hits = _search_like(db, terms, limit)
+
+    # One IN query per kind for the matched rows, then back into ranked order
+    loaded: Dict[Tuple[str, int], Any] = {}
+    for kind, (model, _, options) in SEARCHED.items():
+        ids = [id_ for hit_kind, id_ in hits if hit_kind == kind]
+        if ids:
+            for row in db.query(model).options(*options).filter(model.id.in_(ids)).all():
+                loaded[(kind, row.id)] = row
+    return [(kind, loaded[(kind, id_)]) for kind, id_ in hits if (kind, id_) in loaded]
+
+# --- Async versions ---
+# Awaited by the async routers. Each runs the sync implementation above through
+# AsyncSession.run_sync, so DB round trips are awaited instead of blocking the event loop.
+
+async def search_async(db: AsyncSession, q: str, limit: int = 20) -> List[Tuple[str, Any]]:
+    return await db.run_sync(search, q=q, limit=limit)
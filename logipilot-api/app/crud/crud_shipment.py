@@ -1,76 +1,321 @@
-from sqlalchemy.orm import Session, joinedload
-from typing import Optional, List
+from sqlalchemy.orm import Session, joinedload, selectinload
+from sqlalchemy.orm.attributes import set_committed_value
+from sqlalchemy import func, insert, literal, select, update
+from sqlalchemy.sql import Select
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import Optional, List, Tuple
+from datetime import datetime
 
 from ..models.shipment import Shipment as ShipmentModel, ShipmentStatusEnum
 from ..models.client import Client as ClientModel # To validate client_id
+from ..models.alert import Alert as AlertModel
+from ..models.shipment_status_history import ShipmentStatusHistory as StatusHistoryModel
 from ..schemas.shipment import ShipmentCreate, ShipmentUpdate, ShipmentStatus as PydanticShipmentStatus
+from ..schemas.client import ClientPublic
+from ..schemas.alert import AlertPublic
+from .. import fieldsets
+from . import pagination, bulk, errors, crud_counter, crud_change, crud_location
+from .count_cache import count_cache, cached_count, register_counter, tracks_writes
+from ..response_cache import response_cache
+from .lane_stats import lane_stats
 
-def get_shipment(db: Session, shipment_id: int) -> Optional[ShipmentModel]:
-    # Use joinedload to eager load the client information
-    return db.query(ShipmentModel).options(joinedload(ShipmentModel.client)).filter(ShipmentModel.id == shipment_id).first()
+# Shipments are listed newest first; id breaks ties so the order (and cursors) are deterministic
+SHIPMENT_CURSOR_KINDS = (datetime, int)
+
+def shipment_cursor_key(shipment: ShipmentModel) -> tuple:
+    return (shipment.createdAt, shipment.id)
+
+# ?fields= / ?include= for the shipment read endpoints (see app/fieldsets.py)
+SHIPMENT_FIELDS = fieldsets.Resource(
+    columns={name: getattr(ShipmentModel, name) for name in ("id", "client_id", "status", "origin", "destination", "createdAt")},
+    required=(ShipmentModel.id, ShipmentModel.createdAt),
+    relations={
+        "client": fieldsets.Relation(ShipmentModel.client, ClientPublic),
+        "alerts": fieldsets.Relation(ShipmentModel.alerts, AlertPublic, order_by=(AlertModel.createdAt.desc(), AlertModel.id.desc())),
+    },
+    default_include=("client",),
+)
+
+def _shipment_query(db: Session, fieldset: Optional[fieldsets.Fieldset], client_loader=joinedload):
+    if fieldset is None:
+        return db.query(ShipmentModel).options(client_loader(ShipmentModel.client)) # Eager load client
+    return db.query(ShipmentModel).options(*fieldsets.load_options(SHIPMENT_FIELDS, fieldset))
+
+def _load_includes(db: Session, shipments: List[ShipmentModel], fieldset: Optional[fieldsets.Fieldset]) -> List[ShipmentModel]:
+    if fieldset is not None:
+        fieldsets.load_includes(db, SHIPMENT_FIELDS, fieldset, shipments)
+    return shipments
+
+def get_shipment(db: Session, shipment_id: int, fieldset: Optional[fieldsets.Fieldset] = None) -> Optional[ShipmentModel]:
+    shipment = _shipment_query(db, fieldset).filter(ShipmentModel.id == shipment_id).first()
+    if shipment is not None:
+        _load_includes(db, [shipment], fieldset)
+    return shipment
+
+def get_shipment_version(db: Session, shipment_id: int) -> Optional[int]:
+    # Primary-key lookup of the version alone, for If-None-Match checks
+    return db.scalar(select(ShipmentModel.version).where(ShipmentModel.id == shipment_id))
+
+def get_shipments_by_ids(db: Session, shipment_ids: List[int], fieldset: Optional[fieldsets.Fieldset] = None) -> List[Optional[ShipmentModel]]:
+    """One entry per id, in the given order: the shipment, or None if it doesn't exist."""
+    # One IN query for the shipments; selectinload then loads each distinct client once
+    # (a second IN query) instead of repeating the client columns on every joined row
+    query = _shipment_query(db, fieldset, client_loader=selectinload)
+    shipments = _load_includes(db, query.filter(ShipmentModel.id.in_(shipment_ids)).all(), fieldset)
+    found = {shipment.id: shipment for shipment in shipments}
+    return [found.get(shipment_id) for shipment_id in shipment_ids]
+
+def filter_shipments(query, client_id: Optional[int] = None, status: Optional[PydanticShipmentStatus] = None):
+    # Shared by the list and export queries; works on a Query or a select()
+    if client_id is not None:
+        query = query.filter(ShipmentModel.client_id == client_id)
+    if status:
+        query = query.filter(ShipmentModel.status == ShipmentStatusEnum(status.value))
+    return query
 
 def get_shipments(
     db: Session,
     skip: int = 0,
     limit: int = 100,
     client_id: Optional[int] = None,
-    status: Optional[PydanticShipmentStatus] = None
+    status: Optional[PydanticShipmentStatus] = None,
+    after: Optional[tuple] = None,
+    before: Optional[tuple] = None,
+    fieldset: Optional[fieldsets.Fieldset] = None
 ) -> List[ShipmentModel]:
-    query = db.query(ShipmentModel).options(joinedload(ShipmentModel.client)) # Eager load client
+    query = filter_shipments(_shipment_query(db, fieldset), client_id=client_id, status=status)
 
-    if client_id is not None:
-        query = query.filter(ShipmentModel.client_id == client_id)
-    if status:
-        query = query.filter(ShipmentModel.status == ShipmentStatusEnum(status.value))
+    # after/before are (createdAt, id) keys from a cursor; they replace OFFSET with an index seek
+    query = pagination.apply_keyset(
+        query, (ShipmentModel.createdAt, ShipmentModel.id), descending=True, after=after, before=before
+    )
+    if after is None and before is None:
+        query = query.offset(skip) # Legacy offset paging, kept for backward compatibility
+    return _load_includes(db, pagination.reverse_if_before(query.limit(limit).all(), before, after), fieldset)
 
-    return query.order_by(ShipmentModel.createdAt.desc()).offset(skip).limit(limit).all()
+def count_shipments(db: Session, client_id: Optional[int] = None, status: Optional[PydanticShipmentStatus] = None) -> int:
+    return db.scalar(filter_shipments(select(func.count()).select_from(ShipmentModel), client_id=client_id, status=status))
 
-def create_shipment(db: Session, shipment: ShipmentCreate) -> Optional[ShipmentModel]:
-    # Validate if client_id exists
-    client = db.query(ClientModel).filter(ClientModel.id == shipment.client_id).first()
-    if not client:
-        return None # Or raise an exception: raise ValueError(f"Client with id {shipment.client_id} not found")
+def get_shipments_total(db: Session, client_id: Optional[int] = None, status: Optional[PydanticShipmentStatus] = None) -> Tuple[int, bool]:
+    # (total, exact) for the list filters, from the count cache when possible
+    return cached_count(db, "shipments", {"client_id": client_id, "status": status})
 
-    db_shipment = ShipmentModel(
-        client_id=shipment.client_id,
-        status=ShipmentStatusEnum(shipment.status.value),
-        origin=shipment.origin,
-        destination=shipment.destination
-        # createdAt will be handled by server_default
-    )
-    db.add(db_shipment)
-    db.commit()
-    db.refresh(db_shipment)
-    # Eager load client for the returned object
-    db.query(ShipmentModel).options(joinedload(ShipmentModel.client)).filter(ShipmentModel.id == db_shipment.id).first()
+def _count_filters(db_shipment: ShipmentModel) -> dict:
+    # The filterable columns of a row, as count_cache keys them
+    return {"client_id": db_shipment.client_id, "status": db_shipment.status}
+
+def _attach_client(db: Session, db_shipment: ShipmentModel) -> None:
+    # ShipmentPublic nests the client; load it by primary key (served from the identity map if present)
+    set_committed_value(db_shipment, "client", db.get(ClientModel, db_shipment.client_id))
+
+def _location_ids(db: Session, values: dict) -> dict:
+    # The origin/destination names in `values` (create or update data) as origin_id/destination_id
+    names = [values[field] for field in ("origin", "destination") if field in values]
+    if not names:
+        return {}
+    interned = crud_location.intern_locations(db, names)
+    return {
+        f"{field}_id": interned[crud_location.location_key(values[field])][0]
+        for field in ("origin", "destination") if field in values
+    }
+
+def _attach_locations(db: Session, db_shipments: List[ShipmentModel]) -> None:
+    # RETURNING doesn't include the name lookups (see the model); set them from the location cache
+    names = crud_location.get_location_names(db, {id_ for s in db_shipments for id_ in (s.origin_id, s.destination_id)})
+    for db_shipment in db_shipments:
+        set_committed_value(db_shipment, "origin", names[db_shipment.origin_id])
+        set_committed_value(db_shipment, "destination", names[db_shipment.destination_id])
+
+def export_shipments_statement(client_id: Optional[int] = None, status: Optional[PydanticShipmentStatus] = None) -> Select:
+    # Same filters and (index-backed) order as get_shipments, without paging; streamed by app/export.py
+    statement = filter_shipments(select(ShipmentModel).options(joinedload(ShipmentModel.client)), client_id=client_id, status=status)
+    return pagination.apply_keyset(statement, (ShipmentModel.createdAt, ShipmentModel.id), descending=True)
+
+@tracks_writes("shipments")
+def create_shipment(db: Session, shipment: ShipmentCreate) -> ShipmentModel:
+    # INSERT .. RETURNING plus the client lookup for the response.
+    # A missing client is rejected by the FK constraint and raised as errors.ForeignKeyViolation.
+    # Known locations come from the cache; new ones are interned (and committed) first
+    locations = _location_ids(db, {"origin": shipment.origin, "destination": shipment.destination})
+    with errors.translate_integrity_errors(db):
+        db_shipment = db.scalars(
+            insert(ShipmentModel).values(
+                client_id=shipment.client_id,
+                status=ShipmentStatusEnum(shipment.status.value),
+                **locations
+            ).returning(ShipmentModel)
+        ).one()
+        _attach_client(db, db_shipment)
+        _attach_locations(db, [db_shipment])
+        crud_counter.increment(db, "shipments", [db_shipment.status])
+        crud_change.record(db, [crud_change.created("shipments", db_shipment)])
+        db.commit()
+    count_cache.apply_delta("shipments", _count_filters(db_shipment), 1)
+    response_cache.invalidate("shipments")
     return db_shipment
 
-def update_shipment(db: Session, db_shipment: ShipmentModel, shipment_in: ShipmentUpdate) -> Optional[ShipmentModel]:
-    shipment_data = shipment_in.dict(exclude_unset=True)
-
-    if "client_id" in shipment_data and shipment_data["client_id"] is not None:
-        # Validate if new client_id exists
-        client = db.query(ClientModel).filter(ClientModel.id == shipment_data["client_id"]).first()
-        if not client:
-            return None # Or raise ValueError
-
-    for field, value in shipment_data.items():
-        if value is not None:
-            if field == "status":
-                setattr(db_shipment, field, ShipmentStatusEnum(value))
-            else:
-                setattr(db_shipment, field, value)
-
-    db.add(db_shipment)
-    db.commit()
-    db.refresh(db_shipment)
-    # Eager load client for the returned object
-    db.query(ShipmentModel).options(joinedload(ShipmentModel.client)).filter(ShipmentModel.id == db_shipment.id).first()
+@tracks_writes("shipments")
+def create_shipments_bulk(db: Session, shipments: List[ShipmentCreate]) -> List[Optional[ShipmentModel]]:
+    """
+    Inserts many shipments in one transaction. Returns one entry per input, in order:
+    the created shipment, or None if its client does not exist (that item is skipped).
+    A client deleted between that check and the INSERT raises errors.ForeignKeyViolation
+    and nothing is created.
+    """
+    # One IN query validates every referenced client (and loads them for the response)
+    client_ids = {shipment.client_id for shipment in shipments}
+    clients = {c.id: c for c in db.query(ClientModel).filter(ClientModel.id.in_(client_ids)).all()} if client_ids else {}
+
+    accepted = [shipment for shipment in shipments if shipment.client_id in clients]
+    # Every distinct origin/destination of the batch is interned at once
+    interned = crud_location.intern_locations(db, [name for shipment in accepted for name in (shipment.origin, shipment.destination)])
+    rows = [
+        {
+            "client_id": shipment.client_id,
+            "status": ShipmentStatusEnum(shipment.status.value),
+            "origin_id": interned[crud_location.location_key(shipment.origin)][0],
+            "destination_id": interned[crud_location.location_key(shipment.destination)][0],
+        }
+        for shipment in accepted
+    ]
+    created = iter([])
+    with errors.translate_integrity_errors(db):
+        if rows:
+            # ORM bulk INSERT .. RETURNING: batched into multi-row statements, ids and createdAt come back with it
+            returned = db.scalars(insert(ShipmentModel).returning(ShipmentModel), rows).all()
+            _attach_locations(db, returned)
+            created = iter(bulk.match_returned_rows(
+                rows, returned,
+                input_key=lambda r: (r["client_id"], r["status"], r["origin_id"], r["destination_id"]),
+                row_key=lambda s: (s.client_id, s.status, s.origin_id, s.destination_id),
+            ))
+            crud_counter.increment(db, "shipments", [row["status"] for row in rows])
+            crud_change.record(db, [crud_change.created("shipments", db_shipment) for db_shipment in returned])
+        db.commit()
+
+    results: List[Optional[ShipmentModel]] = []
+    for shipment in shipments:
+        if shipment.client_id not in clients:
+            results.append(None)
+            continue
+        db_shipment = next(created)
+        # Attach the already-loaded client without another SELECT
+        set_committed_value(db_shipment, "client", clients[shipment.client_id])
+        count_cache.apply_delta("shipments", _count_filters(db_shipment), 1)
+        results.append(db_shipment)
+    if rows:
+        response_cache.invalidate("shipments")
+    return results
+
+def _record_status_change(db: Session, shipment_id: int, new_status: ShipmentStatusEnum) -> None:
+    # INSERT .. SELECT reading the old status from the row itself: nothing is written if the
+    # shipment is missing or already has that status. Like crud_counter.move, must run before the UPDATE.
+    changed = select(ShipmentModel.id, ShipmentModel.status, literal(new_status, StatusHistoryModel.to_status.type)).where(
+        ShipmentModel.id == shipment_id, ShipmentModel.status != new_status
+    )
+    db.execute(insert(StatusHistoryModel).from_select(["shipment_id", "from_status", "to_status"], changed))
+
+@tracks_writes("shipments")
+def update_shipment(db: Session, shipment_id: int, shipment_in: ShipmentUpdate) -> Optional[ShipmentModel]:
+    # UPDATE .. RETURNING plus the client lookup; returns None if the shipment doesn't exist.
+    # A new client_id that doesn't exist raises errors.ForeignKeyViolation.
+    shipment_data = shipment_in.model_dump(exclude_unset=True, exclude_none=True)
+    if "status" in shipment_data:
+        shipment_data["status"] = ShipmentStatusEnum(shipment_data["status"])
+    if not shipment_data:
+        return get_shipment(db, shipment_id) # Nothing to change
+
+    # origin/destination names become origin_id/destination_id (interned first, like on create)
+    values = {key: value for key, value in shipment_data.items() if key not in ("origin", "destination")}
+    values.update(_location_ids(db, shipment_data))
+    with errors.translate_integrity_errors(db):
+        if "status" in shipment_data:
+            _record_status_change(db, shipment_id, shipment_data["status"])
+            crud_counter.move(db, "shipments", shipment_id, shipment_data["status"])
+        db_shipment = db.scalars(
+            update(ShipmentModel)
+            .where(ShipmentModel.id == shipment_id)
+            .values(**values, version=ShipmentModel.version + 1)
+            .returning(ShipmentModel)
+            .execution_options(populate_existing=True)
+        ).one_or_none()
+        if db_shipment is not None:
+            _attach_client(db, db_shipment)
+            _attach_locations(db, [db_shipment])
+            if "status" not in shipment_data:
+                crud_counter.touch(db, "shipments") # move() already did for status changes
+            # The change entry carries the stored names as well as the ids
+            changed = {**values, **{field: getattr(db_shipment, field) for field in ("origin", "destination") if field in shipment_data}}
+            crud_change.record(db, [crud_change.updated("shipments", db_shipment, changed)])
+        db.commit()
+    if db_shipment is not None and shipment_data.keys() & {"client_id", "status"}:
+        # The previous values aren't returned, so counts filtered on them become estimates
+        count_cache.mark_estimated("shipments", shipment_data.keys())
+    if db_shipment is not None:
+        if shipment_data.keys() & {"origin", "destination"}:
+            lane_stats.invalidate() # Deliveries already counted may have moved to another lane
+        response_cache.invalidate("shipments")
     return db_shipment
 
+@tracks_writes("shipments", "alerts")
 def delete_shipment(db: Session, shipment_id: int) -> Optional[ShipmentModel]:
-    db_shipment = db.query(ShipmentModel).filter(ShipmentModel.id == shipment_id).first()
+    # Load the client up front: the deleted row is still serialized as ShipmentPublic afterwards
+    db_shipment = db.query(ShipmentModel).options(joinedload(ShipmentModel.client)).filter(ShipmentModel.id == shipment_id).first()
     if db_shipment:
+        deltas = crud_counter.tally({}, "shipments", [db_shipment.status], -1)
+        # Its alerts are deleted by the cascade (which loads them anyway)
+        crud_counter.tally(deltas, "alerts", [alert.severity for alert in db_shipment.alerts], -1)
+        crud_change.record(db, [
+            *(crud_change.deleted("alerts", alert) for alert in db_shipment.alerts),
+            crud_change.deleted("shipments", db_shipment),
+        ])
         db.delete(db_shipment)
+        crud_counter.apply_deltas(db, deltas)
         db.commit()
+        count_cache.apply_delta("shipments", _count_filters(db_shipment), -1)
+        count_cache.invalidate_table("alerts") # Its alerts went with it (cascade)
+        lane_stats.invalidate() # And its status history (ON DELETE CASCADE)
+        response_cache.invalidate("shipments", "alerts")
     return db_shipment
+
+# --- Async versions ---
+# Awaited by the async routers. Each runs the sync implementation above through
+# AsyncSession.run_sync, so DB round trips are awaited instead of blocking the event loop.
+
+async def get_shipment_async(db: AsyncSession, shipment_id: int, fieldset: Optional[fieldsets.Fieldset] = None) -> Optional[ShipmentModel]:
+    return await db.run_sync(get_shipment, shipment_id=shipment_id, fieldset=fieldset)
+
+async def get_shipment_version_async(db: AsyncSession, shipment_id: int) -> Optional[int]:
+    return await db.run_sync(get_shipment_version, shipment_id=shipment_id)
+
+async def get_shipments_by_ids_async(db: AsyncSession, shipment_ids: List[int], fieldset: Optional[fieldsets.Fieldset] = None) -> List[Optional[ShipmentModel]]:
+    return await db.run_sync(get_shipments_by_ids, shipment_ids=shipment_ids, fieldset=fieldset)
+
+async def get_shipments_async(
+    db: AsyncSession,
+    skip: int = 0,
+    limit: int = 100,
+    client_id: Optional[int] = None,
+    status: Optional[PydanticShipmentStatus] = None,
+    after: Optional[tuple] = None,
+    before: Optional[tuple] = None,
+    fieldset: Optional[fieldsets.Fieldset] = None
+) -> List[ShipmentModel]:
+    return await db.run_sync(get_shipments, skip=skip, limit=limit, client_id=client_id, status=status, after=after, before=before, fieldset=fieldset)
+
+async def get_shipments_total_async(db: AsyncSession, client_id: Optional[int] = None, status: Optional[PydanticShipmentStatus] = None) -> Tuple[int, bool]:
+    return await db.run_sync(get_shipments_total, client_id=client_id, status=status)
+
+async def create_shipment_async(db: AsyncSession, shipment: ShipmentCreate) -> ShipmentModel:
+    return await db.run_sync(create_shipment, shipment=shipment)
+
+async def create_shipments_bulk_async(db: AsyncSession, shipments: List[ShipmentCreate]) -> List[Optional[ShipmentModel]]:
+    return await db.run_sync(create_shipments_bulk, shipments=shipments)
+
+async def update_shipment_async(db: AsyncSession, shipment_id: int, shipment_in: ShipmentUpdate) -> Optional[ShipmentModel]:
+    return await db.run_sync(update_shipment, shipment_id=shipment_id, shipment_in=shipment_in)
+
+async def delete_shipment_async(db: AsyncSession, shipment_id: int) -> Optional[ShipmentModel]:
+    return await db.run_sync(delete_shipment, shipment_id=shipment_id)
+
+register_counter("shipments", count_shipments)
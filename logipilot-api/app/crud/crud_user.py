@@ -1,9 +1,13 @@
 from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import insert, update
 from typing import Optional, List
 
 from ..models.user import User as UserModel, UserRoleEnum
 from ..schemas.user import UserCreate, UserUpdate, UserRole
 from ..auth.security import get_password_hash
+from ..auth.principal_cache import principal_cache
+from . import errors
 
 def get_user(db: Session, user_id: int) -> Optional[UserModel]:
     return db.query(UserModel).filter(UserModel.id == user_id).first()
@@ -14,42 +18,55 @@ def get_user_by_email(db: Session, email: str) -> Optional[UserModel]:
 def get_users(db: Session, skip: int = 0, limit: int = 100) -> List[UserModel]:
     return db.query(UserModel).offset(skip).limit(limit).all()
 
-def create_user(db: Session, user: UserCreate) -> UserModel:
-    hashed_password = get_password_hash(user.password)
-    # Convert Pydantic UserRole to SQLAlchemy UserRoleEnum before saving
-    db_user = UserModel(
-        email=user.email,
-        hashed_password=hashed_password,
-        role=UserRoleEnum(user.role.value), # Ensure the value is passed to the enum
-        is_active=user.is_active
-    )
-    db.add(db_user)
-    db.commit()
-    db.refresh(db_user)
+def create_user(db: Session, user: UserCreate, hashed_password: Optional[str] = None) -> UserModel:
+    # Async callers hash via security.get_password_hash_async and pass the result in,
+    # so bcrypt doesn't run on the event loop. Sync callers (initial_data) hash here.
+    if hashed_password is None:
+        hashed_password = get_password_hash(user.password)
+    # Single INSERT .. RETURNING. A taken email is rejected by the unique index
+    # and raised as errors.UniqueViolation.
+    with errors.translate_integrity_errors(db):
+        db_user = db.scalars(
+            insert(UserModel).values(
+                email=user.email,
+                hashed_password=hashed_password,
+                role=UserRoleEnum(user.role.value), # Convert Pydantic UserRole to SQLAlchemy UserRoleEnum
+                is_active=user.is_active
+            ).returning(UserModel)
+        ).one()
+        db.commit()
     return db_user
 
-def update_user(db: Session, db_user: UserModel, user_in: UserUpdate) -> UserModel:
-    # Use .dict() for Pydantic v1, ensure exclude_unset is True
-    user_data = user_in.dict(exclude_unset=True)
+def update_user(db: Session, user_id: int, user_in: UserUpdate, hashed_password: Optional[str] = None) -> Optional[UserModel]:
+    # Single UPDATE .. RETURNING; returns None if the user doesn't exist.
+    # An email taken by another user raises errors.UniqueViolation.
+    user_data = user_in.model_dump(exclude_unset=True, exclude_none=True)
 
-    if "password" in user_data and user_data["password"] is not None:
-        hashed_password = get_password_hash(user_data["password"])
-        db_user.hashed_password = hashed_password
+    if "password" in user_data:
+        # hashed_password is pre-computed off the event loop by async callers
+        if hashed_password is None:
+            hashed_password = get_password_hash(user_data["password"])
+        user_data["hashed_password"] = hashed_password
+        del user_data["password"]
 
-    if "role" in user_data and user_data["role"] is not None:
-        # Convert Pydantic UserRole (which is an Enum) to SQLAlchemy UserRoleEnum
-        # The input user_in.role would be a UserRole enum instance due to Pydantic validation.
-        # So user_data["role"] would be the string value of that enum after .dict() call.
-        db_user.role = UserRoleEnum(user_data["role"])
+    if "role" in user_data:
+        # user_in.role is a Pydantic UserRole; convert to the SQLAlchemy UserRoleEnum
+        user_data["role"] = UserRoleEnum(user_data["role"])
 
-    # Update other fields
-    for field, value in user_data.items():
-        if field not in ["password", "role"] and value is not None:
-             setattr(db_user, field, value)
+    if not user_data:
+        return get_user(db, user_id) # Nothing to change
 
-    db.add(db_user)
-    db.commit()
-    db.refresh(db_user)
+    with errors.translate_integrity_errors(db):
+        db_user = db.scalars(
+            update(UserModel)
+            .where(UserModel.id == user_id)
+            .values(**user_data)
+            .returning(UserModel)
+            .execution_options(populate_existing=True)
+        ).one_or_none()
+        db.commit()
+    # Cached principals may hold the old role/is_active/email
+    principal_cache.invalidate_user(user_id)
     return db_user
 
 def delete_user(db: Session, user_id: int) -> Optional[UserModel]:
@@ -57,6 +74,7 @@ def delete_user(db: Session, user_id: int) -> Optional[UserModel]:
     if db_user:
         db.delete(db_user)
         db.commit()
+        principal_cache.invalidate_user(user_id)
     return db_user
 
 def is_user_active(user: UserModel) -> bool:
@@ -64,3 +82,25 @@ def is_user_active(user: UserModel) -> bool:
 
 def is_admin(user: UserModel) -> bool:
     return user.role == UserRoleEnum.ADMIN
+
+# --- Async versions ---
+# Awaited by the async routers. Each runs the sync implementation above through
+# AsyncSession.run_sync, so DB round trips are awaited instead of blocking the event loop.
+
+async def get_user_async(db: AsyncSession, user_id: int) -> Optional[UserModel]:
+    return await db.run_sync(get_user, user_id=user_id)
+
+async def get_user_by_email_async(db: AsyncSession, email: str) -> Optional[UserModel]:
+    return await db.run_sync(get_user_by_email, email=email)
+
+async def get_users_async(db: AsyncSession, skip: int = 0, limit: int = 100) -> List[UserModel]:
+    return await db.run_sync(get_users, skip=skip, limit=limit)
+
+async def create_user_async(db: AsyncSession, user: UserCreate, hashed_password: Optional[str] = None) -> UserModel:
+    return await db.run_sync(create_user, user=user, hashed_password=hashed_password)
+
+async def update_user_async(db: AsyncSession, user_id: int, user_in: UserUpdate, hashed_password: Optional[str] = None) -> Optional[UserModel]:
+    return await db.run_sync(update_user, user_id=user_id, user_in=user_in, hashed_password=hashed_password)
+
+async def delete_user_async(db: AsyncSession, user_id: int) -> Optional[UserModel]:
+    return await db.run_sync(delete_user, user_id=user_id)
@@ -0,0 +1,44 @@
+from contextlib import contextmanager
+
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+# Writes in crud_* rely on the database's FK and unique constraints instead of
+# pre-SELECTing to validate. A rejected write surfaces as one of these exceptions,
+# which the routers map to their 404/400 responses.
+
+class ConstraintViolation(Exception):
+    """A write was rejected by a database constraint."""
+
+class ForeignKeyViolation(ConstraintViolation):
+    """A referenced row (e.g. the shipment's client) does not exist."""
+
+class UniqueViolation(ConstraintViolation):
+    """A unique value (e.g. an email) is already taken."""
+
+# SQLSTATE codes reported by PostgreSQL drivers (pgcode/sqlstate)
+_FOREIGN_KEY_SQLSTATE = "23503"
+_UNIQUE_SQLSTATE = "23505"
+
+def classify_integrity_error(error: IntegrityError) -> Exception:
+    orig = error.orig
+    sqlstate = getattr(orig, "sqlstate", None) or getattr(orig, "pgcode", None)
+    message = str(orig)
+    upper = message.upper()
+    if sqlstate == _FOREIGN_KEY_SQLSTATE or "FOREIGN KEY" in upper:
+        return ForeignKeyViolation(message)
+    if sqlstate == _UNIQUE_SQLSTATE or "UNIQUE" in upper or "DUPLICATE" in upper:
+        return UniqueViolation(message)
+    return error
+
+@contextmanager
+def translate_integrity_errors(db: Session):
+    """Rolls back and re-raises IntegrityError as ForeignKeyViolation/UniqueViolation where possible."""
+    try:
+        yield
+    except IntegrityError as e:
+        db.rollback()
+        translated = classify_integrity_error(e)
+        if translated is e:
+            raise
+        raise translated from e
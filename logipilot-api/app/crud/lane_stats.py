@@ -0,0 +1,189 @@
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Any, Dict, List, NamedTuple, Optional, Sequence
+
+import numpy as np
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session, aliased
+
+from ..core.config import settings
+from ..models.shipment import Shipment as ShipmentModel, ShipmentStatusEnum
+from ..models.shipment_status_history import ShipmentStatusHistory as StatusHistoryModel
+from . import crud_location
+
+# Transit-time statistics per lane (origin -> destination), behind GET /analytics/lanes.
+#
+# A delivery is a status change to Delivered in shipment_status_history. Its transit time
+# runs from the shipment's first change to In Transit before it (or from createdAt, if
+# the shipment never went through In Transit) to the delivery. A shipment delivered more
+# than once (a correction) counts once, with its latest delivery.
+#
+# The cache keeps one entry per delivered shipment in NumPy arrays (shipment id, lane,
+# hours) plus the highest history id it has read. A lane is the integer
+# origin_id << 32 | destination_id, so grouping and filtering never compare names; the
+# names are looked up (in the location cache) only for the lanes returned. Each refresh
+# reads only the deliveries after that id (an index range scan that is empty most of the
+# time), appends them, and recomputes every lane's figures in one vectorized pass: a sort
+# by (lane, hours), then counts, sums and percentile positions per group boundary. The
+# work grows with the number of deliveries, not the number of history rows or requests.
+#
+# Deleting a shipment (or client), or moving a shipment to another lane, can't be
+# applied incrementally; those crud writes call invalidate() and the next refresh
+# rebuilds from scratch. The cache is per process, so such writes served by another
+# worker are picked up by the periodic rebuild (LANE_STATS_REBUILD_SECONDS). New
+# deliveries are seen by every worker on its next refresh, as they are read from the table.
+
+PERCENTILES = (50, 90, 95)
+LANE_SHIFT = 32
+
+
+class LaneStat(NamedTuple):
+    origin_id: int
+    destination_id: int
+    deliveries: int
+    mean_hours: float
+    min_hours: float
+    p50_hours: float
+    p90_hours: float
+    p95_hours: float
+    max_hours: float
+
+
+def deliveries_after(db: Session, after_id: int) -> List[tuple]:
+    """(history id, shipment id, origin id, destination id, departed at, delivered at) of the deliveries after `after_id`."""
+    departure = aliased(StatusHistoryModel)
+    history = StatusHistoryModel
+    first_in_transit = (
+        select(func.min(departure.changedAt))
+        .where(departure.shipment_id == history.shipment_id, departure.to_status == ShipmentStatusEnum.IN_TRANSIT, departure.id < history.id)
+        .scalar_subquery()
+    )
+    return db.execute(
+        select(history.id, history.shipment_id, ShipmentModel.origin_id, ShipmentModel.destination_id,
+               func.coalesce(first_in_transit, ShipmentModel.createdAt), history.changedAt)
+        .join(ShipmentModel, ShipmentModel.id == history.shipment_id)
+        .where(history.to_status == ShipmentStatusEnum.DELIVERED, history.id > after_id)
+        .order_by(history.id)
+    ).tuples().all()
+
+
+def _epoch_seconds(values: Sequence[datetime]) -> np.ndarray:
+    # SQLite returns naive UTC datetimes, other backends aware ones
+    naive = [value if value.tzinfo is None else value.astimezone(timezone.utc).replace(tzinfo=None) for value in values]
+    return np.array(naive, dtype="datetime64[s]").astype(np.int64)
+
+
+def lane_statistics(lanes: np.ndarray, hours: np.ndarray) -> Dict[str, np.ndarray]:
+    """
+    Per-lane figures for deliveries given as parallel arrays of lane codes and hours.
+    Returns arrays indexed alike: "lane", "deliveries", "mean", "min", "max" and "p<N>"
+    for each of PERCENTILES (linear interpolation, as numpy.percentile).
+    """
+    order = np.lexsort((hours, lanes))
+    lanes, hours = lanes[order], hours[order]
+    if not len(lanes):
+        empty = np.empty(0)
+        return {"lane": empty.astype(np.int64), "deliveries": empty.astype(np.int64), "mean": empty, "min": empty, "max": empty,
+                **{f"p{q}": empty for q in PERCENTILES}}
+    starts = np.flatnonzero(np.r_[True, lanes[1:] != lanes[:-1]])
+    counts = np.diff(np.r_[starts, len(lanes)])
+    ends = starts + counts - 1
+    figures = {
+        "lane": lanes[starts],
+        "deliveries": counts,
+        "mean": np.add.reduceat(hours, starts) / counts,
+        "min": hours[starts],
+        "max": hours[ends],
+    }
+    for q in PERCENTILES:
+        position = starts + (counts - 1) * (q / 100)
+        below = np.floor(position).astype(np.int64)
+        above = np.minimum(below + 1, ends)
+        figures[f"p{q}"] = hours[below] + (hours[above] - hours[below]) * (position - below)
+    return figures
+
+
+class LaneStatsCache:
+    def __init__(self, rebuild_seconds: float):
+        self.rebuild_seconds = rebuild_seconds
+        self._lock = threading.Lock()
+        self._reset()
+        self._stale = True
+
+    def _reset(self) -> None:
+        self._watermark = 0 # Highest history id read
+        self._shipment_ids = np.empty(0, dtype=np.int64)
+        self._lanes = np.empty(0, dtype=np.int64) # origin_id << LANE_SHIFT | destination_id
+        self._hours = np.empty(0, dtype=np.float64)
+        self._stats: Optional[List[LaneStat]] = None
+        self._built_at = time.monotonic()
+        self._generation = getattr(self, "_generation", 0) + 1
+
+    def invalidate(self) -> None:
+        """The next refresh rebuilds from the whole history."""
+        self._stale = True
+
+    def refresh(self, db: Session) -> List[LaneStat]:
+        """The statistics, after reading the deliveries recorded since the last refresh."""
+        with self._lock:
+            if self._stale or time.monotonic() - self._built_at >= self.rebuild_seconds:
+                self._stale = False
+                self._reset()
+            generation, watermark = self._generation, self._watermark
+        # Not under the lock: the query may yield to another request refreshing too
+        rows = deliveries_after(db, watermark)
+        with self._lock:
+            if generation == self._generation:
+                rows = [row for row in rows if row[0] > self._watermark] # Another refresh may have read some
+                if rows:
+                    self._append(rows)
+                if rows or self._stats is None:
+                    self._stats = self._compute()
+            return self._stats or []
+
+    def _append(self, rows: List[tuple]) -> None:
+        history_ids, shipment_ids, origin_ids, destination_ids, departed, delivered = zip(*rows)
+        lanes = np.array(origin_ids, dtype=np.int64) << LANE_SHIFT | np.array(destination_ids, dtype=np.int64)
+        hours = np.maximum(_epoch_seconds(delivered) - _epoch_seconds(departed), 0) / 3600
+        shipment_ids = np.concatenate((self._shipment_ids, np.array(shipment_ids, dtype=np.int64)))
+        lanes = np.concatenate((self._lanes, lanes))
+        hours = np.concatenate((self._hours, hours))
+        # One entry per shipment: the last one appended (its latest delivery)
+        _, last_from_end = np.unique(shipment_ids[::-1], return_index=True)
+        keep = np.sort(len(shipment_ids) - 1 - last_from_end)
+        self._shipment_ids, self._lanes, self._hours = shipment_ids[keep], lanes[keep], hours[keep]
+        self._watermark = history_ids[-1]
+
+    def _compute(self) -> List[LaneStat]:
+        figures = lane_statistics(self._lanes, self._hours)
+        return [
+            LaneStat(
+                lane >> LANE_SHIFT, lane & ((1 << LANE_SHIFT) - 1), int(figures["deliveries"][i]),
+                *(round(float(figures[name][i]), 2) for name in ("mean", "min", "p50", "p90", "p95", "max")),
+            )
+            for i, lane in enumerate(figures["lane"].tolist())
+        ]
+
+
+lane_stats = LaneStatsCache(rebuild_seconds=settings.LANE_STATS_REBUILD_SECONDS)
+
+
+def get_lane_stats(db: Session, origin: Optional[str] = None, destination: Optional[str] = None) -> List[Dict[str, Any]]:
+    """The lanes' figures with their origin and destination names, optionally for one origin and/or destination."""
+    stats = lane_stats.refresh(db)
+    for field, name in (("origin_id", origin), ("destination_id", destination)):
+        if name is not None:
+            location_id = crud_location.find_location_id(db, name)
+            stats = [stat for stat in stats if getattr(stat, field) == location_id]
+    names = crud_location.get_location_names(db, {id_ for stat in stats for id_ in (stat.origin_id, stat.destination_id)})
+    return [{**stat._asdict(), "origin": names[stat.origin_id], "destination": names[stat.destination_id]} for stat in stats]
+
+
+# --- Async versions ---
+# Awaited by the async routers. Each runs the sync implementation above through
+# AsyncSession.run_sync, so DB round trips are awaited instead of blocking the event loop.
+
+async def get_lane_stats_async(db: AsyncSession, origin: Optional[str] = None, destination: Optional[str] = None) -> List[Dict[str, Any]]:
+    return await db.run_sync(get_lane_stats, origin=origin, destination=destination)
@@ -0,0 +1,101 @@
+import base64
+import json
+from datetime import datetime
+from typing import Any, Callable, List, Optional, Sequence, Tuple
+
+from sqlalchemy import tuple_
+
+from ..schemas.response import PageInfo
+
+# Keyset ("cursor") pagination helpers shared by the list queries in crud_*.
+#
+# A cursor is the sort key of a row, e.g. (createdAt, id) for shipments or (name, id) for
+# clients, serialized as base64url JSON. Clients treat it as opaque. Filtering on
+# "sort key after/before the cursor" turns every page into an index seek, unlike
+# OFFSET, which has to walk and discard every skipped row.
+
+def encode_cursor(values: Sequence[Any]) -> str:
+    payload = [v.isoformat() if isinstance(v, datetime) else v for v in values]
+    raw = json.dumps(payload, separators=(",", ":")).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).rstrip(b"=").decode("ascii")
+
+def decode_cursor(cursor: str, kinds: Sequence[type]) -> Tuple[Any, ...]:
+    """Parses a cursor produced by encode_cursor. Raises ValueError if it is malformed."""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        payload = json.loads(raw)
+    except (ValueError, TypeError) as e:
+        raise ValueError("Malformed pagination cursor") from e
+    if not isinstance(payload, list) or len(payload) != len(kinds):
+        raise ValueError("Malformed pagination cursor")
+    values = []
+    for kind, value in zip(kinds, payload):
+        if kind is datetime:
+            if not isinstance(value, str):
+                raise ValueError("Malformed pagination cursor")
+            values.append(datetime.fromisoformat(value))
+        elif kind is int:
+            if not isinstance(value, int) or isinstance(value, bool):
+                raise ValueError("Malformed pagination cursor")
+            values.append(value)
+        else:
+            if not isinstance(value, str):
+                raise ValueError("Malformed pagination cursor")
+            values.append(value)
+    return tuple(values)
+
+def decode_page_cursors(after: Optional[str], before: Optional[str], kinds: Sequence[type]) -> Tuple[Optional[tuple], Optional[tuple]]:
+    """Decodes the ?after= / ?before= query parameters. Raises ValueError on bad input."""
+    if after is not None and before is not None:
+        raise ValueError("Use either 'after' or 'before', not both")
+    return (
+        decode_cursor(after, kinds) if after is not None else None,
+        decode_cursor(before, kinds) if before is not None else None,
+    )
+
+def apply_keyset(query, columns: Sequence, descending: bool, after: Optional[tuple] = None, before: Optional[tuple] = None):
+    """
+    Orders `query` by `columns` (all ascending or all descending) and restricts it to rows
+    strictly after/before the given sort key. A `before` page is read backwards from the
+    cursor (so LIMIT picks the nearest rows); reverse the result with `reverse_if_before`.
+    """
+    key = tuple_(*columns)
+    if after is not None:
+        query = query.filter(key < tuple(after) if descending else key > tuple(after))
+    elif before is not None:
+        query = query.filter(key > tuple(before) if descending else key < tuple(before))
+
+    reading_backwards = before is not None and after is None
+    ascending = descending == reading_backwards
+    return query.order_by(*[c.asc() if ascending else c.desc() for c in columns])
+
+def reverse_if_before(rows: List[Any], before: Optional[tuple], after: Optional[tuple] = None) -> List[Any]:
+    if before is not None and after is None:
+        rows.reverse()
+    return rows
+
+def make_page(
+    rows: List[Any],
+    limit: int,
+    cursor_key: Callable[[Any], Sequence[Any]],
+    after: Optional[tuple] = None,
+    before: Optional[tuple] = None,
+) -> Tuple[List[Any], PageInfo]:
+    """
+    Trims a result fetched with `limit + 1` rows to `limit` and builds the page's cursors.
+    The extra row only tells us whether more rows exist in the direction we read.
+    """
+    reading_backwards = before is not None and after is None
+    has_more = len(rows) > limit
+    if has_more:
+        # The look-ahead row is the farthest one from the cursor
+        rows = rows[1:] if reading_backwards else rows[:limit]
+
+    if reading_backwards:
+        has_next, has_prev = True, has_more
+    else:
+        has_next, has_prev = has_more, after is not None
+
+    next_cursor = encode_cursor(cursor_key(rows[-1])) if rows and has_next else None
+    prev_cursor = encode_cursor(cursor_key(rows[0])) if rows and has_prev else None
+    return rows, PageInfo(next_cursor=next_cursor, prev_cursor=prev_cursor, has_more=has_next)
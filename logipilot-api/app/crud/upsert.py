@@ -0,0 +1,23 @@
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session
+
+# INSERT .. ON CONFLICT for the crud upserts (summary counters, the change log's
+# bookkeeping, location interning). The statement is dialect-specific, so it is picked
+# from the session's bind. Only SQLite and PostgreSQL are supported (the writes also rely
+# on RETURNING); anything else fails here with a clear error rather than sending SQL the
+# database can't parse.
+
+_INSERTS = {
+    "sqlite": sqlite.insert,
+    "postgresql": postgresql.insert,
+}
+
+def dialect_insert(db: Session):
+    """The session's dialect-specific insert(), which has on_conflict_do_update/do_nothing."""
+    dialect = db.get_bind().dialect.name
+    try:
+        return _INSERTS[dialect]
+    except KeyError:
+        raise NotImplementedError(
+            f"Upserts are not supported on {dialect!r}; use SQLite or PostgreSQL"
+        ) from None
@@ -1,23 +1,63 @@
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event
 from sqlalchemy.ext.declarative import declarative_base
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
 from sqlalchemy.orm import sessionmaker
 from .core.config import settings
 
 SQLALCHEMY_DATABASE_URL = settings.DATABASE_URL
 
+# Async drivers used when DATABASE_URL names a sync (or default) driver.
+# Set ASYNC_DATABASE_URL explicitly to use anything else.
+ASYNC_DRIVERS = {
+    "sqlite": "sqlite+aiosqlite",
+    "postgresql": "postgresql+asyncpg",
+}
+
+def to_async_database_url(url: str) -> str:
+    scheme, sep, rest = url.partition("://")
+    dialect = scheme.split("+", 1)[0]
+    if not sep or dialect not in ASYNC_DRIVERS:
+        return url
+    return f"{ASYNC_DRIVERS[dialect]}://{rest}"
+
+ASYNC_SQLALCHEMY_DATABASE_URL = settings.ASYNC_DATABASE_URL or to_async_database_url(SQLALCHEMY_DATABASE_URL)
+
 # Adjust connect_args for SQLite
 connect_args = {"check_same_thread": False} if SQLALCHEMY_DATABASE_URL.startswith("sqlite") else {}
 
+# Sync engine/session: used by initial_data.py, Alembic and other scripts
 engine = create_engine(
     SQLALCHEMY_DATABASE_URL,
     connect_args=connect_args
 )
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# Async engine/session: used by the API (routers and auth dependencies)
+async_engine = create_async_engine(ASYNC_SQLALCHEMY_DATABASE_URL)
+# expire_on_commit=False: returned ORM objects are serialized after the commit,
+# and reloading expired attributes would need I/O outside an awaitable context.
+AsyncSessionLocal = async_sessionmaker(bind=async_engine, autoflush=False, expire_on_commit=False)
+
+# SQLite leaves FK constraints unenforced unless enabled per connection.
+# The crud write path relies on them to reject rows pointing at missing parents.
+def _enable_sqlite_foreign_keys(dbapi_connection, connection_record):
+    cursor = dbapi_connection.cursor()
+    cursor.execute("PRAGMA foreign_keys=ON")
+    cursor.close()
+
+for _engine in (engine, async_engine.sync_engine):
+    if _engine.dialect.name == "sqlite":
+        event.listen(_engine, "connect", _enable_sqlite_foreign_keys)
+
 Base = declarative_base()
 
-# Dependency to get DB session
-def get_db():
+# Dependency to get DB session (async)
+async def get_db():
+    async with AsyncSessionLocal() as db:
+        yield db
+
+# Sync counterpart, for code paths that still use a blocking Session
+def get_sync_db():
     db = SessionLocal()
     try:
         yield db
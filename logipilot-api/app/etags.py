@@ -0,0 +1,43 @@
+import hashlib
+from typing import Optional, Sequence
+
+from fastapi import Request, Response
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from .crud import crud_counter
+
+# Strong ETags and If-None-Match for the polled read endpoints.
+#
+# A list ETag hashes the request URL (filters, cursor, fields/include) with the change
+# generation of every table the response reads (crud_counter.CHANGES_BUCKET), so a
+# matching If-None-Match is answered with 304 after a single primary-key read of the
+# counters table: no list query, no serialization. A detail ETag also hashes the row's
+# version; ids are never reused (AUTOINCREMENT on SQLite, sequences elsewhere), so a
+# (path, version) pair names one state of one row. Generations are advanced in the same
+# transaction as the writes, so an ETag is never newer than the data it was sent with.
+
+def compute_etag(request: Request, *parts) -> str:
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update(request.url.path.encode())
+    # Query parameters in a canonical order, so ?a=1&b=2 and ?b=2&a=1 share a tag
+    digest.update(repr(sorted(request.query_params.multi_items())).encode())
+    for part in parts:
+        digest.update(b"|" + str(part).encode())
+    return f'"{digest.hexdigest()}"'
+
+async def resource_etag(db: AsyncSession, request: Request, tables: Sequence[str], version: Optional[int] = None) -> str:
+    """ETag for a response reading `tables` (and, for a single row, that row's `version`)."""
+    generations = await crud_counter.get_generations_async(db, list(tables)) if tables else ()
+    return compute_etag(request, version, *generations)
+
+def matches(request: Request, etag: str) -> bool:
+    """True if the request's If-None-Match lists `etag` (weak comparison, as RFC 9110 specifies for it)."""
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    if header.strip() == "*":
+        return True
+    return any(tag.strip().removeprefix("W/") == etag for tag in header.split(","))
+
+def not_modified(etag: str) -> Response:
+    return Response(status_code=304, headers={"ETag": etag})
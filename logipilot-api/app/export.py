@@ -0,0 +1,81 @@
+import csv
+import io
+from enum import Enum
+from typing import Any, AsyncIterator, Sequence, Type
+
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel
+from sqlalchemy.sql import Select
+
+from .core.config import settings
+from .database import AsyncSessionLocal
+
+# Streaming exports for the /export endpoints.
+#
+# Rows are read with yield_per (a server-side cursor where the driver supports one) and
+# serialized one batch at a time, so memory stays flat regardless of table size and the
+# first bytes go out as soon as the first batch is fetched.
+
+class ExportFormat(str, Enum):
+    NDJSON = "ndjson"
+    CSV = "csv"
+
+MEDIA_TYPES = {
+    ExportFormat.NDJSON: "application/x-ndjson",
+    ExportFormat.CSV: "text/csv",
+}
+
+def _csv_value(record: dict, column: str) -> Any:
+    # Dotted columns ("client.name") read from nested objects
+    value: Any = record
+    for part in column.split("."):
+        value = value.get(part) if isinstance(value, dict) else None
+    return value
+
+def _encode_ndjson(rows: Sequence[Any], schema: Type[BaseModel]) -> str:
+    return "".join(schema.model_validate(row).model_dump_json() + "\n" for row in rows)
+
+def _encode_csv(rows: Sequence[Any], schema: Type[BaseModel], columns: Sequence[str]) -> str:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    for row in rows:
+        record = schema.model_validate(row).model_dump(mode="json")
+        writer.writerow([_csv_value(record, column) for column in columns])
+    return buffer.getvalue()
+
+async def _stream(statement: Select, schema: Type[BaseModel], export_format: ExportFormat, csv_columns: Sequence[str]) -> AsyncIterator[str]:
+    if export_format == ExportFormat.CSV:
+        header = io.StringIO()
+        csv.writer(header).writerow(csv_columns)
+        yield header.getvalue()
+
+    # The request's get_db session may be closed before the body is sent, so the stream owns its session
+    async with AsyncSessionLocal() as db:
+        result = await db.stream(statement.execution_options(yield_per=settings.EXPORT_BATCH_SIZE))
+        # The first row is flushed on its own so the client sees bytes right away;
+        # chunks then double up to the batch size to keep per-chunk overhead low.
+        flush_rows = 1
+        async for rows in result.scalars().partitions():
+            start = 0
+            while start < len(rows):
+                chunk = rows[start:start + flush_rows]
+                if export_format == ExportFormat.CSV:
+                    yield _encode_csv(chunk, schema, csv_columns)
+                else:
+                    yield _encode_ndjson(chunk, schema)
+                start += len(chunk)
+                flush_rows = min(flush_rows * 2, settings.EXPORT_BATCH_SIZE)
+
+def export_response(
+    statement: Select,
+    schema: Type[BaseModel],
+    export_format: ExportFormat,
+    csv_columns: Sequence[str],
+    filename: str,
+) -> StreamingResponse:
+    extension = "csv" if export_format == ExportFormat.CSV else "ndjson"
+    return StreamingResponse(
+        _stream(statement, schema, export_format, csv_columns),
+        media_type=MEDIA_TYPES[export_format],
+        headers={"Content-Disposition": f'attachment; filename="{filename}.{extension}"'},
+    )
@@ -0,0 +1,141 @@
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Sequence, Tuple, Type
+
+from fastapi import HTTPException, Query, Response, status
+from pydantic import BaseModel
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session, joinedload, load_only, noload
+from sqlalchemy.orm.attributes import set_committed_value
+
+from .core.config import settings
+from .responses import envelope_response
+
+# Sparse fieldsets (?fields=) and optional embedding (?include=) for the read endpoints.
+#
+# `fields` narrows both the SELECT (load_only) and the response; `include` picks which
+# relations are embedded. To-one relations are joined into the main query; to-many
+# relations (a shipment's alerts, a client's shipments) are loaded for every row of the
+# page by one extra query capped at FIELDSET_INCLUDE_LIMIT children per parent.
+# Without either parameter the endpoints load and respond exactly as before.
+
+@dataclass(frozen=True)
+class Relation:
+    attribute: Any # The relationship, e.g. ShipmentModel.client
+    schema: Type[BaseModel] # How each embedded row is serialized
+    order_by: Tuple[Any, ...] = () # To-many only: which children are kept when over the limit
+
+@dataclass(frozen=True)
+class Resource:
+    columns: Dict[str, Any] # Selectable field name -> model column (the public schema's non-relation fields)
+    required: Tuple[Any, ...] # Columns always loaded: the primary key and the cursor (sort) columns
+    relations: Dict[str, Relation] = field(default_factory=dict)
+    default_include: Tuple[str, ...] = () # Embedded when ?include= is absent
+
+@dataclass(frozen=True)
+class Fieldset:
+    fields: Tuple[str, ...]
+    include: Tuple[str, ...]
+
+def _split(value: str) -> List[str]:
+    return list(dict.fromkeys(part.strip() for part in value.split(",") if part.strip()))
+
+def parse_fieldset(resource: Resource, fields: Optional[str], include: Optional[str]) -> Optional[Fieldset]:
+    """None when neither parameter is given (full response). Raises ValueError on unknown names."""
+    if fields is None and include is None:
+        return None
+    names = list(resource.columns) if fields is None else _split(fields)
+    unknown = [name for name in names if name not in resource.columns]
+    if unknown:
+        raise ValueError(f"Unknown field(s): {', '.join(unknown)}. Available: {', '.join(resource.columns)}.")
+    if "id" not in names:
+        names.insert(0, "id") # Always returned so rows can be told apart
+    relations = list(resource.default_include) if include is None else _split(include)
+    unknown = [name for name in relations if name not in resource.relations]
+    if unknown:
+        raise ValueError(f"Unknown include(s): {', '.join(unknown)}. Available: {', '.join(resource.relations) or 'none'}.")
+    return Fieldset(fields=tuple(names), include=tuple(relations))
+
+def fieldset_query(resource: Resource):
+    """Dependency that reads ?fields= and ?include= for `resource` into an Optional[Fieldset]."""
+    include_help = ", ".join(resource.relations) or "none"
+    default_help = ", ".join(resource.default_include) or "nothing"
+
+    def dependency(
+        fields: Optional[str] = Query(None, description=f"Comma-separated fields to return (id is always included): {', '.join(resource.columns)}"),
+        include: Optional[str] = Query(None, description=f"Comma-separated relations to embed ({include_help}). Defaults to {default_help}; pass an empty value for none"),
+    ) -> Optional[Fieldset]:
+        try:
+            return parse_fieldset(resource, fields, include)
+        except ValueError as e:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    return dependency
+
+def load_options(resource: Resource, fieldset: Fieldset) -> list:
+    """Query options that load only what `fieldset` returns."""
+    columns = {column.key: column for column in resource.required}
+    columns.update((name, resource.columns[name]) for name in fieldset.fields)
+    for name in fieldset.include:
+        prop = resource.relations[name].attribute.property
+        if not prop.uselist:
+            # The foreign key column(s) the join needs, e.g. shipments.client_id
+            columns.update((local.key, resource.columns[local.key]) for local, _ in prop.local_remote_pairs)
+    options = [load_only(*columns.values())]
+    for name, relation in resource.relations.items():
+        if name not in fieldset.include:
+            options.append(noload(relation.attribute))
+        elif not relation.attribute.property.uselist:
+            options.append(joinedload(relation.attribute))
+        # To-many includes are loaded afterwards by load_includes
+    return options
+
+def load_includes(db: Session, resource: Resource, fieldset: Fieldset, rows: Sequence[Any]) -> None:
+    """Loads the to-many includes of `rows` in one query per relation, at most FIELDSET_INCLUDE_LIMIT per row."""
+    if not rows:
+        return
+    for name in fieldset.include:
+        relation = resource.relations[name]
+        prop = relation.attribute.property
+        if not prop.uselist:
+            continue
+        (parent_column, child_column), = prop.local_remote_pairs
+        child = prop.mapper.class_
+        parents = {getattr(row, parent_column.key): row for row in rows}
+        # Number each parent's children in display order and keep the first N: a single
+        # windowed query instead of one query (or one unbounded selectinload) per parent
+        ranked = select(
+            child.id.label("id"),
+            func.row_number().over(partition_by=child_column, order_by=relation.order_by).label("position"),
+        ).where(child_column.in_(parents)).subquery()
+        children = db.scalars(
+            select(child).join(ranked, child.id == ranked.c.id)
+            .where(ranked.c.position <= settings.FIELDSET_INCLUDE_LIMIT)
+            .order_by(child_column, ranked.c.position)
+        ).all()
+        grouped: Dict[Any, list] = {key: [] for key in parents}
+        for row in children:
+            grouped[getattr(row, child_column.key)].append(row)
+        for key, parent in parents.items():
+            set_committed_value(parent, prop.key, grouped[key])
+
+def source_tables(resource: Resource, fieldset: Optional[Fieldset]) -> Tuple[str, ...]:
+    """The tables a response reads: the resource's own, then those of the relations it embeds."""
+    include = resource.default_include if fieldset is None else fieldset.include
+    tables = [resource.columns["id"].class_.__tablename__]
+    tables += [resource.relations[name].attribute.property.mapper.local_table.name for name in include]
+    return tuple(dict.fromkeys(tables))
+
+def shape(resource: Resource, fieldset: Fieldset, row: Any) -> Dict[str, Any]:
+    """The response dict for one row: the selected fields plus the embedded relations."""
+    record = {name: getattr(row, name) for name in fieldset.fields}
+    for name in fieldset.include:
+        relation = resource.relations[name]
+        value = getattr(row, relation.attribute.key)
+        if relation.attribute.property.uselist:
+            record[name] = [relation.schema.model_validate(item) for item in value]
+        else:
+            record[name] = relation.schema.model_validate(value) if value is not None else None
+    return record
+
+def shaped_response(envelope: BaseModel, headers: Optional[Dict[str, str]] = None) -> Response:
+    # The route's response_model describes the full row, so shaped rows bypass it
+    return envelope_response(envelope, headers=headers)
@@ -1,13 +1,56 @@
 from fastapi import FastAPI, Request, status
-from fastapi.responses import JSONResponse
 from fastapi.exceptions import RequestValidationError, HTTPException as FastAPIHTTPException # Alias to avoid confusion
 from fastapi.middleware.cors import CORSMiddleware
 from .schemas.response import StandardResponse, ErrorResponse, ErrorDetail # Import custom response/error schemas
+from .responses import envelope_response
 from typing import Any
+import asyncio
+import logging
+from contextlib import asynccontextmanager, suppress
+from .core.config import settings
+from .crud.count_cache import reconcile_periodically
+from .crud.crud_change import maintain_periodically
+from .crud.client_suggest import load_client_suggest_index
+from .crud.crud_location import load_location_cache
+from .database import AsyncSessionLocal
+from .response_cache import ResponseCacheMiddleware
+from .compression import CompressionMiddleware
+
+logger = logging.getLogger(__name__)
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Build the client typeahead index up front so the first /clients/suggest is fast
+    try:
+        async with AsyncSessionLocal() as db:
+            await db.run_sync(load_client_suggest_index)
+    except Exception:
+        logger.exception("Could not load the client suggest index; it will be loaded on first use")
+    # Cache the locations so shipment writes resolve origin/destination names without a query
+    try:
+        async with AsyncSessionLocal() as db:
+            await db.run_sync(load_location_cache)
+    except Exception:
+        logger.exception("Could not load the location cache; locations will be cached as they are used")
+    # Background re-count of the cached list totals (see app/crud/count_cache.py)
+    background = []
+    if settings.COUNT_CACHE_RECONCILE_SECONDS > 0:
+        background.append(asyncio.create_task(reconcile_periodically(settings.COUNT_CACHE_RECONCILE_SECONDS)))
+    # Compaction and retention of the change log (see app/crud/crud_change.py)
+    if settings.CHANGE_LOG_MAINTENANCE_SECONDS > 0:
+        background.append(asyncio.create_task(maintain_periodically(
+            settings.CHANGE_LOG_MAINTENANCE_SECONDS, settings.CHANGE_LOG_COMPACT_AFTER_HOURS, settings.CHANGE_LOG_RETENTION_DAYS
+        )))
+    yield
+    for task in background:
+        task.cancel()
+        with suppress(asyncio.CancelledError):
+            await task
 
 app = FastAPI(
     title="LogiPilot API",
     version="0.1.0",
+    lifespan=lifespan,
     # Disable default validation error responses to use custom ones
     # This is not directly available; handled by overriding exception handler.
 )
@@ -22,6 +65,21 @@ origins = [
     # Add other origins as needed
 ]
 
+# Cached GET responses, keyed by route, query and role. Each prefix lists the tables its
+# routes read; the crud writes invalidate them (see app/response_cache.py). Added before
+# CORSMiddleware so it runs inside it and cached responses still get the CORS headers.
+app.add_middleware(
+    ResponseCacheMiddleware,
+    routes={
+        "/api/v1/shipments": ("shipments", "clients", "alerts"),
+        "/api/v1/alerts": ("alerts", "shipments"),
+        "/api/v1/clients": ("clients", "shipments"),
+        "/api/v1/summary": ("shipments", "alerts", "clients"),
+        "/api/v1/search": ("shipments", "alerts", "clients"),
+        "/api/v1/analytics": ("shipments",),
+    },
+)
+
 app.add_middleware(
     CORSMiddleware,
     allow_origins=origins,
@@ -30,6 +88,15 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Outermost: compresses what the cache and the routes produce (the cache stores identity bodies)
+if settings.COMPRESSION_ENABLED:
+    app.add_middleware(
+        CompressionMiddleware,
+        minimum_size=settings.COMPRESSION_MINIMUM_SIZE,
+        gzip_level=settings.COMPRESSION_GZIP_LEVEL,
+        brotli_quality=settings.COMPRESSION_BROTLI_QUALITY,
+    )
+
 
 # Exception handler for Pydantic RequestValidationError
 @app.exception_handler(RequestValidationError)
@@ -42,10 +109,10 @@ async def validation_exception_handler(request: Request, exc: RequestValidationE
             message=error["msg"],
             field=field
         ))
-    return JSONResponse(
+    return envelope_response(
+        StandardResponse(error=ErrorResponse(message="Validation failed", details=error_details)),
         status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
-        content=StandardResponse(error=ErrorResponse(message="Validation failed", details=error_details)).model_dump(exclude_none=True) # V2
-        # content=StandardResponse(error=ErrorResponse(message="Validation failed", details=error_details)).dict(exclude_none=True) # V1
+        exclude_none=True,
     )
 
 # Exception handler for FastAPI's HTTPException (and custom ones inheriting from it)
@@ -57,11 +124,11 @@ async def http_exception_handler(request: Request, exc: FastAPIHTTPException):
     # elif exc.status_code == 403: error_detail.code = "FORBIDDEN"
     # elif exc.status_code == 404: error_detail.code = "NOT_FOUND"
 
-    return JSONResponse(
+    return envelope_response(
+        StandardResponse(error=ErrorResponse(message=str(exc.detail), details=[error_detail])),
         status_code=exc.status_code,
-        content=StandardResponse(error=ErrorResponse(message=str(exc.detail), details=[error_detail])).model_dump(exclude_none=True), # V2
-        # content=StandardResponse(error=ErrorResponse(message=str(exc.detail), details=[error_detail])).dict(exclude_none=True), # V1
         headers=exc.headers,
+        exclude_none=True,
     )
 
 # Generic Python Exception handler (optional, for unhandled errors)
@@ -69,10 +136,10 @@ async def http_exception_handler(request: Request, exc: FastAPIHTTPException):
 async def generic_exception_handler(request: Request, exc: Exception):
     # Log the exception here for debugging
     # logger.error(f"Unhandled exception: {exc}", exc_info=True)
-    return JSONResponse(
+    return envelope_response(
+        StandardResponse(error=ErrorResponse(message="An unexpected internal server error occurred.")),
         status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-        content=StandardResponse(error=ErrorResponse(message="An unexpected internal server error occurred.")).model_dump(exclude_none=True) #V2
-        # content=StandardResponse(error=ErrorResponse(message="An unexpected internal server error occurred.")).dict(exclude_none=True) #V1
+        exclude_none=True,
     )
 
 # The app instance was already created above where CORS was added.
@@ -84,7 +151,7 @@ async def root():
     return {"message": "Welcome to LogiPilot API"}
 
 # Import and include routers
-from .routers import auth as auth_router, users as users_router, clients as clients_router, shipments as shipments_router, alerts as alerts_router
+from .routers import auth as auth_router, users as users_router, clients as clients_router, shipments as shipments_router, alerts as alerts_router, summary as summary_router, search as search_router, metrics as metrics_router, changes as changes_router, analytics as analytics_router
 
 # API version prefix (optional but good practice)
 API_V1_PREFIX = "/api/v1"
@@ -94,6 +161,11 @@ app.include_router(users_router.router, prefix=API_V1_PREFIX)
 app.include_router(clients_router.router, prefix=API_V1_PREFIX)
 app.include_router(shipments_router.router, prefix=API_V1_PREFIX)
 app.include_router(alerts_router.router, prefix=API_V1_PREFIX)
+app.include_router(summary_router.router, prefix=API_V1_PREFIX)
+app.include_router(search_router.router, prefix=API_V1_PREFIX)
+app.include_router(metrics_router.router, prefix=API_V1_PREFIX)
+app.include_router(changes_router.router, prefix=API_V1_PREFIX)
+app.include_router(analytics_router.router, prefix=API_V1_PREFIX)
 
 
 # Root path for health check or basic info, distinct from API versioned paths
@@ -1,9 +1,10 @@
-from sqlalchemy import Column, Integer, String, Enum as SAEnum, DateTime, ForeignKey, Text
+from sqlalchemy import Column, Integer, String, Enum as SAEnum, DateTime, ForeignKey, Text, Index
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func # For default datetime
 import enum
 
 from ..database import Base
+from .types import Timestamp
 # from .shipment import Shipment # For clarity if needed
 
 class AlertSeverityEnum(str, enum.Enum):
@@ -14,6 +15,14 @@ class AlertSeverityEnum(str, enum.Enum):
 
 class Alert(Base):
     __tablename__ = "alerts"
+    # Match the list query: optional filter on one column, newest first with id as tie-breaker
+    __table_args__ = (
+        Index("ix_alerts_createdAt_id", "createdAt", "id"),
+        Index("ix_alerts_shipment_id_createdAt_id", "shipment_id", "createdAt", "id"),
+        Index("ix_alerts_severity_createdAt_id", "severity", "createdAt", "id"),
+        # Never reuse a deleted row's id: it would match that row's detail ETag (migration 0013)
+        {"sqlite_autoincrement": True},
+    )
 
     id = Column(Integer, primary_key=True, index=True)
 
@@ -22,7 +31,8 @@ class Alert(Base):
     message = Column(Text, nullable=False) # Using Text for potentially longer messages
     severity = Column(SAEnum(AlertSeverityEnum), nullable=False, default=AlertSeverityEnum.MEDIUM)
 
-    createdAt = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+    createdAt = Column(Timestamp, server_default=func.now(), nullable=False)
+    version = Column(Integer, nullable=False, default=1, server_default="1") # Incremented by every update; the detail ETag
     # resolvedAt = Column(DateTime(timezone=True), nullable=True) # Optional: if alerts can be resolved
 
     # Relationship to Shipment model
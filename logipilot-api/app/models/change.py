@@ -0,0 +1,30 @@
+from sqlalchemy import Column, Integer, String, Text, Index
+from sqlalchemy.sql import func
+
+from ..database import Base
+from .types import Timestamp
+
+class Change(Base):
+    """
+    Append-only log of committed writes to clients, shipments and alerts, served by
+    GET /changes. Written by the crud functions in the same transaction as the write
+    (see app/crud/crud_change.py). `seq` only grows: AUTOINCREMENT keeps SQLite from
+    reusing the numbers of entries removed by pruning or compaction.
+    """
+    __tablename__ = "changes"
+    __table_args__ = (
+        # ?entity= feeds, and compaction's lookup of one row's entries
+        Index("ix_changes_entity_seq", "entity", "seq"),
+        Index("ix_changes_entity_entity_id_seq", "entity", "entity_id", "seq"),
+        {"sqlite_autoincrement": True},
+    )
+
+    seq = Column(Integer, primary_key=True)
+    entity = Column(String(32), nullable=False) # "clients", "shipments" or "alerts"
+    entity_id = Column(Integer, nullable=False)
+    op = Column(String(8), nullable=False) # "create", "update" or "delete"
+    diff = Column(Text, nullable=True) # JSON: the row on create, the changed columns on update, null on delete
+    changedAt = Column(Timestamp, server_default=func.now(), nullable=False)
+
+    def __repr__(self):
+        return f"<Change(seq={self.seq}, entity='{self.entity}', entity_id={self.entity_id}, op='{self.op}')>"
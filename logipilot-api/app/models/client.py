@@ -1,9 +1,10 @@
-from sqlalchemy import Column, Integer, String, Enum as SAEnum, DateTime, ForeignKey
+from sqlalchemy import Column, Integer, String, Enum as SAEnum, DateTime, ForeignKey, Index
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func # For default datetime
 import enum
 
 from ..database import Base
+from .types import Timestamp
 
 class ClientStatusEnum(str, enum.Enum):
     ACTIVE = "Active"
@@ -14,15 +15,23 @@ class ClientStatusEnum(str, enum.Enum):
 
 class Client(Base):
     __tablename__ = "clients"
+    # Match the list query: ordered by name with id as tie-breaker, optionally filtered by status
+    __table_args__ = (
+        Index("ix_clients_name_id", "name", "id"),
+        Index("ix_clients_status_name_id", "status", "name", "id"),
+        # Never reuse a deleted row's id: it would match that row's detail ETag (migration 0013)
+        {"sqlite_autoincrement": True},
+    )
 
     id = Column(Integer, primary_key=True, index=True)
-    name = Column(String, index=True, nullable=False)
+    name = Column(String, nullable=False) # Indexed via ix_clients_name_id
     email = Column(String, unique=True, index=True, nullable=False)
     phone = Column(String, nullable=True)
     status = Column(SAEnum(ClientStatusEnum), nullable=False, default=ClientStatusEnum.PROSPECT)
 
     # auto_now_add equivalent for SQLAlchemy
-    createdAt = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+    createdAt = Column(Timestamp, server_default=func.now(), nullable=False)
+    version = Column(Integer, nullable=False, default=1, server_default="1") # Incremented by every update; the detail ETag
     # auto_now equivalent for SQLAlchemy (if you need an updated_at field)
     # updatedAt = Column(DateTime(timezone=True), onupdate=func.now())
 
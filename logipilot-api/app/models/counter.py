@@ -0,0 +1,21 @@
+from sqlalchemy import Column, Integer, String
+
+from ..database import Base
+
+class Counter(Base):
+    """
+    Row counts per status/severity bucket for the dashboard summary, e.g.
+    ("shipments", "IN_TRANSIT") -> 42. Buckets are enum member names, as stored
+    in the shipments/alerts/clients tables. Kept current by the crud writes in the
+    same transaction (see app/crud/crud_counter.py); `python -m app.reconcile_counters`
+    rebuilds them from the source tables. The "_changes" bucket is not a count but
+    the entity's change generation, used by the list ETags.
+    """
+    __tablename__ = "counters"
+
+    entity = Column(String(32), primary_key=True) # "shipments", "alerts" or "clients"
+    bucket = Column(String(32), primary_key=True)
+    count = Column(Integer, nullable=False, default=0)
+
+    def __repr__(self):
+        return f"<Counter(entity='{self.entity}', bucket='{self.bucket}', count={self.count})>"
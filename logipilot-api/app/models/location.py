@@ -0,0 +1,30 @@
+from sqlalchemy import Column, Integer, String, Index
+
+from ..database import Base
+
+def normalize_location_name(name: str) -> str:
+    """The stored form of a location name: trimmed, inner whitespace collapsed to single spaces."""
+    return " ".join(name.split())
+
+def location_key(name: str) -> str:
+    """The dictionary key: names that differ only in case or spacing are the same location."""
+    return normalize_location_name(name).casefold()
+
+class Location(Base):
+    """
+    Dictionary of shipment origins and destinations. Each distinct name (by location_key)
+    is stored once and shipments reference it by id. Rows are only ever added: a name is
+    never renamed or deleted, so an id -> name mapping cached in a process stays valid
+    (see app/crud/crud_location.py).
+    """
+    __tablename__ = "locations"
+    __table_args__ = (
+        Index("ix_locations_key", "key", unique=True),
+    )
+
+    id = Column(Integer, primary_key=True)
+    name = Column(String(200), nullable=False) # As first written (normalized); what the API returns
+    key = Column(String(200), nullable=False) # location_key(name)
+
+    def __repr__(self):
+        return f"<Location(id={self.id}, name='{self.name}')>"
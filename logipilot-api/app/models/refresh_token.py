@@ -0,0 +1,39 @@
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Boolean
+from sqlalchemy.orm import relationship
+from sqlalchemy.sql import func # For default datetime
+
+from ..database import Base
+
+class RefreshToken(Base):
+    """
+    One row per login session. The opaque token is rotated in place on every refresh,
+    and the replaced hash is kept in refresh_token_history, so presenting any token the
+    session has already rotated away from is detected as reuse and revokes the session.
+    Only SHA-256 hashes are stored; the raw token never touches the database.
+    """
+    __tablename__ = "refresh_tokens"
+
+    id = Column(Integer, primary_key=True, index=True)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False, index=True)
+
+    token_hash = Column(String(64), unique=True, index=True, nullable=False)
+
+    revoked = Column(Boolean, nullable=False, default=False)
+    expiresAt = Column(DateTime(timezone=True), nullable=False)
+    createdAt = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+    lastUsedAt = Column(DateTime(timezone=True), nullable=True)
+
+    user = relationship("User", back_populates="refresh_tokens")
+
+    def __repr__(self):
+        return f"<RefreshToken(id={self.id}, user_id={self.user_id}, revoked={self.revoked})>"
+
+
+class RefreshTokenHistory(Base):
+    """Every token a session has rotated away from; deleted with the session."""
+    __tablename__ = "refresh_token_history"
+
+    id = Column(Integer, primary_key=True)
+    session_id = Column(Integer, ForeignKey("refresh_tokens.id", ondelete="CASCADE"), nullable=False, index=True)
+    token_hash = Column(String(64), unique=True, index=True, nullable=False)
+    rotatedAt = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
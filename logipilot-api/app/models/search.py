@@ -0,0 +1,53 @@
+from sqlalchemy import DDL, event
+
+from ..database import Base
+
+# Full-text index behind GET /search (SQLite FTS5; other backends fall back to LIKE, see crud_search).
+#
+# One contentless FTS5 table covers clients, shipments and alerts: it stores only the
+# inverted index, not a second copy of the text. Each row's rowid encodes the source
+# row as id * 4 + kind, so a match maps straight back to (kind, id) without a join.
+# Triggers keep it in sync with every insert/update/delete, including bulk inserts and
+# ORM cascades. Migration 0008 creates the same objects for Alembic-managed databases.
+
+SEARCH_TABLE = "search_index"
+
+# kind -> (code, source table, indexed columns, text expression with {row} standing for NEW/OLD)
+SEARCH_SOURCES = {
+    "Client": (1, "clients", ("name", "email", "phone"), "{row}.name || ' ' || {row}.email || ' ' || coalesce({row}.phone, '')"),
+    # Location names never change, so looking them up again when a row is deleted replays the indexed text
+    "Shipment": (
+        2, "shipments", ("origin_id", "destination_id"),
+        "(SELECT name FROM locations WHERE id = {row}.origin_id) || ' ' || (SELECT name FROM locations WHERE id = {row}.destination_id)",
+    ),
+    "Alert": (3, "alerts", ("message",), "{row}.message"),
+}
+SEARCH_KIND_CODES = {code: kind for kind, (code, _, _, _) in SEARCH_SOURCES.items()}
+
+def search_index_ddl() -> list:
+    statements = [
+        # prefix='2 3 4' adds prefix indexes so "term*" queries on short prefixes (the typeahead case) stay index reads
+        f"CREATE VIRTUAL TABLE IF NOT EXISTS {SEARCH_TABLE} USING fts5("
+        f"content, content='', tokenize='unicode61 remove_diacritics 2', prefix='2 3 4')"
+    ]
+    for code, table, columns, text in SEARCH_SOURCES.values():
+        rowid = "{row}.id * 4 + %d" % code
+        insert = f"INSERT INTO {SEARCH_TABLE}(rowid, content) VALUES ({rowid.format(row='new')}, {text.format(row='new')});"
+        # Contentless tables delete a row by replaying the text it was indexed with
+        remove = (
+            f"INSERT INTO {SEARCH_TABLE}({SEARCH_TABLE}, rowid, content) "
+            f"VALUES ('delete', {rowid.format(row='old')}, {text.format(row='old')});"
+        )
+        statements += [
+            f"CREATE TRIGGER IF NOT EXISTS {table}_search_ai AFTER INSERT ON {table} BEGIN {insert} END",
+            f"CREATE TRIGGER IF NOT EXISTS {table}_search_ad AFTER DELETE ON {table} BEGIN {remove} END",
+            # Only edits of the indexed columns re-index (not e.g. status changes)
+            f"CREATE TRIGGER IF NOT EXISTS {table}_search_au AFTER UPDATE OF {', '.join(columns)} ON {table} "
+            f"BEGIN {remove} {insert} END",
+        ]
+    return statements
+
+# Base.metadata.create_all (tests, benchmarks, scratch databases) creates the index too
+for _statement in search_index_ddl():
+    event.listen(Base.metadata, "after_create", DDL(_statement).execute_if(dialect="sqlite"))
+event.listen(Base.metadata, "before_drop", DDL(f"DROP TABLE IF EXISTS {SEARCH_TABLE}").execute_if(dialect="sqlite"))
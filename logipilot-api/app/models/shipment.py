@@ -1,9 +1,11 @@
-from sqlalchemy import Column, Integer, String, Enum as SAEnum, DateTime, ForeignKey
-from sqlalchemy.orm import relationship
+from sqlalchemy import Column, Integer, String, Enum as SAEnum, DateTime, ForeignKey, Index, select
+from sqlalchemy.orm import column_property, relationship
 from sqlalchemy.sql import func # For default datetime
 import enum
 
 from ..database import Base
+from .types import Timestamp
+from .location import Location
 # Import Client model for ForeignKey relationship if not already implicitly handled by SQLAlchemy's awareness
 # from .client import Client # Not strictly needed for ForeignKey string reference but good for clarity
 
@@ -17,16 +19,27 @@ class ShipmentStatusEnum(str, enum.Enum):
 
 class Shipment(Base):
     __tablename__ = "shipments"
+    # Match the list query: optional filter on one column, newest first with id as tie-breaker.
+    # Each index serves both the filter and the ORDER BY, so no sort step is needed.
+    __table_args__ = (
+        Index("ix_shipments_createdAt_id", "createdAt", "id"),
+        Index("ix_shipments_client_id_createdAt_id", "client_id", "createdAt", "id"),
+        Index("ix_shipments_status_createdAt_id", "status", "createdAt", "id"),
+        # Never reuse a deleted row's id: it would match that row's detail ETag (migration 0013)
+        {"sqlite_autoincrement": True},
+    )
 
     id = Column(Integer, primary_key=True, index=True)
 
     client_id = Column(Integer, ForeignKey("clients.id"), nullable=False) # ForeignKey to clients table, id column
 
     status = Column(SAEnum(ShipmentStatusEnum), nullable=False, default=ShipmentStatusEnum.PENDING)
-    origin = Column(String, nullable=False)
-    destination = Column(String, nullable=False)
+    # Dictionary-encoded: integer references into the locations table
+    origin_id = Column(Integer, ForeignKey("locations.id"), nullable=False)
+    destination_id = Column(Integer, ForeignKey("locations.id"), nullable=False)
 
-    createdAt = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+    createdAt = Column(Timestamp, server_default=func.now(), nullable=False)
+    version = Column(Integer, nullable=False, default=1, server_default="1") # Incremented by every update; the detail ETag
     # updatedAt = Column(DateTime(timezone=True), onupdate=func.now()) # Optional
 
     # Relationship to Client model
@@ -36,5 +49,10 @@ class Shipment(Base):
     # This allows accessing alerts related to this shipment instance (e.g., my_shipment.alerts)
     alerts = relationship("Alert", back_populates="shipment", cascade="all, delete-orphan")
 
+    # The names, read with every SELECT of the row (a primary-key lookup each). Not part of
+    # INSERT/UPDATE .. RETURNING: the crud writes fill them in from the location cache.
+    origin = column_property(select(Location.name).where(Location.id == origin_id).correlate_except(Location).scalar_subquery())
+    destination = column_property(select(Location.name).where(Location.id == destination_id).correlate_except(Location).scalar_subquery())
+
     def __repr__(self):
         return f"<Shipment(id={self.id}, client_id={self.client_id}, status='{self.status.value}')>"
@@ -0,0 +1,29 @@
+from sqlalchemy import Column, Integer, Enum as SAEnum, ForeignKey, Index
+from sqlalchemy.sql import func
+
+from ..database import Base
+from .types import Timestamp
+from .shipment import ShipmentStatusEnum
+
+class ShipmentStatusHistory(Base):
+    """
+    One row per status change of a shipment, written by crud_shipment.update_shipment in
+    the same transaction as the UPDATE. A shipment's creation is its first status (at
+    createdAt) and has no row here. Rows go with their shipment (ON DELETE CASCADE).
+    Read by the lane transit-time statistics (app/crud/lane_stats.py).
+    """
+    __tablename__ = "shipment_status_history"
+    __table_args__ = (
+        # The statistics' scan of deliveries, and the departure lookup per delivered shipment
+        Index("ix_shipment_status_history_to_status_id", "to_status", "id"),
+        Index("ix_shipment_status_history_shipment_id_to_status_changedAt", "shipment_id", "to_status", "changedAt"),
+    )
+
+    id = Column(Integer, primary_key=True)
+    shipment_id = Column(Integer, ForeignKey("shipments.id", ondelete="CASCADE"), nullable=False)
+    from_status = Column(SAEnum(ShipmentStatusEnum), nullable=False)
+    to_status = Column(SAEnum(ShipmentStatusEnum), nullable=False)
+    changedAt = Column(Timestamp, server_default=func.now(), nullable=False)
+
+    def __repr__(self):
+        return f"<ShipmentStatusHistory(id={self.id}, shipment_id={self.shipment_id}, '{self.from_status.value}' -> '{self.to_status.value}')>"
@@ -0,0 +1,13 @@
+from sqlalchemy import DateTime
+from sqlalchemy.dialects import sqlite
+
+# SQLite has no native datetime type and compares these columns as text.
+# Server defaults (CURRENT_TIMESTAMP) store "YYYY-MM-DD HH:MM:SS", while SQLAlchemy's default
+# SQLite format appends ".ffffff". "...:03" and "...:03.000000" then compare unequal, which breaks
+# equality and range filters on timestamps (e.g. keyset pagination cursors on createdAt).
+# Storing Python-side values in the CURRENT_TIMESTAMP shape keeps both kinds of rows comparable.
+# Other backends use a regular timezone-aware DateTime.
+Timestamp = DateTime(timezone=True).with_variant(
+    sqlite.DATETIME(storage_format="%(year)04d-%(month)02d-%(day)02d %(hour)02d:%(minute)02d:%(second)02d"),
+    "sqlite",
+)
@@ -1,9 +1,10 @@
-from sqlalchemy import Column, Integer, String, Enum as SAEnum_ sqlalchemy_Enum, Boolean # Renamed Enum to avoid conflict
+from sqlalchemy import Column, Integer, String, Enum as sqlalchemy_Enum, Boolean # Renamed Enum to avoid conflict
 from sqlalchemy.orm import relationship
+import enum
 from ..database import Base
 
 # Changed class name to avoid conflict with pydantic Enum if used in the same file
-class UserRoleEnum(str, sqlalchemy_Enum):
+class UserRoleEnum(str, enum.Enum):
     ADMIN = "admin"
     MANAGER = "manager"
     CLIENT = "client"
@@ -18,6 +19,9 @@ class User(Base):
     role = Column(sqlalchemy_Enum(UserRoleEnum), nullable=False, default=UserRoleEnum.CLIENT) # Use the renamed Enum
     is_active = Column(Boolean, default=True)
 
+    # Login sessions (see models/refresh_token.py); removed together with the user
+    refresh_tokens = relationship("RefreshToken", back_populates="user", cascade="all, delete-orphan")
+
     # Add relationships here if needed, e.g., if a client user is linked to a client record
     # client_profile = relationship("Client", back_populates="user", uselist=False) # Example
 
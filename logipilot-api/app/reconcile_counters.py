@@ -0,0 +1,24 @@
+import logging
+
+from .database import SessionLocal
+from .crud import crud_counter
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# One-shot rebuild of the summary counters from the shipments/alerts/clients tables,
+# e.g. after data was loaded or edited outside the API:
+#   cd logipilot-api
+#   python -m app.reconcile_counters
+
+def main() -> None:
+    db = SessionLocal()
+    try:
+        counts = crud_counter.reconcile_counters(db)
+        for entity, buckets in counts.items():
+            logger.info(f"{entity}: {buckets}")
+    finally:
+        db.close()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,326 @@
+import pickle
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+from urllib.parse import parse_qsl, urlencode
+
+from .core.config import settings
+from .auth.principal_cache import principal_cache
+from .single_flight import SingleFlight
+
+# Response cache for the read-heavy GET routes.
+#
+# ResponseCacheMiddleware serves a stored 200 JSON response when the same route, query
+# (parameters in canonical order) and role was answered within the TTL. Each entry is
+# tagged with the tables the route reads; the crud create/update/delete functions call
+# invalidate() with the tables they wrote once they have committed. An invalidation
+# bumps the tag's version rather than deleting entries: an entry remembers the versions
+# its tags had when the request started, so a response computed before a write that
+# commits mid-request is never served afterwards.
+#
+# Backends: MemoryBackend (per process, the default) or SqliteBackend, a local file that
+# every worker on the host shares, so an invalidation in one worker applies to all.
+# Only requests whose bearer token is already in the principal cache are served from
+# here; the others go through the route (which authenticates and populates it).
+#
+# Misses are coalesced: identical requests (same key, so same role) that arrive while one
+# is running wait for its response instead of each running the route (app/single_flight.py).
+
+# (status, raw headers, body, tags, tag versions when the request started)
+Entry = Tuple[int, List[Tuple[bytes, bytes]], bytes, Tuple[str, ...], Tuple[int, ...]]
+
+# Per-request or per-connection headers that must not be replayed from the cache
+_UNCACHED_HEADERS = {b"set-cookie", b"date", b"server", b"x-cache"}
+
+
+class CacheStats:
+    FIELDS = ("hits", "misses", "stores", "evictions", "expirations", "invalidations", "stale", "coalesced")
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counts = dict.fromkeys(self.FIELDS, 0)
+
+    def add(self, field: str, n: int = 1) -> None:
+        with self._lock:
+            self._counts[field] += n
+
+    def snapshot(self) -> Dict[str, int]:
+        with self._lock:
+            return dict(self._counts)
+
+    def reset(self) -> None:
+        with self._lock:
+            self._counts = dict.fromkeys(self.FIELDS, 0)
+
+
+class MemoryBackend:
+    """LRU + TTL map in this process. set() returns how many entries it evicted."""
+
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, Tuple[float, Entry]]" = OrderedDict()
+        self._tag_versions: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Tuple[Optional[Entry], bool]:
+        """(entry, expired): the live entry, or None and whether an expired one was dropped."""
+        with self._lock:
+            item = self._entries.get(key)
+            if item is None:
+                return None, False
+            if item[0] <= time.monotonic():
+                del self._entries[key]
+                return None, True
+            self._entries.move_to_end(key)
+            return item[1], False
+
+    def set(self, key: str, entry: Entry, ttl: float) -> int:
+        evicted = 0
+        with self._lock:
+            self._entries[key] = (time.monotonic() + ttl, entry)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                evicted += 1
+        return evicted
+
+    def delete(self, key: str) -> None:
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def tag_versions(self, tags: Sequence[str]) -> Tuple[int, ...]:
+        with self._lock:
+            return tuple(self._tag_versions.get(tag, 0) for tag in tags)
+
+    def bump_tags(self, tags: Sequence[str]) -> None:
+        with self._lock:
+            for tag in tags:
+                self._tag_versions[tag] = self._tag_versions.get(tag, 0) + 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+class SqliteBackend:
+    """
+    The same interface over a local SQLite file, shared by the workers of one host.
+    Times are wall-clock so every process agrees on expiry.
+    """
+
+    def __init__(self, path: str, max_entries: int):
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, timeout=5, isolation_level=None, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=OFF") # A cache: losing the tail on a crash is fine
+        self._db.execute("CREATE TABLE IF NOT EXISTS entries (key TEXT PRIMARY KEY, value BLOB NOT NULL, expires_at REAL NOT NULL, used_at REAL NOT NULL)")
+        self._db.execute("CREATE INDEX IF NOT EXISTS ix_entries_used_at ON entries (used_at)")
+        self._db.execute("CREATE TABLE IF NOT EXISTS tag_versions (tag TEXT PRIMARY KEY, version INTEGER NOT NULL)")
+
+    def get(self, key: str) -> Tuple[Optional[Entry], bool]:
+        now = time.time()
+        with self._lock:
+            row = self._db.execute("SELECT value, expires_at FROM entries WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                return None, False
+            if row[1] <= now:
+                self._db.execute("DELETE FROM entries WHERE key = ?", (key,))
+                return None, True
+            self._db.execute("UPDATE entries SET used_at = ? WHERE key = ?", (now, key))
+        return pickle.loads(row[0]), False
+
+    def set(self, key: str, entry: Entry, ttl: float) -> int:
+        now = time.time()
+        value = pickle.dumps(entry, protocol=pickle.HIGHEST_PROTOCOL)
+        with self._lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO entries (key, value, expires_at, used_at) VALUES (?, ?, ?, ?)",
+                (key, value, now + ttl, now),
+            )
+            excess = self._db.execute("SELECT COUNT(*) FROM entries").fetchone()[0] - self.max_entries
+            if excess > 0:
+                self._db.execute("DELETE FROM entries WHERE key IN (SELECT key FROM entries ORDER BY used_at LIMIT ?)", (excess,))
+        return max(excess, 0)
+
+    def delete(self, key: str) -> None:
+        with self._lock:
+            self._db.execute("DELETE FROM entries WHERE key = ?", (key,))
+
+    def tag_versions(self, tags: Sequence[str]) -> Tuple[int, ...]:
+        with self._lock:
+            rows = dict(self._db.execute(
+                f"SELECT tag, version FROM tag_versions WHERE tag IN ({', '.join('?' * len(tags))})", tuple(tags)
+            ).fetchall())
+        return tuple(rows.get(tag, 0) for tag in tags)
+
+    def bump_tags(self, tags: Sequence[str]) -> None:
+        with self._lock:
+            self._db.executemany(
+                "INSERT INTO tag_versions (tag, version) VALUES (?, 1) ON CONFLICT (tag) DO UPDATE SET version = version + 1",
+                [(tag,) for tag in tags],
+            )
+
+    def clear(self) -> None:
+        with self._lock:
+            self._db.execute("DELETE FROM entries")
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._db.execute("SELECT COUNT(*) FROM entries").fetchone()[0]
+
+
+class ResponseCache:
+    def __init__(self, backend, ttl_seconds: float, max_body_bytes: int):
+        self.backend = backend
+        self.ttl_seconds = ttl_seconds
+        self.max_body_bytes = max_body_bytes
+        self.stats = CacheStats()
+
+    @property
+    def enabled(self) -> bool:
+        return self.ttl_seconds > 0 and self.backend.max_entries > 0
+
+    @staticmethod
+    def key(path: str, query_string: bytes, role: str) -> str:
+        query = urlencode(sorted(parse_qsl(query_string.decode("latin-1"), keep_blank_values=True)))
+        return f"{role}|{path}?{query}"
+
+    def get(self, key: str) -> Optional[Entry]:
+        entry, expired = self.backend.get(key)
+        if expired:
+            self.stats.add("expirations")
+        if entry is not None and self.backend.tag_versions(entry[3]) != entry[4]:
+            # A table it was built from has been written since
+            self.backend.delete(key)
+            self.stats.add("stale")
+            entry = None
+        self.stats.add("hits" if entry is not None else "misses")
+        return entry
+
+    def set(self, key: str, entry: Entry) -> None:
+        self.stats.add("evictions", self.backend.set(key, entry, self.ttl_seconds))
+        self.stats.add("stores")
+
+    def invalidate(self, *tags: str) -> None:
+        """Called by the crud writes, after commit, with the tables they changed."""
+        # Also with the cache off: coalesced requests compare tag versions too
+        if tags:
+            self.backend.bump_tags(tags)
+            self.stats.add("invalidations")
+
+    def clear(self) -> None:
+        self.backend.clear()
+
+
+def _make_backend():
+    if settings.RESPONSE_CACHE_BACKEND == "sqlite":
+        return SqliteBackend(settings.RESPONSE_CACHE_SQLITE_PATH, settings.RESPONSE_CACHE_MAX_ENTRIES)
+    return MemoryBackend(settings.RESPONSE_CACHE_MAX_ENTRIES)
+
+
+# Process-wide cache used by the middleware and invalidated by the crud writes
+response_cache = ResponseCache(
+    _make_backend(),
+    ttl_seconds=settings.RESPONSE_CACHE_TTL_SECONDS,
+    max_body_bytes=settings.RESPONSE_CACHE_MAX_BODY_BYTES,
+)
+
+# In-flight GETs shared by identical concurrent requests
+request_flights = SingleFlight(enabled=settings.RESPONSE_COALESCING)
+
+
+def _header(headers: Sequence[Tuple[bytes, bytes]], name: bytes) -> Optional[bytes]:
+    for key, value in headers:
+        if key.lower() == name:
+            return value
+    return None
+
+
+class ResponseCacheMiddleware:
+    """
+    ASGI middleware caching and coalescing GET responses under the path prefixes in
+    `routes` (prefix -> tags, i.e. the tables the routes below it read).
+    """
+
+    def __init__(self, app, routes: Dict[str, Tuple[str, ...]], cache: ResponseCache = response_cache, flights: SingleFlight = request_flights):
+        self.app = app
+        self.routes = routes
+        self.cache = cache
+        self.flights = flights
+
+    def _tags_for(self, path: str) -> Optional[Tuple[str, ...]]:
+        for prefix, tags in self.routes.items():
+            if path == prefix or path.startswith(prefix.rstrip("/") + "/"):
+                return tags
+        return None
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["method"] != "GET" or not (self.cache.enabled or self.flights.enabled):
+            return await self.app(scope, receive, send)
+        tags = self._tags_for(scope["path"])
+        authorization = _header(scope["headers"], b"authorization")
+        scheme, _, token = (authorization or b"").decode("latin-1").partition(" ")
+        principal = principal_cache.get(token) if tags is not None and scheme.lower() == "bearer" and token else None
+        if principal is None or not principal.is_active:
+            return await self.app(scope, receive, send)
+
+        key = self.cache.key(scope["path"], scope["query_string"], principal.role.value)
+        entry = self.cache.get(key) if self.cache.enabled else None
+        if entry is not None:
+            return await self._send_cached(scope, send, entry, b"HIT")
+
+        versions = self.cache.backend.tag_versions(tags) # Before the route reads anything
+        entry, shared = await self.flights.run(key, versions, lambda settle: self._run_and_capture(scope, receive, send, key, tags, versions, settle))
+        if shared:
+            if entry is None:
+                # The leader's response couldn't be shared (not a complete 200, or it failed)
+                return await self.app(scope, receive, send)
+            self.cache.stats.add("coalesced")
+            await self._send_cached(scope, send, entry, b"SHARED")
+
+    async def _run_and_capture(self, scope, receive, send, key: str, tags: Tuple[str, ...], versions: Tuple[int, ...], settle: Callable[[Optional[Entry]], None]) -> Optional[Entry]:
+        """
+        Runs the route, stores a cacheable response and returns it for coalesced requests.
+        Waiting callers are released (settle) at the first body message: with the complete
+        response, or with None for anything else so they run the route themselves.
+        """
+        captured: List[Entry] = []
+        start: dict = {}
+        streamed = False
+
+        async def send_and_capture(message):
+            nonlocal streamed
+            if message["type"] == "http.response.start":
+                start.update(message)
+                message = {**message, "headers": [*message.get("headers", []), (b"x-cache", b"MISS")]}
+            elif message["type"] == "http.response.body" and start["status"] == 200 and not streamed:
+                streamed = message.get("more_body", False)
+                if not streamed: # The whole body in one message: shareable, and cacheable if JSON and small enough
+                    headers = [(k, v) for k, v in start.get("headers", []) if k.lower() not in _UNCACHED_HEADERS]
+                    captured.append((200, headers, message.get("body", b""), tags, versions))
+                    content_type = _header(headers, b"content-type") or b""
+                    if self.cache.enabled and content_type.startswith(b"application/json") and len(captured[0][2]) <= self.cache.max_body_bytes:
+                        self.cache.set(key, captured[0])
+            if message["type"] == "http.response.body":
+                settle(captured[0] if captured else None)
+            await send(message)
+
+        await self.app(scope, receive, send_and_capture)
+        return captured[0] if captured else None
+
+    async def _send_cached(self, scope, send, entry: Entry, source: bytes):
+        status, headers, body, _, _ = entry
+        etag = _header(headers, b"etag")
+        if_none_match = _header(scope["headers"], b"if-none-match")
+        if etag is not None and if_none_match is not None and etag in [tag.strip().removeprefix(b"W/") for tag in if_none_match.split(b",")]:
+            await send({"type": "http.response.start", "status": 304, "headers": [(b"etag", etag), (b"x-cache", source)]})
+            await send({"type": "http.response.body", "body": b""})
+            return
+        await send({"type": "http.response.start", "status": status, "headers": [*headers, (b"x-cache", source)]})
+        await send({"type": "http.response.body", "body": body})
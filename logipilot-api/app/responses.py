@@ -0,0 +1,23 @@
+from typing import Dict, Optional
+
+from fastapi import Response
+from pydantic import BaseModel
+
+# JSON responses rendered by pydantic-core's serializer.
+#
+# Routes with a response_model already get this from FastAPI: the route's pre-built
+# adapter validates the returned value once and dumps it straight to JSON bytes. That
+# fast path only applies while the route keeps the default response class, so the app
+# doesn't swap in an orjson-style default; instead the responses built by hand (the
+# error envelopes in main.py, ?fields= shaped rows) use the same serializer through
+# envelope_response rather than model_dump() + json.dumps.
+
+
+def envelope_response(envelope: BaseModel, status_code: int = 200, headers: Optional[Dict[str, str]] = None, exclude_none: bool = False) -> Response:
+    """The envelope (StandardResponse, PaginatedResponse, ...) as JSON, in one serializer pass."""
+    return Response(
+        content=envelope.model_dump_json(exclude_none=exclude_none),
+        status_code=status_code,
+        headers=headers,
+        media_type="application/json",
+    )
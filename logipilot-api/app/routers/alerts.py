@@ -1,77 +1,262 @@
-from fastapi import APIRouter, Depends, HTTPException, status, Query
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Request, Response, Header, WebSocket
+from fastapi.responses import StreamingResponse
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List, Optional
 
 from .. import crud, schemas, models
-from ..database import get_db
-from ..auth.jwt import get_current_active_user, require_admin, require_admin_or_manager
+from ..database import get_db, AsyncSessionLocal
+from ..auth.jwt import get_current_active_user, get_current_user_from_token, require_admin, require_admin_or_manager
 from ..models.user import User as DBUser
 from ..schemas.alert import AlertCreate, AlertPublic, AlertUpdate, AlertSeverity
-from ..schemas.response import StandardResponse # Import standard response
+from ..schemas.response import StandardResponse, PaginatedResponse, BatchResult, BatchFetchRequest, BulkResult, BulkItemResult # Import standard response
+from ..core.config import settings
+from ..crud import pagination
+from ..fieldsets import Fieldset, fieldset_query, shape, shaped_response, source_tables
+from .. import etags
+from ..crud.bulk import parse_id_list, unique_ids, split_found
+from ..export import ExportFormat, export_response
+from ..crud.errors import ForeignKeyViolation
+from ..alert_stream import alert_broker, sse_events, websocket_events
+import asyncio
 
 router = APIRouter(
     prefix="/alerts",
     tags=["Alerts"],
 )
 
+# ?fields= and ?include= on the read endpoints
+alert_fieldset = fieldset_query(crud.crud_alert.ALERT_FIELDS)
+
 @router.post("/", response_model=StandardResponse[schemas.alert.AlertPublic], status_code=status.HTTP_201_CREATED)
 async def create_new_alert(
     alert_in: schemas.alert.AlertCreate,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     current_user: DBUser = Depends(require_admin_or_manager)
 ):
-    new_alert = crud.crud_alert.create_alert(db=db, alert=alert_in)
-    if not new_alert:
+    try:
+        new_alert = await crud.crud_alert.create_alert_async(db=db, alert=alert_in)
+    except ForeignKeyViolation:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail=f"Shipment with id {alert_in.shipment_id} not found. Cannot create alert.",
         )
     return StandardResponse(data=new_alert)
 
-@router.get("/", response_model=StandardResponse[List[schemas.alert.AlertPublic]])
+@router.post("/bulk", response_model=StandardResponse[BulkResult[schemas.alert.AlertPublic]])
+async def create_alerts_bulk(
+    alerts_in: List[schemas.alert.AlertCreate],
+    db: AsyncSession = Depends(get_db),
+    current_user: DBUser = Depends(require_admin_or_manager)
+):
+    """
+    Create many alerts in one transaction. Items referencing a missing shipment are
+    reported as failed in `items` (by request index); the rest are created.
+    """
+    if len(alerts_in) > settings.BULK_CREATE_MAX_ITEMS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"At most {settings.BULK_CREATE_MAX_ITEMS} alerts can be created per request.",
+        )
+    try:
+        created = await crud.crud_alert.create_alerts_bulk_async(db, alerts=alerts_in)
+    except ForeignKeyViolation:
+        # A shipment passed the existence check but was deleted before the INSERT
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="A referenced shipment was deleted while the alerts were being created. Nothing was created; retry the request.",
+        )
+    items = [
+        BulkItemResult(index=i, ok=True, data=db_alert) if db_alert is not None
+        else BulkItemResult(index=i, ok=False, error=f"Shipment with id {item.shipment_id} not found.")
+        for i, (item, db_alert) in enumerate(zip(alerts_in, created))
+    ]
+    n_created = sum(1 for db_alert in created if db_alert is not None)
+    return StandardResponse(data=BulkResult(created=n_created, failed=len(items) - n_created, items=items))
+
+@router.get("/", response_model=PaginatedResponse[List[schemas.alert.AlertPublic]])
 async def read_alerts_list(
+    request: Request,
+    response: Response,
     skip: int = Query(0, ge=0),
     limit: int = Query(10, ge=1, le=100),
     shipment_id: Optional[int] = Query(None, description="Filter alerts by shipment ID"),
     severity: Optional[AlertSeverity] = Query(None, description="Filter alerts by severity"),
-    db: Session = Depends(get_db),
+    after: Optional[str] = Query(None, description="Cursor from page.next_cursor; returns the rows after it"),
+    before: Optional[str] = Query(None, description="Cursor from page.prev_cursor; returns the rows before it"),
+    include_total: bool = Query(False, description="Also return page.total (served from a count cache; see page.total_exact)"),
+    fieldset: Optional[Fieldset] = Depends(alert_fieldset),
+    db: AsyncSession = Depends(get_db),
+    current_user: DBUser = Depends(get_current_active_user)
+):
+    # Answered from the change generations alone when the client's copy is current
+    etag = await etags.resource_etag(db, request, source_tables(crud.crud_alert.ALERT_FIELDS, fieldset))
+    if etags.matches(request, etag):
+        return etags.not_modified(etag)
+    try:
+        after_key, before_key = pagination.decode_page_cursors(after, before, crud.crud_alert.ALERT_CURSOR_KINDS)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    # One extra row tells us whether another page exists without a COUNT query
+    alerts = await crud.crud_alert.get_alerts_async(db, skip=skip, limit=limit + 1, shipment_id=shipment_id, severity=severity, after=after_key, before=before_key, fieldset=fieldset)
+    alerts, page = pagination.make_page(alerts, limit, crud.crud_alert.alert_cursor_key, after=after_key, before=before_key)
+    if include_total:
+        page.total, page.total_exact = await crud.crud_alert.get_alerts_total_async(db, shipment_id=shipment_id, severity=severity)
+    if fieldset is not None:
+        return shaped_response(PaginatedResponse(data=[shape(crud.crud_alert.ALERT_FIELDS, fieldset, alert) for alert in alerts], page=page), headers={"ETag": etag})
+    response.headers["ETag"] = etag
+    return PaginatedResponse(data=alerts, page=page)
+
+@router.get("/batch", response_model=StandardResponse[BatchResult[schemas.alert.AlertPublic]])
+async def read_alerts_batch(
+    ids: str = Query(..., description="Comma-separated alert ids, e.g. 1,2,3"),
+    fieldset: Optional[Fieldset] = Depends(alert_fieldset),
+    db: AsyncSession = Depends(get_db),
+    current_user: DBUser = Depends(get_current_active_user)
+):
+    """
+    Fetch specific alerts in one query. `items` follows the order of `ids` (duplicates
+    removed); ids that don't exist are listed in `missing`. Use POST /alerts/batch for long lists.
+    """
+    try:
+        alert_ids = parse_id_list(ids, settings.BATCH_FETCH_MAX_IDS)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    return await _batch_alerts(db, alert_ids, fieldset)
+
+@router.post("/batch", response_model=StandardResponse[BatchResult[schemas.alert.AlertPublic]])
+async def read_alerts_batch_post(
+    batch_in: BatchFetchRequest,
+    fieldset: Optional[Fieldset] = Depends(alert_fieldset),
+    db: AsyncSession = Depends(get_db),
     current_user: DBUser = Depends(get_current_active_user)
 ):
-    alerts = crud.crud_alert.get_alerts(db, skip=skip, limit=limit, shipment_id=shipment_id, severity=severity)
-    return StandardResponse(data=alerts)
+    """Same as GET /alerts/batch, with the ids in the body."""
+    try:
+        alert_ids = unique_ids(batch_in.ids, settings.BATCH_FETCH_MAX_IDS)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    return await _batch_alerts(db, alert_ids, fieldset)
+
+async def _batch_alerts(db: AsyncSession, alert_ids: List[int], fieldset: Optional[Fieldset]):
+    alerts = await crud.crud_alert.get_alerts_by_ids_async(db, alert_ids, fieldset=fieldset)
+    found, missing = split_found(alert_ids, alerts)
+    if fieldset is not None:
+        items = [shape(crud.crud_alert.ALERT_FIELDS, fieldset, alert) for alert in found]
+        return shaped_response(StandardResponse(data=BatchResult(items=items, missing=missing)))
+    return StandardResponse(data=BatchResult(items=found, missing=missing))
+
+@router.get("/export", response_class=StreamingResponse)
+async def export_alerts(
+    export_format: ExportFormat = Query(ExportFormat.NDJSON, alias="format", description="ndjson (one JSON object per line) or csv"),
+    shipment_id: Optional[int] = Query(None, description="Filter alerts by shipment ID"),
+    severity: Optional[AlertSeverity] = Query(None, description="Filter alerts by severity"),
+    current_user: DBUser = Depends(get_current_active_user)
+):
+    """
+    Stream every matching alert (no paging), in the same order as the list endpoint.
+    """
+    statement = crud.crud_alert.export_alerts_statement(shipment_id=shipment_id, severity=severity)
+    return export_response(statement, schemas.alert.AlertPublic, export_format, csv_columns=["id", "shipment_id", "severity", "message", "createdAt"], filename="alerts")
+
+@router.get("/stream", response_class=StreamingResponse)
+async def stream_alerts(
+    severity: Optional[List[AlertSeverity]] = Query(None, description="Only these severities (repeat the parameter for several)"),
+    shipment_id: Optional[int] = Query(None, description="Only alerts of this shipment"),
+    last_event_id: Optional[str] = Header(None, description="Resume after this event id (sent by EventSource on reconnect)"),
+    db: AsyncSession = Depends(get_db),
+    current_user: DBUser = Depends(get_current_active_user)
+):
+    """
+    Server-Sent Events stream of alert changes: `alert.created`, `alert.updated` and
+    `alert.deleted`, each with the AlertPublic as data. Idle streams get a `: ping` comment
+    every ALERT_STREAM_HEARTBEAT_SECONDS. A `reset` event means events were missed (slow
+    reader, or a Last-Event-ID that can't be resumed): re-fetch GET /alerts.
+    """
+    subscription = alert_broker.subscribe(
+        severities=[s.value for s in severity or ()], shipment_id=shipment_id, last_event_id=last_event_id
+    )
+    # The stream can stay open for hours; don't keep the request's session (and a connection) with it
+    await db.close()
+    return StreamingResponse(
+        sse_events(alert_broker, subscription, settings.ALERT_STREAM_HEARTBEAT_SECONDS),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+@router.websocket("/ws")
+async def alerts_websocket(
+    websocket: WebSocket,
+    severity: Optional[List[AlertSeverity]] = Query(None),
+    shipment_id: Optional[int] = Query(None),
+    last_event_id: Optional[str] = Query(None),
+):
+    """
+    WebSocket equivalent of GET /alerts/stream: one JSON text frame per event
+    ({"id", "event", "data"}) and {"event": "ping"} heartbeats. Browsers can't set headers
+    on a WebSocket, so without an Authorization header the first frame must be
+    {"token": "<access token>"}; the socket is closed with 1008 if it isn't valid.
+    """
+    await websocket.accept()
+    scheme, _, token = (websocket.headers.get("authorization") or "").partition(" ")
+    try:
+        if scheme.lower() != "bearer" or not token:
+            token = (await asyncio.wait_for(websocket.receive_json(), timeout=10)).get("token") or ""
+        async with AsyncSessionLocal() as db:
+            current_user = await get_current_user_from_token(token=token, db=db)
+    except Exception:
+        await websocket.close(code=status.WS_1008_POLICY_VIOLATION)
+        return
+    if not current_user.is_active:
+        await websocket.close(code=status.WS_1008_POLICY_VIOLATION)
+        return
+    subscription = alert_broker.subscribe(
+        severities=[s.value for s in severity or ()], shipment_id=shipment_id, last_event_id=last_event_id
+    )
+    await websocket_events(websocket, alert_broker, subscription, settings.ALERT_STREAM_HEARTBEAT_SECONDS)
 
 @router.get("/{alert_id}", response_model=StandardResponse[schemas.alert.AlertPublic])
 async def read_alert_by_id(
     alert_id: int,
-    db: Session = Depends(get_db),
+    request: Request,
+    response: Response,
+    fieldset: Optional[Fieldset] = Depends(alert_fieldset),
+    db: AsyncSession = Depends(get_db),
     current_user: DBUser = Depends(get_current_active_user)
 ):
-    db_alert = crud.crud_alert.get_alert(db, alert_id=alert_id)
+    # The row's version covers its own changes; embedded relations add their tables' generations
+    version = await crud.crud_alert.get_alert_version_async(db, alert_id=alert_id)
+    if version is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Alert not found")
+    etag = await etags.resource_etag(db, request, source_tables(crud.crud_alert.ALERT_FIELDS, fieldset)[1:], version=version)
+    if etags.matches(request, etag):
+        return etags.not_modified(etag)
+    db_alert = await crud.crud_alert.get_alert_async(db, alert_id=alert_id, fieldset=fieldset)
     if not db_alert:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Alert not found")
+    if fieldset is not None:
+        return shaped_response(StandardResponse(data=shape(crud.crud_alert.ALERT_FIELDS, fieldset, db_alert)), headers={"ETag": etag})
+    response.headers["ETag"] = etag
     return StandardResponse(data=db_alert)
 
 @router.put("/{alert_id}", response_model=StandardResponse[schemas.alert.AlertPublic])
 async def update_existing_alert(
     alert_id: int,
     alert_in: schemas.alert.AlertUpdate,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     current_user: DBUser = Depends(require_admin_or_manager)
 ):
-    db_alert = crud.crud_alert.get_alert(db, alert_id=alert_id)
-    if not db_alert:
+    updated_alert = await crud.crud_alert.update_alert_async(db=db, alert_id=alert_id, alert_in=alert_in)
+    if not updated_alert:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Alert not found")
-
-    updated_alert = crud.crud_alert.update_alert(db=db, db_alert=db_alert, alert_in=alert_in)
     return StandardResponse(data=updated_alert)
 
 @router.delete("/{alert_id}", response_model=StandardResponse[schemas.alert.AlertPublic])
 async def delete_existing_alert(
     alert_id: int,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     current_user: DBUser = Depends(require_admin)
 ):
-    deleted_alert = crud.crud_alert.delete_alert(db, alert_id=alert_id)
+    deleted_alert = await crud.crud_alert.delete_alert_async(db, alert_id=alert_id)
     if not deleted_alert:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Alert not found")
     return StandardResponse(data=deleted_alert)
@@ -0,0 +1,33 @@
+from fastapi import APIRouter, Depends, Query
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import Optional
+
+from .. import crud
+from ..database import get_db
+from ..auth.jwt import get_current_active_user
+from ..models.user import User as DBUser
+from ..schemas.analytics import LaneTransitReport, LaneTransitStats
+from ..schemas.response import StandardResponse
+
+router = APIRouter(
+    prefix="/analytics",
+    tags=["Analytics"],
+)
+
+@router.get("/lanes", response_model=StandardResponse[LaneTransitReport])
+async def read_lane_stats(
+    origin: Optional[str] = Query(None, description="Only lanes leaving from this origin"),
+    destination: Optional[str] = Query(None, description="Only lanes arriving at this destination"),
+    min_deliveries: int = Query(1, ge=1, description="Leave out lanes with fewer deliveries (their percentiles say little)"),
+    db: AsyncSession = Depends(get_db),
+    current_user: DBUser = Depends(get_current_active_user)
+):
+    """
+    Transit-time statistics per lane (origin -> destination), busiest lanes first. Served
+    from an in-process cache that reads only the deliveries recorded since the previous
+    request (see app/crud/lane_stats.py).
+    """
+    stats = await crud.lane_stats.get_lane_stats_async(db, origin=origin, destination=destination)
+    lanes = [LaneTransitStats.model_validate(stat) for stat in stats if stat["deliveries"] >= min_deliveries]
+    lanes.sort(key=lambda lane: (-lane.deliveries, lane.origin, lane.destination))
+    return StandardResponse(data=LaneTransitReport(lanes=lanes, deliveries=sum(lane.deliveries for lane in lanes)))
@@ -1,6 +1,6 @@
 from fastapi import APIRouter, Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordRequestForm
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 
 from .. import crud, schemas # schemas.user, schemas.auth (if any)
 from ..core.config import settings
@@ -8,7 +8,7 @@ from ..database import get_db
 from ..auth import jwt as jwt_auth
 from ..auth import security
 from ..models.user import User as DBUser
-from ..schemas.user import UserPublic, TokenResponse # Use the new name TokenResponse
+from ..schemas.user import UserPublic, TokenResponse, RefreshTokenRequest # Use the new name TokenResponse
 from ..schemas.response import StandardResponse
 
 router = APIRouter(
@@ -18,11 +18,22 @@ router = APIRouter(
 
 @router.post("/login", response_model=StandardResponse[TokenResponse]) # Use TokenResponse
 async def login_for_access_token(
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     form_data: OAuth2PasswordRequestForm = Depends()
 ):
-    user = crud.crud_user.get_user_by_email(db, email=form_data.username)
-    if not user or not security.verify_password(form_data.password, user.hashed_password):
+    user = await crud.crud_user.get_user_by_email_async(db, email=form_data.username)
+    # Return the pooled connection before waiting on bcrypt; the loaded user stays usable after close()
+    await db.close()
+    try:
+        # bcrypt runs in the bounded hashing pool so the event loop keeps serving other requests
+        password_ok = user is not None and await security.verify_password_async(form_data.password, user.hashed_password)
+    except security.PasswordHashingBusy:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Too many concurrent login attempts. Please retry shortly.",
+            headers={"Retry-After": "1"},
+        )
+    if not password_ok:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect email or password",
@@ -33,21 +44,39 @@ async def login_for_access_token(
     access_token_str = jwt_auth.create_access_token(
         data={"sub": user.email, "role": user.role.value}
     )
+    refresh_token_str = await jwt_auth.create_refresh_token(db, user=user)
 
-    user_public_data = UserPublic.from_orm(user)
+    user_public_data = UserPublic.model_validate(user)
 
     token_data_for_response = TokenResponse( # Use TokenResponse here
         access_token=access_token_str,
         token_type="bearer",
-        user=user_public_data
+        user=user_public_data,
+        refresh_token=refresh_token_str
     )
 
     return StandardResponse(data=token_data_for_response)
 
-# Example: Token refresh endpoint (optional)
-# @router.post("/token/refresh")
-# async def refresh_token(...):
-#     ...
+@router.post("/refresh", response_model=StandardResponse[TokenResponse])
+async def refresh_access_token(
+    refresh_in: RefreshTokenRequest,
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    Exchange a refresh token for a new access token and a rotated refresh token.
+    No password check, so no bcrypt: one indexed lookup plus one update.
+    """
+    user, new_refresh_token = await jwt_auth.rotate_refresh_token(db, refresh_token=refresh_in.refresh_token)
+
+    access_token_str = jwt_auth.create_access_token(
+        data={"sub": user.email, "role": user.role.value}
+    )
+    return StandardResponse(data=TokenResponse(
+        access_token=access_token_str,
+        token_type="bearer",
+        user=UserPublic.model_validate(user),
+        refresh_token=new_refresh_token
+    ))
 
 # Example: Password recovery / reset endpoints (optional)
 # @router.post("/password-recovery/{email}")
@@ -0,0 +1,46 @@
+from fastapi import APIRouter, Depends, HTTPException, status, Query
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import Optional
+
+from .. import crud
+from ..database import get_db
+from ..auth.jwt import get_current_active_user
+from ..models.user import User as DBUser
+from ..schemas.change import ChangeEntity, ChangeFeed
+from ..schemas.response import StandardResponse
+
+router = APIRouter(
+    prefix="/changes",
+    tags=["Changes"],
+)
+
+@router.get("", response_model=StandardResponse[ChangeFeed])
+async def read_changes(
+    since: Optional[int] = Query(None, ge=0, description="Return the entries after this seq (next_since of the previous call). Omit to get the current position only"),
+    limit: int = Query(100, ge=1, le=1000),
+    entity: Optional[ChangeEntity] = Query(None, description="Only changes to this table"),
+    db: AsyncSession = Depends(get_db),
+    current_user: DBUser = Depends(get_current_active_user)
+):
+    """
+    Incremental sync for mirrors of clients, shipments and alerts: the committed writes
+    after `since`, oldest first. Apply `create` entries as upserts and `update` entries
+    as patches. To start a mirror, call without `since`, load the data from the /export
+    endpoints, then follow the feed from the returned `next_since`. A 410 means entries
+    after `since` were already pruned: start over the same way.
+    """
+    latest, pruned = await crud.crud_change.get_feed_bounds_async(db)
+    if since is None:
+        return StandardResponse(data=ChangeFeed(changes=[], next_since=latest, has_more=False, latest_seq=latest))
+    if since < pruned:
+        raise HTTPException(
+            status_code=status.HTTP_410_GONE,
+            detail=f"Changes up to seq {pruned} have been pruned. Re-sync from the /export endpoints.",
+        )
+    # One extra row tells us whether more entries follow
+    changes = await crud.crud_change.get_changes_async(db, since=since, limit=limit + 1, entity=entity.value if entity else None)
+    has_more = len(changes) > limit
+    changes = changes[:limit]
+    # With nothing after `since`, every entry up to `latest` (read first) was skipped by the filter
+    next_since = changes[-1].seq if changes else max(since, latest)
+    return StandardResponse(data=ChangeFeed(changes=changes, next_since=next_since, has_more=has_more, latest_seq=latest))
@@ -1,5 +1,6 @@
-from fastapi import APIRouter, Depends, HTTPException, status, Query
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Request, Response
+from fastapi.responses import StreamingResponse
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List, Optional
 
 from .. import crud, schemas, models
@@ -7,76 +8,181 @@ from ..database import get_db
 from ..auth.jwt import get_current_active_user, require_admin, require_admin_or_manager
 from ..models.user import User as DBUser
 from ..schemas.client import ClientCreate, ClientPublic, ClientUpdate, ClientStatus
-from ..schemas.response import StandardResponse # Import standard response
+from ..schemas.response import StandardResponse, PaginatedResponse, BatchResult, BatchFetchRequest # Import standard response
+from ..core.config import settings
+from ..crud import pagination
+from ..fieldsets import Fieldset, fieldset_query, shape, shaped_response, source_tables
+from .. import etags
+from ..crud.bulk import parse_id_list, unique_ids, split_found
+from ..export import ExportFormat, export_response
+from ..crud.errors import UniqueViolation
 
 router = APIRouter(
     prefix="/clients",
     tags=["Clients"],
 )
 
+# ?fields= and ?include= on the read endpoints
+client_fieldset = fieldset_query(crud.crud_client.CLIENT_FIELDS)
+
 @router.post("/", response_model=StandardResponse[schemas.client.ClientPublic], status_code=status.HTTP_201_CREATED)
 async def create_new_client(
     client_in: schemas.client.ClientCreate,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     current_user: DBUser = Depends(require_admin_or_manager)
 ):
-    existing_client = crud.crud_client.get_client_by_email(db, email=client_in.email)
-    if existing_client:
+    try:
+        new_client = await crud.crud_client.create_client_async(db=db, client=client_in)
+    except UniqueViolation: # The email column is unique
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail=f"Client with email '{client_in.email}' already exists.",
         )
-    new_client = crud.crud_client.create_client(db=db, client=client_in)
     return StandardResponse(data=new_client)
 
-@router.get("/", response_model=StandardResponse[List[schemas.client.ClientPublic]])
+@router.get("/", response_model=PaginatedResponse[List[schemas.client.ClientPublic]])
 async def read_clients_list(
+    request: Request,
+    response: Response,
     skip: int = Query(0, ge=0),
     limit: int = Query(10, ge=1, le=100),
     status: Optional[ClientStatus] = Query(None, description="Filter clients by status"),
-    db: Session = Depends(get_db),
+    after: Optional[str] = Query(None, description="Cursor from page.next_cursor; returns the rows after it"),
+    before: Optional[str] = Query(None, description="Cursor from page.prev_cursor; returns the rows before it"),
+    include_total: bool = Query(False, description="Also return page.total (served from a count cache; see page.total_exact)"),
+    fieldset: Optional[Fieldset] = Depends(client_fieldset),
+    db: AsyncSession = Depends(get_db),
+    current_user: DBUser = Depends(get_current_active_user)
+):
+    # Answered from the change generations alone when the client's copy is current
+    etag = await etags.resource_etag(db, request, source_tables(crud.crud_client.CLIENT_FIELDS, fieldset))
+    if etags.matches(request, etag):
+        return etags.not_modified(etag)
+    try:
+        after_key, before_key = pagination.decode_page_cursors(after, before, crud.crud_client.CLIENT_CURSOR_KINDS)
+    except ValueError as e:
+        # `status` is the query filter here, so use the literal code
+        raise HTTPException(status_code=400, detail=str(e))
+    # One extra row tells us whether another page exists without a COUNT query
+    clients = await crud.crud_client.get_clients_async(db, skip=skip, limit=limit + 1, status=status, after=after_key, before=before_key, fieldset=fieldset)
+    clients, page = pagination.make_page(clients, limit, crud.crud_client.client_cursor_key, after=after_key, before=before_key)
+    if include_total:
+        page.total, page.total_exact = await crud.crud_client.get_clients_total_async(db, status=status)
+    if fieldset is not None:
+        return shaped_response(PaginatedResponse(data=[shape(crud.crud_client.CLIENT_FIELDS, fieldset, client) for client in clients], page=page), headers={"ETag": etag})
+    response.headers["ETag"] = etag
+    return PaginatedResponse(data=clients, page=page)
+
+@router.get("/batch", response_model=StandardResponse[BatchResult[schemas.client.ClientPublic]])
+async def read_clients_batch(
+    ids: str = Query(..., description="Comma-separated client ids, e.g. 1,2,3"),
+    fieldset: Optional[Fieldset] = Depends(client_fieldset),
+    db: AsyncSession = Depends(get_db),
+    current_user: DBUser = Depends(get_current_active_user)
+):
+    """
+    Fetch specific clients in one query. `items` follows the order of `ids` (duplicates
+    removed); ids that don't exist are listed in `missing`. Use POST /clients/batch for long lists.
+    """
+    try:
+        client_ids = parse_id_list(ids, settings.BATCH_FETCH_MAX_IDS)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    return await _batch_clients(db, client_ids, fieldset)
+
+@router.post("/batch", response_model=StandardResponse[BatchResult[schemas.client.ClientPublic]])
+async def read_clients_batch_post(
+    batch_in: BatchFetchRequest,
+    fieldset: Optional[Fieldset] = Depends(client_fieldset),
+    db: AsyncSession = Depends(get_db),
     current_user: DBUser = Depends(get_current_active_user)
 ):
-    clients = crud.crud_client.get_clients(db, skip=skip, limit=limit, status=status)
-    return StandardResponse(data=clients)
+    """Same as GET /clients/batch, with the ids in the body."""
+    try:
+        client_ids = unique_ids(batch_in.ids, settings.BATCH_FETCH_MAX_IDS)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    return await _batch_clients(db, client_ids, fieldset)
+
+async def _batch_clients(db: AsyncSession, client_ids: List[int], fieldset: Optional[Fieldset]):
+    clients = await crud.crud_client.get_clients_by_ids_async(db, client_ids, fieldset=fieldset)
+    found, missing = split_found(client_ids, clients)
+    if fieldset is not None:
+        items = [shape(crud.crud_client.CLIENT_FIELDS, fieldset, client) for client in found]
+        return shaped_response(StandardResponse(data=BatchResult(items=items, missing=missing)))
+    return StandardResponse(data=BatchResult(items=found, missing=missing))
+
+@router.get("/suggest", response_model=StandardResponse[List[schemas.client.ClientSuggestion]])
+async def suggest_clients(
+    prefix: str = Query(..., min_length=1, max_length=100, description="Start of a client name or email (case-insensitive)"),
+    limit: int = Query(10, ge=1, le=50),
+    db: AsyncSession = Depends(get_db),
+    current_user: DBUser = Depends(get_current_active_user)
+):
+    """
+    Typeahead over client names and emails, served from an in-memory prefix index.
+    """
+    matches = await crud.client_suggest.suggest_clients_async(db, prefix=prefix, limit=limit)
+    return StandardResponse(data=[schemas.client.ClientSuggestion(id=id_, name=name, email=email) for id_, name, email in matches])
+
+@router.get("/export", response_class=StreamingResponse)
+async def export_clients(
+    export_format: ExportFormat = Query(ExportFormat.NDJSON, alias="format", description="ndjson (one JSON object per line) or csv"),
+    status: Optional[ClientStatus] = Query(None, description="Filter clients by status"),
+    current_user: DBUser = Depends(get_current_active_user)
+):
+    """
+    Stream every matching client (no paging), in the same order as the list endpoint.
+    """
+    statement = crud.crud_client.export_clients_statement(status=status)
+    return export_response(statement, schemas.client.ClientPublic, export_format, csv_columns=["id", "name", "email", "phone", "status", "createdAt"], filename="clients")
 
 @router.get("/{client_id}", response_model=StandardResponse[schemas.client.ClientPublic])
 async def read_client_by_id(
     client_id: int,
-    db: Session = Depends(get_db),
+    request: Request,
+    response: Response,
+    fieldset: Optional[Fieldset] = Depends(client_fieldset),
+    db: AsyncSession = Depends(get_db),
     current_user: DBUser = Depends(get_current_active_user)
 ):
-    db_client = crud.crud_client.get_client(db, client_id=client_id)
+    # The row's version covers its own changes; embedded relations add their tables' generations
+    version = await crud.crud_client.get_client_version_async(db, client_id=client_id)
+    if version is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Client not found")
+    etag = await etags.resource_etag(db, request, source_tables(crud.crud_client.CLIENT_FIELDS, fieldset)[1:], version=version)
+    if etags.matches(request, etag):
+        return etags.not_modified(etag)
+    db_client = await crud.crud_client.get_client_async(db, client_id=client_id, fieldset=fieldset)
     if not db_client:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Client not found")
+    if fieldset is not None:
+        return shaped_response(StandardResponse(data=shape(crud.crud_client.CLIENT_FIELDS, fieldset, db_client)), headers={"ETag": etag})
+    response.headers["ETag"] = etag
     return StandardResponse(data=db_client)
 
 @router.put("/{client_id}", response_model=StandardResponse[schemas.client.ClientPublic])
 async def update_existing_client(
     client_id: int,
     client_in: schemas.client.ClientUpdate,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     current_user: DBUser = Depends(require_admin_or_manager)
 ):
-    db_client = crud.crud_client.get_client(db, client_id=client_id)
-    if not db_client:
+    try:
+        updated_client = await crud.crud_client.update_client_async(db=db, client_id=client_id, client_in=client_in)
+    except UniqueViolation:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Email already registered by another client.")
+    if not updated_client:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Client not found")
-
-    if client_in.email and client_in.email != db_client.email:
-        existing_client_email = crud.crud_client.get_client_by_email(db, email=client_in.email)
-        if existing_client_email and existing_client_email.id != client_id:
-            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Email already registered by another client.")
-
-    updated_client = crud.crud_client.update_client(db=db, db_client=db_client, client_in=client_in)
     return StandardResponse(data=updated_client)
 
 @router.delete("/{client_id}", response_model=StandardResponse[schemas.client.ClientPublic])
 async def delete_existing_client(
     client_id: int,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     current_user: DBUser = Depends(require_admin)
 ):
-    deleted_client = crud.crud_client.delete_client(db, client_id=client_id)
+    deleted_client = await crud.crud_client.delete_client_async(db, client_id=client_id)
     if not deleted_client:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Client not found")
     return StandardResponse(data=deleted_client)
@@ -0,0 +1,32 @@
+from fastapi import APIRouter, Depends
+
+from ..auth.jwt import require_admin
+from ..models.user import User as DBUser
+from ..response_cache import response_cache, request_flights, SqliteBackend
+from ..schemas.metrics import ResponseCacheStats
+from ..schemas.response import StandardResponse
+
+router = APIRouter(
+    prefix="/metrics",
+    tags=["Metrics"],
+)
+
+@router.get("/response-cache", response_model=StandardResponse[ResponseCacheStats])
+async def read_response_cache_stats(
+    current_admin_user: DBUser = Depends(require_admin)
+):
+    """
+    Hit/miss/eviction/coalescing counters of the GET response cache since this process started. Admin only.
+    """
+    counts = response_cache.stats.snapshot()
+    lookups = counts["hits"] + counts["misses"]
+    return StandardResponse(data=ResponseCacheStats(
+        backend="sqlite" if isinstance(response_cache.backend, SqliteBackend) else "memory",
+        enabled=response_cache.enabled,
+        entries=len(response_cache.backend),
+        max_entries=response_cache.backend.max_entries,
+        ttl_seconds=response_cache.ttl_seconds,
+        in_flight=len(request_flights),
+        hit_ratio=round(counts["hits"] / lookups, 4) if lookups else 0.0,
+        **counts,
+    ))
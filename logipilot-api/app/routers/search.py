@@ -0,0 +1,46 @@
+from fastapi import APIRouter, Depends, Query
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import Any, List
+
+from .. import crud
+from ..database import get_db
+from ..auth.jwt import get_current_active_user
+from ..models.user import User as DBUser
+from ..schemas.search import SearchResultItem
+from ..schemas.response import StandardResponse
+
+router = APIRouter(
+    prefix="/search",
+    tags=["Search"],
+)
+
+def to_result_item(kind: str, row: Any) -> SearchResultItem:
+    # Same titles/links as the frontend mock's searchGlobal
+    if kind == "Shipment":
+        return SearchResultItem(
+            type=kind, id=str(row.id), title=f"Shipment: {row.id} - {row.client.name}",
+            description=f"From: {row.origin}, To: {row.destination}, Status: {row.status.value}", link=f"/shipments/{row.id}",
+        )
+    if kind == "Client":
+        return SearchResultItem(
+            type=kind, id=str(row.id), title=f"Client: {row.name} ({row.id})",
+            description=f"Email: {row.email}, Phone: {row.phone or 'N/A'}, Status: {row.status.value}", link=f"/clients/{row.id}",
+        )
+    return SearchResultItem(
+        type=kind, id=str(row.id), title=f"Alert: Shipment {row.shipment_id} ({row.severity.value})",
+        description=row.message, link=f"/alerts/{row.id}",
+    )
+
+@router.get("", response_model=StandardResponse[List[SearchResultItem]])
+async def global_search(
+    q: str = Query(..., min_length=1, max_length=200, description="Words to find; each matches the start of a word"),
+    limit: int = Query(20, ge=1, le=100),
+    db: AsyncSession = Depends(get_db),
+    current_user: DBUser = Depends(get_current_active_user)
+):
+    """
+    Search client name/email/phone, shipment origin/destination and alert messages.
+    Results are ranked by relevance (BM25 over the full-text index).
+    """
+    hits = await crud.crud_search.search_async(db, q=q, limit=limit)
+    return StandardResponse(data=[to_result_item(kind, row) for kind, row in hits])
@@ -1,5 +1,6 @@
-from fastapi import APIRouter, Depends, HTTPException, status, Query
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Request, Response
+from fastapi.responses import StreamingResponse
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List, Optional
 
 from .. import crud, schemas, models
@@ -8,76 +9,204 @@ from ..auth.jwt import get_current_active_user, require_admin, require_admin_or_
 from ..models.user import User as DBUser
 from ..schemas.shipment import ShipmentCreate, ShipmentPublic, ShipmentUpdate, ShipmentStatus
 from ..schemas.client import ClientPublic
-from ..schemas.response import StandardResponse # Import standard response
+from ..schemas.response import StandardResponse, PaginatedResponse, BatchResult, BatchFetchRequest, BulkResult, BulkItemResult # Import standard response
+from ..core.config import settings
+from ..crud import pagination
+from ..fieldsets import Fieldset, fieldset_query, shape, shaped_response, source_tables
+from .. import etags
+from ..crud.bulk import parse_id_list, unique_ids, split_found
+from ..export import ExportFormat, export_response
+from ..crud.errors import ForeignKeyViolation
 
 router = APIRouter(
     prefix="/shipments",
     tags=["Shipments"],
 )
 
+# ?fields= and ?include= on the read endpoints
+shipment_fieldset = fieldset_query(crud.crud_shipment.SHIPMENT_FIELDS)
+
 @router.post("/", response_model=StandardResponse[schemas.shipment.ShipmentPublic], status_code=status.HTTP_201_CREATED)
 async def create_new_shipment(
     shipment_in: schemas.shipment.ShipmentCreate,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     current_user: DBUser = Depends(require_admin_or_manager)
 ):
-    new_shipment = crud.crud_shipment.create_shipment(db=db, shipment=shipment_in)
-    if not new_shipment:
+    try:
+        new_shipment = await crud.crud_shipment.create_shipment_async(db=db, shipment=shipment_in)
+    except ForeignKeyViolation:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail=f"Client with id {shipment_in.client_id} not found. Cannot create shipment.",
         )
     return StandardResponse(data=new_shipment)
 
-@router.get("/", response_model=StandardResponse[List[schemas.shipment.ShipmentPublic]])
+@router.post("/bulk", response_model=StandardResponse[BulkResult[schemas.shipment.ShipmentPublic]])
+async def create_shipments_bulk(
+    shipments_in: List[schemas.shipment.ShipmentCreate],
+    db: AsyncSession = Depends(get_db),
+    current_user: DBUser = Depends(require_admin_or_manager)
+):
+    """
+    Create many shipments in one transaction. Items referencing a missing client are
+    reported as failed in `items` (by request index); the rest are created.
+    """
+    if len(shipments_in) > settings.BULK_CREATE_MAX_ITEMS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"At most {settings.BULK_CREATE_MAX_ITEMS} shipments can be created per request.",
+        )
+    try:
+        created = await crud.crud_shipment.create_shipments_bulk_async(db, shipments=shipments_in)
+    except ForeignKeyViolation:
+        # A client passed the existence check but was deleted before the INSERT
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="A referenced client was deleted while the shipments were being created. Nothing was created; retry the request.",
+        )
+    items = [
+        BulkItemResult(index=i, ok=True, data=db_shipment) if db_shipment is not None
+        else BulkItemResult(index=i, ok=False, error=f"Client with id {item.client_id} not found.")
+        for i, (item, db_shipment) in enumerate(zip(shipments_in, created))
+    ]
+    n_created = sum(1 for db_shipment in created if db_shipment is not None)
+    return StandardResponse(data=BulkResult(created=n_created, failed=len(items) - n_created, items=items))
+
+@router.get("/", response_model=PaginatedResponse[List[schemas.shipment.ShipmentPublic]])
 async def read_shipments_list(
+    request: Request,
+    response: Response,
     skip: int = Query(0, ge=0),
     limit: int = Query(10, ge=1, le=100),
     client_id: Optional[int] = Query(None, description="Filter shipments by client ID"),
     status: Optional[ShipmentStatus] = Query(None, description="Filter shipments by status"),
-    db: Session = Depends(get_db),
+    after: Optional[str] = Query(None, description="Cursor from page.next_cursor; returns the rows after it"),
+    before: Optional[str] = Query(None, description="Cursor from page.prev_cursor; returns the rows before it"),
+    include_total: bool = Query(False, description="Also return page.total (served from a count cache; see page.total_exact)"),
+    fieldset: Optional[Fieldset] = Depends(shipment_fieldset),
+    db: AsyncSession = Depends(get_db),
+    current_user: DBUser = Depends(get_current_active_user)
+):
+    # Answered from the change generations alone when the client's copy is current
+    etag = await etags.resource_etag(db, request, source_tables(crud.crud_shipment.SHIPMENT_FIELDS, fieldset))
+    if etags.matches(request, etag):
+        return etags.not_modified(etag)
+    try:
+        after_key, before_key = pagination.decode_page_cursors(after, before, crud.crud_shipment.SHIPMENT_CURSOR_KINDS)
+    except ValueError as e:
+        # `status` is the query filter here, so use the literal code
+        raise HTTPException(status_code=400, detail=str(e))
+    # One extra row tells us whether another page exists without a COUNT query
+    shipments = await crud.crud_shipment.get_shipments_async(db, skip=skip, limit=limit + 1, client_id=client_id, status=status, after=after_key, before=before_key, fieldset=fieldset)
+    shipments, page = pagination.make_page(shipments, limit, crud.crud_shipment.shipment_cursor_key, after=after_key, before=before_key)
+    if include_total:
+        page.total, page.total_exact = await crud.crud_shipment.get_shipments_total_async(db, client_id=client_id, status=status)
+    if fieldset is not None:
+        return shaped_response(PaginatedResponse(data=[shape(crud.crud_shipment.SHIPMENT_FIELDS, fieldset, shipment) for shipment in shipments], page=page), headers={"ETag": etag})
+    response.headers["ETag"] = etag
+    return PaginatedResponse(data=shipments, page=page)
+
+@router.get("/batch", response_model=StandardResponse[BatchResult[schemas.shipment.ShipmentPublic]])
+async def read_shipments_batch(
+    ids: str = Query(..., description="Comma-separated shipment ids, e.g. 1,2,3"),
+    fieldset: Optional[Fieldset] = Depends(shipment_fieldset),
+    db: AsyncSession = Depends(get_db),
+    current_user: DBUser = Depends(get_current_active_user)
+):
+    """
+    Fetch specific shipments in one query. `items` follows the order of `ids` (duplicates
+    removed); ids that don't exist are listed in `missing`. Use POST /shipments/batch for long lists.
+    """
+    try:
+        shipment_ids = parse_id_list(ids, settings.BATCH_FETCH_MAX_IDS)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    return await _batch_shipments(db, shipment_ids, fieldset)
+
+@router.post("/batch", response_model=StandardResponse[BatchResult[schemas.shipment.ShipmentPublic]])
+async def read_shipments_batch_post(
+    batch_in: BatchFetchRequest,
+    fieldset: Optional[Fieldset] = Depends(shipment_fieldset),
+    db: AsyncSession = Depends(get_db),
+    current_user: DBUser = Depends(get_current_active_user)
+):
+    """Same as GET /shipments/batch, with the ids in the body."""
+    try:
+        shipment_ids = unique_ids(batch_in.ids, settings.BATCH_FETCH_MAX_IDS)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    return await _batch_shipments(db, shipment_ids, fieldset)
+
+async def _batch_shipments(db: AsyncSession, shipment_ids: List[int], fieldset: Optional[Fieldset]):
+    shipments = await crud.crud_shipment.get_shipments_by_ids_async(db, shipment_ids, fieldset=fieldset)
+    found, missing = split_found(shipment_ids, shipments)
+    if fieldset is not None:
+        items = [shape(crud.crud_shipment.SHIPMENT_FIELDS, fieldset, shipment) for shipment in found]
+        return shaped_response(StandardResponse(data=BatchResult(items=items, missing=missing)))
+    return StandardResponse(data=BatchResult(items=found, missing=missing))
+
+@router.get("/export", response_class=StreamingResponse)
+async def export_shipments(
+    export_format: ExportFormat = Query(ExportFormat.NDJSON, alias="format", description="ndjson (one JSON object per line) or csv"),
+    client_id: Optional[int] = Query(None, description="Filter shipments by client ID"),
+    status: Optional[ShipmentStatus] = Query(None, description="Filter shipments by status"),
     current_user: DBUser = Depends(get_current_active_user)
 ):
-    shipments = crud.crud_shipment.get_shipments(db, skip=skip, limit=limit, client_id=client_id, status=status)
-    return StandardResponse(data=shipments)
+    """
+    Stream every matching shipment (no paging), in the same order as the list endpoint.
+    """
+    statement = crud.crud_shipment.export_shipments_statement(client_id=client_id, status=status)
+    return export_response(statement, schemas.shipment.ShipmentPublic, export_format, csv_columns=["id", "client_id", "client.name", "status", "origin", "destination", "createdAt"], filename="shipments")
 
 @router.get("/{shipment_id}", response_model=StandardResponse[schemas.shipment.ShipmentPublic])
 async def read_shipment_by_id(
     shipment_id: int,
-    db: Session = Depends(get_db),
+    request: Request,
+    response: Response,
+    fieldset: Optional[Fieldset] = Depends(shipment_fieldset),
+    db: AsyncSession = Depends(get_db),
     current_user: DBUser = Depends(get_current_active_user)
 ):
-    db_shipment = crud.crud_shipment.get_shipment(db, shipment_id=shipment_id)
+    # The row's version covers its own changes; embedded relations add their tables' generations
+    version = await crud.crud_shipment.get_shipment_version_async(db, shipment_id=shipment_id)
+    if version is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Shipment not found")
+    etag = await etags.resource_etag(db, request, source_tables(crud.crud_shipment.SHIPMENT_FIELDS, fieldset)[1:], version=version)
+    if etags.matches(request, etag):
+        return etags.not_modified(etag)
+    db_shipment = await crud.crud_shipment.get_shipment_async(db, shipment_id=shipment_id, fieldset=fieldset)
     if not db_shipment:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Shipment not found")
+    if fieldset is not None:
+        return shaped_response(StandardResponse(data=shape(crud.crud_shipment.SHIPMENT_FIELDS, fieldset, db_shipment)), headers={"ETag": etag})
+    response.headers["ETag"] = etag
     return StandardResponse(data=db_shipment)
 
 @router.put("/{shipment_id}", response_model=StandardResponse[schemas.shipment.ShipmentPublic])
 async def update_existing_shipment(
     shipment_id: int,
     shipment_in: schemas.shipment.ShipmentUpdate,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     current_user: DBUser = Depends(require_admin_or_manager)
 ):
-    db_shipment = crud.crud_shipment.get_shipment(db, shipment_id=shipment_id)
-    if not db_shipment:
-        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Shipment not found")
-
-    updated_shipment = crud.crud_shipment.update_shipment(db=db, db_shipment=db_shipment, shipment_in=shipment_in)
-    if not updated_shipment:
+    try:
+        updated_shipment = await crud.crud_shipment.update_shipment_async(db=db, shipment_id=shipment_id, shipment_in=shipment_in)
+    except ForeignKeyViolation:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND, # Or 400 Bad Request if client_id was the issue
             detail=f"Failed to update shipment, possibly due to invalid client_id: {shipment_in.client_id}",
         )
+    if not updated_shipment:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Shipment not found")
     return StandardResponse(data=updated_shipment)
 
 @router.delete("/{shipment_id}", response_model=StandardResponse[schemas.shipment.ShipmentPublic])
 async def delete_existing_shipment(
     shipment_id: int,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     current_user: DBUser = Depends(require_admin)
 ):
-    deleted_shipment = crud.crud_shipment.delete_shipment(db, shipment_id=shipment_id)
+    deleted_shipment = await crud.crud_shipment.delete_shipment_async(db, shipment_id=shipment_id)
     if not deleted_shipment:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Shipment not found")
     return StandardResponse(data=deleted_shipment)
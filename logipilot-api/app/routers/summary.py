@@ -0,0 +1,58 @@
+from fastapi import APIRouter, Depends, Query
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from .. import crud
+from ..database import get_db
+from ..auth.jwt import get_current_active_user
+from ..models.user import User as DBUser
+from ..models.shipment import ShipmentStatusEnum
+from ..models.alert import AlertSeverityEnum
+from ..schemas.summary import SummaryData, Metric, ShipmentPreview, AlertPreview
+from ..schemas.response import StandardResponse
+
+router = APIRouter(
+    prefix="/summary",
+    tags=["Summary"],
+)
+
+# Statuses counted as "active" on the dashboard
+ACTIVE_SHIPMENT_STATUSES = (ShipmentStatusEnum.PENDING, ShipmentStatusEnum.IN_TRANSIT, ShipmentStatusEnum.DELAYED)
+URGENT_ALERT_SEVERITIES = (AlertSeverityEnum.HIGH, AlertSeverityEnum.CRITICAL)
+
+@router.get("", response_model=StandardResponse[SummaryData])
+async def read_summary(
+    recent: int = Query(5, ge=0, le=20, description="Number of recent shipments and alerts to include"),
+    db: AsyncSession = Depends(get_db),
+    current_user: DBUser = Depends(get_current_active_user)
+):
+    """
+    Dashboard summary. Counts come from the counters table and the recent items from
+    index-ordered LIMIT queries, so the cost doesn't grow with the amount of data.
+    """
+    counts = await crud.crud_counter.get_counts_async(db)
+    shipments = await crud.crud_shipment.get_shipments_async(db, limit=recent) if recent else []
+    alerts = await crud.crud_alert.get_alerts_async(db, limit=recent) if recent else []
+
+    shipment_counts, alert_counts, client_counts = counts["shipments"], counts["alerts"], counts["clients"]
+    metrics = [
+        Metric(title="Active Shipments", value=f"{sum(shipment_counts[s.value] for s in ACTIVE_SHIPMENT_STATUSES):,}",
+               iconName="Package", color="text-blue-600", bgColor="bg-blue-50"),
+        Metric(title="Total Clients", value=f"{sum(client_counts.values()):,}",
+               iconName="Users", color="text-green-600", bgColor="bg-green-50"),
+        Metric(title="Urgent Alerts", value=f"{sum(alert_counts[s.value] for s in URGENT_ALERT_SEVERITIES):,}",
+               iconName="AlertTriangle", color="text-amber-600", bgColor="bg-amber-50"),
+    ]
+    return StandardResponse(data=SummaryData(
+        metrics=metrics,
+        recentShipments=[
+            ShipmentPreview(id=str(s.id), client=s.client.name, status=s.status.value, destination=s.destination)
+            for s in shipments
+        ],
+        activeAlerts=[
+            AlertPreview(id=str(a.id), title=f"Shipment {a.shipment_id}", description=a.message, severity=a.severity.value, category="Shipment")
+            for a in alerts
+        ],
+        shipmentsByStatus=shipment_counts,
+        alertsBySeverity=alert_counts,
+        clientsByStatus=client_counts,
+    ))
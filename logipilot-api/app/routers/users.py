@@ -1,37 +1,50 @@
 from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List
 
 from .. import crud, schemas, models
 from ..database import get_db
 from ..auth.jwt import get_current_active_user, require_admin
+from ..auth import security
 from ..models.user import User as DBUser, UserRoleEnum
 from ..schemas.user import UserCreate, UserPublic, UserUpdate
 from ..schemas.response import StandardResponse # Import standard response
+from ..crud.errors import UniqueViolation
 
 router = APIRouter(
     prefix="/users",
     tags=["Users"],
 )
 
+async def hash_password_or_503(password: str) -> str:
+    # Hashing runs in the bounded bcrypt pool; surface a full queue as 503 rather than stalling
+    try:
+        return await security.get_password_hash_async(password)
+    except security.PasswordHashingBusy:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Password hashing is temporarily overloaded. Please retry shortly.",
+            headers={"Retry-After": "1"},
+        )
+
 @router.post("/", response_model=StandardResponse[schemas.user.UserPublic], status_code=status.HTTP_201_CREATED)
 async def create_new_user(
     user_in: schemas.user.UserCreate,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     current_admin_user: models.user.User = Depends(require_admin) # Renamed for clarity
 ):
     """
     Create a new user. Only accessible by administrators.
     """
-    db_user_exists = crud.crud_user.get_user_by_email(db, email=user_in.email)
-    if db_user_exists: # Renamed variable
+    hashed_password = await hash_password_or_503(user_in.password)
+    try:
+        new_user_db = await crud.crud_user.create_user_async(db=db, user=user_in, hashed_password=hashed_password) # Renamed variable
+    except UniqueViolation: # The email column is unique
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Email already registered",
         )
-
-    new_user_db = crud.crud_user.create_user(db=db, user=user_in) # Renamed variable
-    # Pydantic conversion to UserPublic happens during StandardResponse creation if orm_mode is efficient
+    # Converted to UserPublic by the response_model (from_attributes)
     return StandardResponse(data=new_user_db)
 
 @router.get("/me", response_model=StandardResponse[schemas.user.UserPublic])
@@ -45,25 +58,25 @@ async def read_users_me(current_active_user: models.user.User = Depends(get_curr
 async def read_users(
     skip: int = 0,
     limit: int = 100,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     current_admin_user: models.user.User = Depends(require_admin) # Renamed for clarity
 ):
     """
     Retrieve a list of users. Admin only. Includes pagination.
     """
-    users_list = crud.crud_user.get_users(db, skip=skip, limit=limit) # Renamed variable
+    users_list = await crud.crud_user.get_users_async(db, skip=skip, limit=limit) # Renamed variable
     return StandardResponse(data=users_list)
 
 @router.get("/{user_id}", response_model=StandardResponse[schemas.user.UserPublic]) # Updated response_model
 async def read_user_by_id(
     user_id: int,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     current_admin_user: models.user.User = Depends(require_admin) # Renamed for clarity
 ):
     """
     Get a specific user by ID. Admin only.
     """
-    db_user_found = crud.crud_user.get_user(db, user_id=user_id) # Renamed variable
+    db_user_found = await crud.crud_user.get_user_async(db, user_id=user_id) # Renamed variable
     if db_user_found is None:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="User not found")
     return StandardResponse(data=db_user_found)
@@ -72,28 +85,25 @@ async def read_user_by_id(
 async def update_existing_user(
     user_id: int,
     user_in: schemas.user.UserUpdate,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     current_admin_user: models.user.User = Depends(require_admin) # Renamed for clarity
 ):
     """
     Update a user's details. Admin only.
     """
-    db_user_to_update = crud.crud_user.get_user(db, user_id=user_id) # Renamed variable
-    if not db_user_to_update:
+    hashed_password = await hash_password_or_503(user_in.password) if user_in.password else None
+    try:
+        updated_user_db = await crud.crud_user.update_user_async(db=db, user_id=user_id, user_in=user_in, hashed_password=hashed_password) # Renamed
+    except UniqueViolation:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Email already registered by another user.")
+    if not updated_user_db:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="User not found")
-
-    if user_in.email and user_in.email != db_user_to_update.email:
-        existing_email_user = crud.crud_user.get_user_by_email(db, email=user_in.email) # Renamed
-        if existing_email_user and existing_email_user.id != user_id:
-            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Email already registered by another user.")
-
-    updated_user_db = crud.crud_user.update_user(db=db, db_user=db_user_to_update, user_in=user_in) # Renamed
     return StandardResponse(data=updated_user_db)
 
 @router.delete("/{user_id}", response_model=StandardResponse[schemas.user.UserPublic]) # Updated response_model
 async def delete_existing_user(
     user_id: int,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     current_admin_user: models.user.User = Depends(require_admin) # Renamed for clarity
 ):
     """
@@ -103,7 +113,7 @@ async def delete_existing_user(
     if current_admin_user.id == user_id: # current_user is now current_admin_user
         raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Admins cannot delete themselves.")
 
-    deleted_user_db = crud.crud_user.delete_user(db, user_id=user_id) # Renamed
+    deleted_user_db = await crud.crud_user.delete_user_async(db, user_id=user_id) # Renamed
     if not deleted_user_db:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="User not found")
     return StandardResponse(data=deleted_user_db)
@@ -1,12 +1,12 @@
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, ConfigDict, Field
 from typing import Optional
 from datetime import datetime
 
 from ..models.alert import AlertSeverityEnum as ModelAlertSeverityEnum
 # from .shipment import ShipmentPublic # If we wanted to nest full shipment details
 
-class AlertSeverity(str, ModelAlertSeverityEnum):
-    pass
+# Enums with members cannot be subclassed, so reuse the model's enum directly
+AlertSeverity = ModelAlertSeverityEnum
 
 class AlertBase(BaseModel):
     shipment_id: int = Field(..., gt=0, description="ID of the shipment this alert pertains to")
@@ -28,9 +28,7 @@ class AlertInDBBase(AlertBase):
     createdAt: datetime
     # resolvedAt: Optional[datetime] = None # If you add resolvedAt field to model
 
-    class Config:
-        orm_mode = True
-        # from_attributes = True # Pydantic V2
+    model_config = ConfigDict(from_attributes=True) # Validated straight from ORM rows
 
 class AlertPublic(AlertInDBBase):
     # shipment: Optional[ShipmentPublic] = None # Example if nesting full shipment
@@ -0,0 +1,20 @@
+from pydantic import BaseModel
+from typing import List
+
+# GET /api/v1/analytics/lanes, for the frontend's AnalyticsPage (regional performance)
+
+class LaneTransitStats(BaseModel):
+    origin: str
+    destination: str
+    deliveries: int # Delivered shipments on the lane with a recorded delivery
+    # Transit time in hours, from departure (first In Transit, else creation) to delivery
+    mean_hours: float
+    min_hours: float
+    p50_hours: float
+    p90_hours: float
+    p95_hours: float
+    max_hours: float
+
+class LaneTransitReport(BaseModel):
+    lanes: List[LaneTransitStats]
+    deliveries: int # Sum over the returned lanes
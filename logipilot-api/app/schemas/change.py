@@ -0,0 +1,25 @@
+from pydantic import BaseModel, ConfigDict, Json
+from typing import Any, Dict, List, Optional
+from datetime import datetime
+import enum
+
+class ChangeEntity(str, enum.Enum):
+    CLIENTS = "clients"
+    SHIPMENTS = "shipments"
+    ALERTS = "alerts"
+
+class ChangePublic(BaseModel):
+    seq: int
+    entity: ChangeEntity
+    entity_id: int
+    op: str # "create", "update" or "delete"
+    diff: Optional[Json[Dict[str, Any]]] = None # create: the row; update: the columns set; delete: null
+    changedAt: datetime
+
+    model_config = ConfigDict(from_attributes=True) # Validated straight from ORM rows
+
+class ChangeFeed(BaseModel):
+    changes: List[ChangePublic]
+    next_since: int # Pass as ?since= to read the following entries
+    has_more: bool # More entries exist after next_since
+    latest_seq: int # Newest entry in the log
@@ -1,12 +1,12 @@
-from pydantic import BaseModel, EmailStr, Field
+from pydantic import BaseModel, ConfigDict, EmailStr, Field
 from typing import Optional
 from datetime import datetime
 
 # Re-define or import Enum for Pydantic model
 from ..models.client import ClientStatusEnum as ModelClientStatusEnum
 
-class ClientStatus(str, ModelClientStatusEnum): # Inherit from str and the model's enum
-    pass # Pydantic will use the values from ModelClientStatusEnum
+# Enums with members cannot be subclassed, so reuse the model's enum directly
+ClientStatus = ModelClientStatusEnum
 
 class ClientBase(BaseModel):
     name: str = Field(..., min_length=1, max_length=100)
@@ -26,10 +26,15 @@ class ClientUpdate(BaseModel):
 class ClientInDBBase(ClientBase):
     id: int
     createdAt: datetime # This will be populated from the DB
+    email: str # Checked as EmailStr on the way in; re-validating stored rows made up most of a list response's cost
 
-    class Config:
-        orm_mode = True # Pydantic V1
-        # from_attributes = True # Pydantic V2
+    model_config = ConfigDict(from_attributes=True) # Validated straight from ORM rows
 
 class ClientPublic(ClientInDBBase):
     pass # All fields are public for now
+
+class ClientSuggestion(BaseModel):
+    # Typeahead entry from GET /clients/suggest
+    id: int
+    name: str
+    email: str
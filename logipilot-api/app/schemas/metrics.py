@@ -0,0 +1,18 @@
+from pydantic import BaseModel
+
+class ResponseCacheStats(BaseModel):
+    backend: str # "memory" or "sqlite"
+    enabled: bool
+    entries: int # Currently stored responses
+    max_entries: int
+    ttl_seconds: int
+    hits: int
+    misses: int
+    hit_ratio: float # hits / (hits + misses), 0 before the first lookup
+    stores: int
+    evictions: int # Dropped to stay under max_entries (least recently used first)
+    expirations: int # Found past their TTL
+    stale: int # Found but built before a write to one of their tables (counted as misses)
+    invalidations: int # Writes that invalidated one or more tables
+    coalesced: int # Misses answered with the response of an identical request already running
+    in_flight: int # Requests currently being coalesced on
@@ -12,10 +12,39 @@ class ErrorResponse(BaseModel):
     message: str # General error message
     details: Optional[List[ErrorDetail]] = None
 
-class StandardResponse(Generic[T], BaseModel):
+class StandardResponse(BaseModel, Generic[T]):
     data: Optional[T] = None
     error: Optional[ErrorResponse] = None # Using the more detailed ErrorResponse
 
+class PageInfo(BaseModel):
+    next_cursor: Optional[str] = None # Pass as ?after= to fetch the following page
+    prev_cursor: Optional[str] = None # Pass as ?before= to fetch the preceding page
+    has_more: bool = False # More rows exist after this page
+    total: Optional[int] = None # Rows matching the filters; only with ?include_total=true
+    total_exact: Optional[bool] = None # False while `total` is an estimate awaiting reconciliation
+
+class PaginatedResponse(StandardResponse[T], Generic[T]):
+    # List endpoints: same envelope plus keyset pagination cursors
+    page: Optional[PageInfo] = None
+
+class BulkItemResult(BaseModel, Generic[T]):
+    index: int # Position of the item in the request array
+    ok: bool
+    data: Optional[T] = None
+    error: Optional[str] = None
+
+class BulkResult(BaseModel, Generic[T]):
+    created: int
+    failed: int
+    items: List[BulkItemResult[T]]
+
+class BatchFetchRequest(BaseModel):
+    ids: List[int] = Field(..., min_length=1) # Body of POST /<resource>/batch, for lists too long for a URL
+
+class BatchResult(BaseModel, Generic[T]):
+    items: List[T] # Found rows, in request order (duplicates removed)
+    missing: List[int] # Requested ids that don't exist
+
 # Example usage in router:
 # @router.post("/", response_model=StandardResponse[schemas.user.UserPublic])
 # async def create_user(...):
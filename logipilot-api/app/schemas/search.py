@@ -0,0 +1,11 @@
+from pydantic import BaseModel
+from typing import Literal
+
+# Mirrors SearchResultItem in src/types, as consumed by the frontend's useGlobalSearch
+
+class SearchResultItem(BaseModel):
+    type: Literal["Shipment", "Client", "Alert"]
+    id: str
+    title: str
+    description: str
+    link: str # Frontend route of the item
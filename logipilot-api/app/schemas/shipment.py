@@ -1,12 +1,12 @@
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, ConfigDict, Field
 from typing import Optional
 from datetime import datetime
 
 from ..models.shipment import ShipmentStatusEnum as ModelShipmentStatusEnum
 from .client import ClientPublic # To nest client details in shipment response
 
-class ShipmentStatus(str, ModelShipmentStatusEnum): # Inherit from str and the model's enum
-    pass
+# Enums with members cannot be subclassed, so reuse the model's enum directly
+ShipmentStatus = ModelShipmentStatusEnum
 
 class ShipmentBase(BaseModel):
     client_id: int = Field(..., gt=0, description="ID of the client for this shipment")
@@ -27,9 +27,7 @@ class ShipmentInDBBase(ShipmentBase):
     id: int
     createdAt: datetime
 
-    class Config:
-        orm_mode = True
-        # from_attributes = True # Pydantic V2
+    model_config = ConfigDict(from_attributes=True) # Validated straight from ORM rows
 
 class ShipmentPublic(ShipmentInDBBase):
     client: Optional[ClientPublic] = None # Include full client details
@@ -0,0 +1,36 @@
+from pydantic import BaseModel
+from typing import Dict, List, Optional
+
+# Mirrors SummaryData / Metric / ShipmentPreview / AlertPreview in src/types (the dashboard's
+# fetchSummaryData), so the frontend can swap its mock for GET /api/v1/summary.
+
+class Metric(BaseModel):
+    title: str
+    value: str # Preformatted for display, e.g. "1,305"
+    change: str = "" # No historical snapshots are kept yet, so no trend
+    iconName: str
+    color: str
+    bgColor: str
+
+class ShipmentPreview(BaseModel):
+    id: str
+    client: str # Client name
+    status: str
+    destination: str
+    eta: Optional[str] = None
+
+class AlertPreview(BaseModel):
+    id: str
+    title: str
+    description: str
+    severity: str
+    category: Optional[str] = None
+
+class SummaryData(BaseModel):
+    metrics: List[Metric]
+    recentShipments: List[ShipmentPreview]
+    activeAlerts: List[AlertPreview]
+    # Raw counts behind the metrics, keyed by enum value (e.g. "In Transit")
+    shipmentsByStatus: Dict[str, int]
+    alertsBySeverity: Dict[str, int]
+    clientsByStatus: Dict[str, int]
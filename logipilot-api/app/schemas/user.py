@@ -1,4 +1,4 @@
-from pydantic import BaseModel, EmailStr, Field
+from pydantic import BaseModel, ConfigDict, EmailStr, Field
 from enum import Enum
 from typing import Optional
 
@@ -30,10 +30,9 @@ class UserUpdate(BaseModel):
 
 class UserInDBBase(UserBase):
     id: int
+    email: str # Checked as EmailStr on the way in, not again for every response
 
-    class Config:
-        orm_mode = True # Pydantic V1
-        # from_attributes = True # Pydantic V2
+    model_config = ConfigDict(from_attributes=True) # Validated straight from ORM rows
 
 class UserPublic(UserInDBBase):
     pass # No hashed_password
@@ -51,3 +50,7 @@ class TokenResponse(BaseModel): # Renamed from Token to TokenResponse
     access_token: str
     token_type: str
     user: UserPublic
+    refresh_token: Optional[str] = None # Opaque; exchange at /auth/refresh for a new pair
+
+class RefreshTokenRequest(BaseModel):
+    refresh_token: str = Field(..., min_length=1)
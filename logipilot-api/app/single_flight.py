@@ -0,0 +1,52 @@
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, Hashable, Tuple
+
+# Request coalescing ("single-flight"): while one caller is computing the result for a
+# key, identical callers wait for that result instead of repeating the work. Only
+# concurrent callers share anything; nothing is kept once the leader finishes.
+#
+# `token` guards what may be shared: a caller only joins a flight started with an equal
+# token (the response cache passes the tag versions, so a request that arrives after a
+# write doesn't get a result computed before it). Flights are per event loop.
+#
+# The leader can settle its flight before `fn` returns, through the callback `fn` is
+# given: the response cache does so as soon as it knows whether the response can be
+# shared, so callers don't wait out a long stream (an export, GET /alerts/stream).
+
+
+class SingleFlight:
+    def __init__(self, enabled: bool = True):
+        self.enabled = enabled
+        self._flights: Dict[Hashable, Tuple[Any, asyncio.Future]] = {}
+
+    async def run(self, key: Hashable, token: Any, fn: Callable[[Callable[[Any], None]], Awaitable[Any]]) -> Tuple[Any, bool]:
+        """
+        (result, shared). The leader runs `fn(settle)` and gets its result with shared=False;
+        callers that joined get the same result with shared=True, or None if the leader failed.
+        `settle(value)` hands callers `value` early and ends the flight.
+        """
+        if not self.enabled:
+            return await fn(lambda value: None), False
+        loop = asyncio.get_running_loop()
+        flight = self._flights.get(key)
+        if flight is not None and flight[0] == token and flight[1].get_loop() is loop:
+            # shield: a follower that is cancelled (client gone) must not cancel the flight
+            return await asyncio.shield(flight[1]), True
+        future = loop.create_future()
+        self._flights[key] = (token, future)
+
+        def settle(value: Any) -> None:
+            if self._flights.get(key, (None, None))[1] is future:
+                del self._flights[key]
+            if not future.done():
+                future.set_result(value)
+
+        result = None
+        try:
+            result = await fn(settle)
+            return result, False
+        finally:
+            settle(result)
+
+    def __len__(self) -> int:
+        return len(self._flights)
@@ -0,0 +1,119 @@
+"""
+Alert push stream vs polling: load on the API and time until a dashboard sees a new alert.
+
+    python benchmarks/alert_stream.py
+    python benchmarks/alert_stream.py --dashboards 200 --poll-seconds 5 --seconds 20
+
+Seeds shipments and alerts, then for `--seconds` creates one alert per second through the
+API while `--dashboards` clients watch for them two ways:
+
+    polling   each dashboard GETs /alerts/?limit=20 every `--poll-seconds` (staggered)
+    stream    each dashboard holds a subscription on the alert broker, as
+              GET /alerts/stream and /alerts/ws do
+
+Reports the requests, database statements and bytes the watching costs, and how long
+after the write each dashboard saw the new alert. The response cache is off, as it is
+for every benchmark.
+"""
+import argparse
+import asyncio
+import json
+import time
+
+from common import configure_database, create_schema, seed_users, seed_shipments, bearer_headers, format_latency_ms
+
+
+async def run(args, headers) -> None:
+    import httpx
+    from sqlalchemy import event
+    from app.database import async_engine
+    from app.main import app
+    from app.alert_stream import alert_broker, sse_message
+
+    statements = []
+
+    def count(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as client:
+        await client.get("/api/v1/users/me", headers=headers)  # Warm the principal cache
+        event.listen(async_engine.sync_engine, "before_cursor_execute", count)
+
+        async def write_alerts(written: dict) -> None:
+            for i in range(args.seconds):
+                await asyncio.sleep(1)
+                message = f"Benchmark alert {time.perf_counter()}"
+                written[message] = time.perf_counter()  # Latencies count from the start of the write request
+                await client.post("/api/v1/alerts/", json={"shipment_id": 1, "message": message, "severity": "High"}, headers=headers)
+
+        # Streaming: every dashboard holds a subscription; writes fan out without queries
+        written = {}
+        seen_after = []
+        streamed = {"bytes": 0}
+        subscriptions = [alert_broker.subscribe() for _ in range(args.dashboards)]
+
+        async def listen(subscription) -> None:
+            deadline = time.perf_counter() + args.seconds + 1
+            while time.perf_counter() < deadline:
+                event = await subscription.next(0.5)
+                if event is None:
+                    continue
+                now = time.perf_counter()
+                streamed["bytes"] += len(sse_message(alert_broker, event))
+                seen_after.append(now - written[json.loads(event.data)["message"]])
+
+        statements.clear()
+        await asyncio.gather(write_alerts(written), *(listen(subscription) for subscription in subscriptions))
+        for subscription in subscriptions:
+            alert_broker.unsubscribe(subscription)
+        write_statements = len(statements)  # Subscribers run none: these are the alert writes
+        print(
+            f"stream               {args.dashboards:5} connections  {0:6} statements  {streamed['bytes'] / 1024:.0f} KB  seen after {format_latency_ms(seen_after)}"
+        )
+
+        # Polling: a dashboard notices an alert on its first poll after the write
+        written: dict = {}
+        seen_after = []
+        polled = {"requests": 0, "bytes": 0}
+
+        async def poll(offset: float) -> None:
+            await asyncio.sleep(offset)
+            known = set()
+            deadline = time.perf_counter() + args.seconds + 1
+            while time.perf_counter() < deadline:
+                r = await client.get("/api/v1/alerts/?limit=20", headers=headers)
+                polled["requests"] += 1
+                polled["bytes"] += len(r.content)
+                now = time.perf_counter()
+                for alert in r.json()["data"]:
+                    if alert["message"] in written and alert["id"] not in known:
+                        seen_after.append(now - written[alert["message"]])
+                    known.add(alert["id"])
+                await asyncio.sleep(args.poll_seconds)
+
+        statements.clear()
+        await asyncio.gather(write_alerts(written), *(poll(i * args.poll_seconds / args.dashboards) for i in range(args.dashboards)))
+        print(
+            f"polling every {args.poll_seconds:g}s  {polled['requests']:5} requests     {len(statements) - write_statements:6} statements  {polled['bytes'] / 1024:.0f} KB  seen after {format_latency_ms(seen_after)}"
+        )
+        print(f"({args.dashboards} dashboards, {args.seconds} alerts written; the {write_statements} statements of the writes are not counted)")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--shipments", type=int, default=2000)
+    parser.add_argument("--clients", type=int, default=200)
+    parser.add_argument("--dashboards", type=int, default=50)
+    parser.add_argument("--poll-seconds", type=float, default=2.0)
+    parser.add_argument("--seconds", type=int, default=10)
+    args = parser.parse_args()
+
+    configure_database("alert_stream")
+    create_schema()
+    emails = seed_users(1, "bench-password")
+    seed_shipments(n_clients=args.clients, n_shipments=args.shipments, alerts_per_shipment=1)
+    asyncio.run(run(args, bearer_headers(emails[0])))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,136 @@
+"""
+Concurrent-request throughput: async sessions vs the old blocking Session.
+
+    python benchmarks/async_throughput.py
+    python benchmarks/async_throughput.py --concurrency 100 --db-latency-ms 5
+
+Both modes serve the same routes through the same crud code in one event loop
+(a single uvicorn worker). "blocking" reproduces the pre-async behaviour by
+handing the routers a session whose run_sync() calls the crud function inline,
+so every query blocks the loop. "async" is the real AsyncSession/aiosqlite path.
+
+SQLite answers in microseconds, which hides the cost of blocking, so each
+statement gets an artificial --db-latency-ms delay inside the DB driver.
+That delay stands in for the network round trip to a real database server.
+
+Compare req/s. In blocking mode a worker is not even scheduled while the loop
+is stuck in a query, so its per-request latency leaves out that queueing time.
+"""
+import argparse
+import asyncio
+import sqlite3
+import time
+
+from common import (
+    configure_database, create_schema, seed_users, seed_shipments, bearer_headers, format_latency_ms,
+)
+
+DB_LATENCY_SECONDS = 0.0
+
+
+class SlowCursor(sqlite3.Cursor):
+    def execute(self, *args, **kwargs):
+        time.sleep(DB_LATENCY_SECONDS)
+        return super().execute(*args, **kwargs)
+
+
+class SlowConnection(sqlite3.Connection):
+    def cursor(self, factory=SlowCursor):
+        return super().cursor(factory)
+
+
+class BlockingSession:
+    """Stands in for the old sync Session: crud calls run inline on the event loop."""
+
+    def __init__(self, session):
+        self.session = session
+
+    async def run_sync(self, fn, *args, **kwargs):
+        return fn(self.session, *args, **kwargs)
+
+    async def close(self):
+        self.session.close()
+
+
+async def worker(client, headers, deadline: float, latencies: list, shipment_ids: int) -> None:
+    i = 0
+    while time.perf_counter() < deadline:
+        path = "/api/v1/shipments/?limit=20" if i % 2 == 0 else f"/api/v1/shipments/{1 + (i * 7919) % shipment_ids}"
+        started = time.perf_counter()
+        response = await client.get(path, headers=headers)
+        latencies.append(time.perf_counter() - started)
+        assert response.status_code == 200, response.text
+        i += 1
+
+
+async def run_mode(mode: str, args, headers) -> None:
+    import httpx
+    from sqlalchemy import create_engine
+    from sqlalchemy.ext.asyncio import create_async_engine
+    from sqlalchemy.orm import sessionmaker
+    from app.main import app
+    from app import database
+
+    sqlite_path = database.SQLALCHEMY_DATABASE_URL.split(":///", 1)[1]
+    if mode == "async":
+        slow_engine = create_async_engine(f"sqlite+aiosqlite:///{sqlite_path}", connect_args={"factory": SlowConnection})
+        database.AsyncSessionLocal.configure(bind=slow_engine)
+        app.dependency_overrides.pop(database.get_db, None)
+    else:
+        slow_engine = create_engine(
+            f"sqlite:///{sqlite_path}", connect_args={"factory": SlowConnection, "check_same_thread": False}
+        )
+        BlockingSessionLocal = sessionmaker(bind=slow_engine, autoflush=False, expire_on_commit=False)
+
+        async def get_blocking_db():
+            db = BlockingSession(BlockingSessionLocal())
+            try:
+                yield db
+            finally:
+                await db.close()
+        app.dependency_overrides[database.get_db] = get_blocking_db
+
+    latencies = []
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        await client.get("/api/v1/shipments/?limit=1", headers=headers)  # Warm up (principal cache, pools)
+        started = time.perf_counter()
+        deadline = started + args.seconds
+        await asyncio.gather(*(
+            worker(client, headers, deadline, latencies, args.shipments) for _ in range(args.concurrency)
+        ))
+        elapsed = time.perf_counter() - started
+
+    app.dependency_overrides.pop(database.get_db, None)
+    if mode == "async":
+        await slow_engine.dispose()
+    else:
+        slow_engine.dispose()
+    print(f"[{mode:>8}] {len(latencies) / elapsed:8.1f} req/s  {format_latency_ms(latencies)}")
+
+
+def main() -> None:
+    global DB_LATENCY_SECONDS
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--mode", choices=["both", "async", "blocking"], default="both")
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--seconds", type=float, default=5.0)
+    parser.add_argument("--db-latency-ms", type=float, default=2.0)
+    parser.add_argument("--shipments", type=int, default=5000)
+    args = parser.parse_args()
+    DB_LATENCY_SECONDS = args.db_latency_ms / 1000.0
+
+    configure_database("async_throughput")
+    create_schema()
+    emails = seed_users(1, "bench-password")
+    seed_shipments(n_clients=200, n_shipments=args.shipments)
+    headers = bearer_headers(emails[0])
+
+    print(f"concurrency={args.concurrency} db_latency={args.db_latency_ms}ms duration={args.seconds}s")
+    modes = ["blocking", "async"] if args.mode == "both" else [args.mode]
+    for mode in modes:
+        asyncio.run(run_mode(mode, args, headers))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+"""
+Incremental sync cost: GET /changes vs re-pulling the tables.
+
+    python benchmarks/change_feed.py
+    python benchmarks/change_feed.py --shipments 100000 --writes 500
+
+Seeds shipments (with one alert each), records the feed position, makes `--writes`
+updates through the API, then brings a mirror up to date two ways:
+
+    full pull  GET /shipments/export and /alerts/export (what mirrors do without a feed)
+    feed       GET /changes?since=<position> until has_more is false
+
+and reports the time, bytes and statements of each. Re-run with a larger --shipments:
+the feed's cost follows `--writes` and stays flat, while the full pull grows with the tables.
+"""
+import argparse
+import time
+
+from common import configure_database, create_schema, seed_users, seed_shipments, bearer_headers
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--shipments", type=int, default=20000)
+    parser.add_argument("--writes", type=int, default=200, help="Updates made between the two syncs")
+    parser.add_argument("--limit", type=int, default=500, help="GET /changes page size")
+    args = parser.parse_args()
+    size = args.shipments
+
+    configure_database("change_feed")
+    create_schema()
+    emails = seed_users(1, "bench-password")
+    seed_shipments(n_clients=max(size // 20, 1), n_shipments=size, alerts_per_shipment=1)
+    headers = bearer_headers(emails[0])
+
+    from fastapi.testclient import TestClient
+    from sqlalchemy import event
+    from app.database import async_engine
+    from app.main import app
+
+    statements = []
+
+    def count(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    with TestClient(app) as client:
+        position = client.get("/api/v1/changes", headers=headers).json()["data"]["next_since"]
+        for i in range(args.writes):
+            shipment_id = 1 + (i * 7919) % size
+            if i % 2:
+                client.put(f"/api/v1/alerts/{shipment_id}", json={"severity": "High"}, headers=headers)
+            else:
+                client.put(f"/api/v1/shipments/{shipment_id}", json={"status": "Delivered"}, headers=headers)
+        event.listen(async_engine.sync_engine, "before_cursor_execute", count)
+
+        statements.clear()
+        started = time.perf_counter()
+        pulled = sum(len(client.get(path, headers=headers).content) for path in ("/api/v1/shipments/export", "/api/v1/alerts/export"))
+        full_ms = (time.perf_counter() - started) * 1000
+        full_statements = len(statements)
+
+        statements.clear()
+        started = time.perf_counter()
+        fed, entries, since = 0, 0, position
+        while True:
+            response = client.get(f"/api/v1/changes?since={since}&limit={args.limit}", headers=headers)
+            fed += len(response.content)
+            page = response.json()["data"]
+            entries += len(page["changes"])
+            since = page["next_since"]
+            if not page["has_more"]:
+                break
+        feed_ms = (time.perf_counter() - started) * 1000
+        event.remove(async_engine.sync_engine, "before_cursor_execute", count)
+
+    print(
+        f"{size:8} rows  full pull {full_ms:8.1f} ms {pulled / 1024:9.0f} KB {full_statements:4} stmt   "
+        f"feed ({entries} entries) {feed_ms:7.1f} ms {fed / 1024:6.0f} KB {len(statements):3} stmt"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+"""
+Client typeahead: memory footprint and lookup latency of the in-process prefix index.
+
+    python benchmarks/client_suggest.py
+    python benchmarks/client_suggest.py --clients 500000
+
+Seeds clients, loads app/crud/client_suggest.py's index from the database and reports
+the memory it retains (tracemalloc, after the load has returned) and the per-lookup
+latency of suggest() for a few prefix lengths. For comparison it also times the
+indexed `name LIKE 'prefix%'` query a database-backed typeahead would run.
+"""
+import argparse
+import gc
+import time
+import tracemalloc
+
+from common import configure_database, create_schema, seed_shipments
+
+PREFIXES = ["c", "cl", "client 0", "client 0421", "client42", "zzz"]
+
+
+def per_call(call, repeat: int) -> float:
+    started = time.perf_counter()
+    for _ in range(repeat):
+        call()
+    return (time.perf_counter() - started) / repeat
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--clients", type=int, default=100000)
+    parser.add_argument("--repeat", type=int, default=2000)
+    args = parser.parse_args()
+
+    configure_database("client_suggest")
+    create_schema()
+    seed_shipments(n_clients=args.clients, n_shipments=0)
+
+    from sqlalchemy import select
+    from app.database import SessionLocal
+    from app.models.client import Client
+    from app.crud.client_suggest import client_suggest_index, load_client_suggest_index
+
+    db = SessionLocal()
+    try:
+        gc.collect()
+        tracemalloc.start()
+        before, _ = tracemalloc.get_traced_memory()
+        started = time.perf_counter()
+        load_client_suggest_index(db)
+        load_time = time.perf_counter() - started
+        db.expunge_all()
+        gc.collect()
+        after, _ = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        footprint = after - before
+        print(
+            f"index: {len(client_suggest_index)} clients loaded in {load_time:.2f}s, "
+            f"{footprint / 1e6:.1f} MB retained ({footprint / len(client_suggest_index):.0f} B/client, "
+            f"{footprint / len(client_suggest_index) * 100000 / 1e6:.1f} MB per 100k clients)"
+        )
+
+        for prefix in PREFIXES:
+            hits = client_suggest_index.suggest(prefix, 10)
+            lookup = per_call(lambda: client_suggest_index.suggest(prefix, 10), args.repeat)
+            query = select(Client.id, Client.name, Client.email).where(Client.name.like(f"{prefix}%")).order_by(Client.name).limit(10)
+            sql = per_call(lambda: db.execute(query).all(), max(1, args.repeat // 100))
+            print(f"prefix {prefix!r:14} {len(hits):2} hits  index {lookup * 1e6:7.1f}us   sql LIKE {sql * 1e6:9.1f}us")
+
+        update = per_call(lambda: client_suggest_index.put(1, "Renamed Client", "client0@example.com"), 200)
+        print(f"put (rename one client): {update * 1e6:.1f}us")
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,123 @@
+"""
+Shared helpers for the benchmark scripts in this folder.
+
+Each benchmark runs the app in-process against a throwaway SQLite database.
+`configure_database()` must be called before anything under `app` is imported,
+because settings (and the engine) are created at import time.
+
+Run benchmarks from the logipilot-api directory, e.g.:
+    python benchmarks/login_burst.py
+"""
+import os
+import sys
+import tempfile
+from typing import List, Sequence
+
+API_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def configure_database(name: str = "bench") -> str:
+    directory = tempfile.mkdtemp(prefix="logipilot-bench-")
+    url = f"sqlite:///{directory}/{name}.db"
+    os.environ["DATABASE_URL"] = url
+    # Measure the routes themselves; benchmarks/response_cache.py turns the response cache back on
+    os.environ.setdefault("RESPONSE_CACHE_TTL_SECONDS", "0")
+    if API_DIR not in sys.path:
+        sys.path.insert(0, API_DIR)
+    return url
+
+
+def create_schema() -> None:
+    # Alembic is the source of truth for real deployments; create_all is enough for a scratch DB
+    from app.database import Base, engine
+    from app.models import user, client, location, shipment, alert, refresh_token, counter, change, shipment_status_history, search  # noqa: F401 (register tables)
+    Base.metadata.create_all(bind=engine)
+
+
+def seed_users(count: int, password: str, role: str = "manager") -> List[str]:
+    from app.database import SessionLocal
+    from app.auth.security import get_password_hash
+    from app.models.user import User, UserRoleEnum
+
+    hashed = get_password_hash(password)  # One hash shared by all users keeps seeding fast
+    emails = [f"bench{i}@logipilot.com" for i in range(count)]
+    db = SessionLocal()
+    try:
+        db.add_all([User(email=e, hashed_password=hashed, role=UserRoleEnum(role), is_active=True) for e in emails])
+        db.commit()
+    finally:
+        db.close()
+    return emails
+
+
+def seed_shipments(n_clients: int, n_shipments: int, alerts_per_shipment: int = 0, seed: int = 7) -> None:
+    """Bulk-inserts clients, shipments (spread over clients/statuses) and optional alerts."""
+    import random
+    from datetime import datetime, timedelta, timezone
+    from app.database import engine
+    from app.models.client import Client, ClientStatusEnum
+    from app.models.location import Location, location_key
+    from app.models.shipment import Shipment, ShipmentStatusEnum
+    from app.models.alert import Alert, AlertSeverityEnum
+
+    rng = random.Random(seed)
+    cities = ["Paris", "Lyon", "Berlin", "Madrid", "Rome", "Oslo", "Lisbon", "Vienna", "Prague", "Warsaw"]
+    start = datetime(2025, 1, 1, tzinfo=timezone.utc)
+    client_statuses = list(ClientStatusEnum)
+    shipment_statuses = list(ShipmentStatusEnum)
+    severities = list(AlertSeverityEnum)
+
+    with engine.begin() as conn:
+        conn.execute(Location.__table__.insert(), [{"id": i, "name": city, "key": location_key(city)} for i, city in enumerate(cities, 1)])
+        conn.execute(Client.__table__.insert(), [
+            {"name": f"Client {i:06d}", "email": f"client{i}@example.com", "phone": f"+1555{i:07d}",
+             "status": client_statuses[i % len(client_statuses)], "createdAt": start + timedelta(minutes=i)}
+            for i in range(n_clients)
+        ])
+        rows = []
+        for i in range(n_shipments):
+            origin_id, destination_id = rng.sample(range(1, len(cities) + 1), 2)
+            rows.append({
+                "client_id": rng.randint(1, n_clients), "status": rng.choice(shipment_statuses),
+                "origin_id": origin_id, "destination_id": destination_id, "createdAt": start + timedelta(seconds=37 * i),
+            })
+            if len(rows) == 10000:
+                conn.execute(Shipment.__table__.insert(), rows)
+                rows = []
+        if rows:
+            conn.execute(Shipment.__table__.insert(), rows)
+        if alerts_per_shipment:
+            rows = []
+            for shipment_id in range(1, n_shipments + 1):
+                for j in range(alerts_per_shipment):
+                    rows.append({
+                        "shipment_id": shipment_id, "message": f"Alert {j} for shipment {shipment_id}",
+                        "severity": rng.choice(severities),
+                        "createdAt": start + timedelta(seconds=37 * shipment_id + j),
+                    })
+                if len(rows) >= 10000:
+                    conn.execute(Alert.__table__.insert(), rows)
+                    rows = []
+            if rows:
+                conn.execute(Alert.__table__.insert(), rows)
+
+
+def bearer_headers(email: str, role: str = "manager") -> dict:
+    from app.auth import jwt as jwt_auth
+    token = jwt_auth.create_access_token(data={"sub": email, "role": role})
+    return {"Authorization": f"Bearer {token}"}
+
+
+def percentile(values: Sequence[float], pct: float) -> float:
+    if not values:
+        return float("nan")
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, int(round(pct / 100.0 * (len(ordered) - 1)))))
+    return ordered[index]
+
+
+def format_latency_ms(values: Sequence[float]) -> str:
+    return (
+        f"n={len(values)} p50={percentile(values, 50) * 1000:.1f}ms "
+        f"p99={percentile(values, 99) * 1000:.1f}ms max={max(values) * 1000 if values else float('nan'):.1f}ms"
+    )
@@ -0,0 +1,73 @@
+"""
+Response compression: CPU time vs bytes on the wire for representative payloads.
+
+    python benchmarks/compression.py
+    python benchmarks/compression.py --link-kbps 256 --repeat 50
+
+Seeds clients, shipments and alerts, fetches a few real responses uncompressed (lists
+with embedded clients, the summary, a streamed NDJSON export), then compresses each one
+with gzip at levels 1/6/9 and brotli at qualities 1/4/11 (when the brotli package is
+installed). Reports the compressed size, the compression time and the transfer time
+over a slow link (`--link-kbps`, a mobile dispatcher's connection) for each.
+"""
+import argparse
+import time
+
+from common import configure_database, create_schema, seed_users, seed_shipments, bearer_headers
+
+PAYLOADS = [
+    ("shipments, 100 rows + client", "/api/v1/shipments/?limit=100"),
+    ("shipments, 100 rows list view", "/api/v1/shipments/?limit=100&fields=id,status,origin,destination&include="),
+    ("alerts, 100 rows", "/api/v1/alerts/?limit=100"),
+    ("clients, 100 rows", "/api/v1/clients/?limit=100"),
+    ("summary", "/api/v1/summary"),
+    ("shipment export, NDJSON", "/api/v1/shipments/export?format=ndjson"),
+]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--shipments", type=int, default=5000)
+    parser.add_argument("--clients", type=int, default=500)
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--link-kbps", type=int, default=1000, help="Link speed used for the transfer-time column")
+    args = parser.parse_args()
+
+    configure_database("compression")
+    create_schema()
+    emails = seed_users(1, "bench-password")
+    seed_shipments(n_clients=args.clients, n_shipments=args.shipments, alerts_per_shipment=1)
+    headers = {**bearer_headers(emails[0]), "Accept-Encoding": "identity"}
+
+    from fastapi.testclient import TestClient
+    from app.compression import brotli, compress_body
+    from app.main import app
+
+    settings = [("gzip", level) for level in (1, 6, 9)]
+    if brotli is not None:
+        settings += [("br", quality) for quality in (1, 4, 11)]
+    else:
+        print("brotli not installed (pip install brotli); gzip only")
+
+    def transfer_ms(size: int) -> float:
+        return size * 8 / (args.link_kbps * 1000) * 1000
+
+    with TestClient(app) as client:
+        for label, path in PAYLOADS:
+            body = client.get(path, headers=headers).content
+            print(f"\n{label} ({path}): {len(body) / 1024:.1f} KB, {transfer_ms(len(body)):.0f} ms at {args.link_kbps} kbit/s")
+            for encoding, level in settings:
+                timings = []
+                for _ in range(args.repeat):
+                    started = time.perf_counter()
+                    compressed = compress_body(body, encoding, gzip_level=level, brotli_quality=level)
+                    timings.append(time.perf_counter() - started)
+                timings.sort()
+                print(
+                    f"  {encoding:4} {level:2}  {len(compressed) / 1024:7.1f} KB  x{len(body) / len(compressed):5.1f}  "
+                    f"cpu p50 {timings[len(timings) // 2] * 1000:7.2f} ms  transfer {transfer_ms(len(compressed)):6.0f} ms"
+                )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,65 @@
+"""
+Dashboard polling: unconditional GETs vs If-None-Match revalidation.
+
+    python benchmarks/conditional_get.py
+    python benchmarks/conditional_get.py --limit 100 --repeat 500
+
+Seeds clients, shipments and alerts, then polls the three list endpoints and one
+shipment detail the way the dashboard does: once re-downloading the page each time,
+once sending back the ETag from the previous response. Reports the status, bytes sent,
+statements run and latency per poll for both.
+"""
+import argparse
+import time
+
+from common import configure_database, create_schema, seed_users, seed_shipments, bearer_headers, format_latency_ms
+
+PATHS = ["/api/v1/shipments/?limit={limit}", "/api/v1/alerts/?limit={limit}", "/api/v1/clients/?limit={limit}", "/api/v1/shipments/42"]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--shipments", type=int, default=20000)
+    parser.add_argument("--clients", type=int, default=1000)
+    parser.add_argument("--limit", type=int, default=50)
+    parser.add_argument("--repeat", type=int, default=200)
+    args = parser.parse_args()
+
+    configure_database("conditional_get")
+    create_schema()
+    emails = seed_users(1, "bench-password")
+    seed_shipments(n_clients=args.clients, n_shipments=args.shipments, alerts_per_shipment=1)
+    headers = bearer_headers(emails[0])
+
+    from fastapi.testclient import TestClient
+    from sqlalchemy import event
+    from app.database import async_engine
+    from app.main import app
+
+    statements = []
+
+    def count(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    with TestClient(app) as client:
+        client.get("/api/v1/users/me", headers=headers)  # Warm the principal cache
+        event.listen(async_engine.sync_engine, "before_cursor_execute", count)
+        for template in PATHS:
+            path = template.format(limit=args.limit)
+            etag = client.get(path, headers=headers).headers["ETag"]
+            for label, poll_headers in (("plain", headers), ("If-None-Match", {**headers, "If-None-Match": etag})):
+                timings, sizes = [], 0
+                statements.clear()
+                for _ in range(args.repeat):
+                    started = time.perf_counter()
+                    response = client.get(path, headers=poll_headers)
+                    timings.append(time.perf_counter() - started)
+                    sizes += len(response.content)
+                print(
+                    f"{path:32} {label:14} -> {response.status_code} {sizes / args.repeat / 1024:6.1f} KB "
+                    f"{len(statements) / args.repeat:.1f} stmt  {format_latency_ms(timings)}"
+                )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+"""
+Streaming export: time to first byte and peak memory vs table size.
+
+    python benchmarks/export_stream.py
+    python benchmarks/export_stream.py --shipments 100000 --format csv
+
+Calls GET /api/v1/shipments/export through the ASGI interface directly, so the
+time of the first body chunk is observable (an HTTP test client would buffer it).
+Peak Python memory is measured with tracemalloc in a second pass.
+
+For comparison, "materialized" loads the same rows in one query and serializes them
+as a list, which is what a paged list endpoint with an unbounded limit would do.
+Streaming memory should stay flat as --shipments grows, while the list grows with it.
+"""
+import argparse
+import asyncio
+import time
+import tracemalloc
+
+from common import configure_database, create_schema, seed_users, seed_shipments, bearer_headers
+
+
+async def call_export(app, path: str, headers: dict) -> tuple:
+    raw_headers = [(k.lower().encode(), v.encode()) for k, v in headers.items()]
+    path, _, query = path.partition("?")
+    scope = {
+        "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1", "method": "GET",
+        "scheme": "http", "path": path, "raw_path": path.encode(), "query_string": query.encode(),
+        "headers": raw_headers, "client": ("bench", 1), "server": ("bench", 80), "root_path": "",
+    }
+    started = time.perf_counter()
+    first_byte = None
+    total_bytes = 0
+    status = None
+    request_sent = False
+
+    async def receive():
+        nonlocal request_sent
+        if not request_sent:
+            request_sent = True
+            return {"type": "http.request", "body": b"", "more_body": False}
+        await asyncio.sleep(3600)  # Client never disconnects mid-stream
+        return {"type": "http.disconnect"}
+
+    async def send(message):
+        nonlocal first_byte, total_bytes, status
+        if message["type"] == "http.response.start":
+            status = message["status"]
+        elif message["type"] == "http.response.body" and message.get("body"):
+            if first_byte is None:
+                first_byte = time.perf_counter() - started
+            total_bytes += len(message["body"])
+
+    await app(scope, receive, send)
+    assert status == 200, status
+    return first_byte, time.perf_counter() - started, total_bytes
+
+
+def materialize(n_rows: int) -> int:
+    from app.database import SessionLocal
+    from app.crud import crud_shipment
+    from app.schemas.shipment import ShipmentPublic
+    db = SessionLocal()
+    try:
+        rows = crud_shipment.get_shipments(db, limit=n_rows)
+        body = "".join(ShipmentPublic.model_validate(row).model_dump_json() + "\n" for row in rows)
+        return len(body)
+    finally:
+        db.close()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--shipments", type=int, default=20000)
+    parser.add_argument("--format", choices=["ndjson", "csv"], default="ndjson")
+    args = parser.parse_args()
+
+    configure_database("export_stream")
+    create_schema()
+    emails = seed_users(1, "bench-password")
+    seed_shipments(n_clients=1000, n_shipments=args.shipments)
+    headers = bearer_headers(emails[0])
+
+    from app.main import app
+    path = f"/api/v1/shipments/export?format={args.format}"
+    asyncio.run(call_export(app, path + "&status=Delivered", headers))  # Warm up (principal cache, pools)
+
+    first_byte, total, size = asyncio.run(call_export(app, path, headers))
+    print(f"[  stream] {args.shipments} rows {size / 1e6:.1f} MB  first byte {first_byte * 1000:.1f}ms  total {total:.2f}s")
+
+    tracemalloc.start()
+    asyncio.run(call_export(app, path, headers))
+    _, stream_peak = tracemalloc.get_traced_memory()
+    tracemalloc.reset_peak()
+    started = time.perf_counter()
+    materialize(args.shipments)
+    _, list_peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(f"[  stream] peak Python memory {stream_peak / 1e6:8.1f} MB")
+    print(f"[materialized] peak Python memory {list_peak / 1e6:8.1f} MB  (first byte only after {time.perf_counter() - started:.2f}s, traced)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,58 @@
+"""
+Sparse fieldsets: payload size and latency of the shipment list with ?fields= / ?include=.
+
+    python benchmarks/fieldsets.py
+    python benchmarks/fieldsets.py --limit 100 --repeat 200
+
+Seeds clients, shipments and alerts, then requests GET /api/v1/shipments/ through the
+ASGI app with a few field/include combinations and reports the response size and
+the request latency (routing, queries and serialization) for each.
+"""
+import argparse
+import time
+
+from common import configure_database, create_schema, seed_users, seed_shipments, bearer_headers, format_latency_ms
+
+VARIANTS = [
+    ("full (default)", ""),
+    ("no client", "&include="),
+    ("list view", "&fields=id,status,origin,destination&include="),
+    ("status only", "&fields=status&include="),
+    ("with alerts", "&include=client,alerts"),
+]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--shipments", type=int, default=20000)
+    parser.add_argument("--clients", type=int, default=1000)
+    parser.add_argument("--alerts-per-shipment", type=int, default=3)
+    parser.add_argument("--limit", type=int, default=100)
+    parser.add_argument("--repeat", type=int, default=100)
+    args = parser.parse_args()
+
+    configure_database("fieldsets")
+    create_schema()
+    emails = seed_users(1, "bench-password")
+    seed_shipments(n_clients=args.clients, n_shipments=args.shipments, alerts_per_shipment=args.alerts_per_shipment)
+    headers = bearer_headers(emails[0])
+
+    from fastapi.testclient import TestClient
+    from app.main import app
+
+    with TestClient(app) as client:
+        client.get("/api/v1/users/me", headers=headers)  # Warm the principal cache
+        for label, query in VARIANTS:
+            path = f"/api/v1/shipments/?limit={args.limit}{query}"
+            size = len(client.get(path, headers=headers).content)
+            timings = []
+            for _ in range(args.repeat):
+                started = time.perf_counter()
+                response = client.get(path, headers=headers)
+                timings.append(time.perf_counter() - started)
+                assert response.status_code == 200, response.text
+            print(f"{label:16} {size / 1024:8.1f} KB  {format_latency_ms(timings)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+"""
+Lane transit-time statistics: cold build vs the incremental refresh behind GET /analytics/lanes.
+
+    python benchmarks/lane_stats.py
+    python benchmarks/lane_stats.py --shipments 500000 --new 1000
+
+Seeds shipments with a status history (In Transit, then Delivered a lane-dependent
+number of hours later) for `--delivered` of them, then times:
+
+    cold         the first GET /analytics/lanes: every delivery read and aggregated
+    warm         a GET with no new deliveries: one empty index range scan
+    incremental  a GET after `--new` deliveries made through the API: reads only those,
+                 then recomputes the figures over all deliveries in NumPy
+    rebuild      the same request after an invalidate() (what a shipment delete costs)
+
+The response cache is off, as it is for every benchmark, so each request runs the route.
+"""
+import argparse
+import random
+import time
+from datetime import timedelta
+
+from common import configure_database, create_schema, seed_users, seed_shipments, bearer_headers
+
+
+def seed_history(n_delivered: int, seed: int = 11) -> None:
+    from app.database import engine
+    from app.models.shipment import Shipment, ShipmentStatusEnum
+    from app.models.shipment_status_history import ShipmentStatusHistory
+
+    rng = random.Random(seed)
+    with engine.begin() as conn:
+        shipments = conn.execute(
+            Shipment.__table__.select().with_only_columns(Shipment.id, Shipment.origin_id, Shipment.createdAt).order_by(Shipment.id).limit(n_delivered)
+        ).all()
+        conn.execute(Shipment.__table__.update().where(Shipment.id <= n_delivered).values(status=ShipmentStatusEnum.DELIVERED))
+        rows = []
+        for shipment_id, origin_id, created in shipments:
+            departed = created + timedelta(hours=rng.uniform(1, 12))
+            delivered = departed + timedelta(hours=rng.gammavariate(2, 6 + origin_id * 2))
+            rows.append({"shipment_id": shipment_id, "from_status": ShipmentStatusEnum.PENDING, "to_status": ShipmentStatusEnum.IN_TRANSIT, "changedAt": departed})
+            rows.append({"shipment_id": shipment_id, "from_status": ShipmentStatusEnum.IN_TRANSIT, "to_status": ShipmentStatusEnum.DELIVERED, "changedAt": delivered})
+            if len(rows) >= 10000:
+                conn.execute(ShipmentStatusHistory.__table__.insert(), rows)
+                rows = []
+        if rows:
+            conn.execute(ShipmentStatusHistory.__table__.insert(), rows)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--shipments", type=int, default=100000)
+    parser.add_argument("--delivered", type=int, default=None, help="Shipments with a recorded delivery (default: 80%% of --shipments)")
+    parser.add_argument("--new", type=int, default=200, help="Deliveries made through the API before the incremental request")
+    args = parser.parse_args()
+    delivered = args.delivered if args.delivered is not None else args.shipments * 4 // 5
+
+    configure_database("lane_stats")
+    create_schema()
+    emails = seed_users(1, "bench-password")
+    seed_shipments(n_clients=max(args.shipments // 20, 1), n_shipments=args.shipments)
+    seed_history(delivered)
+    headers = bearer_headers(emails[0])
+
+    from fastapi.testclient import TestClient
+    from app.crud.lane_stats import lane_stats
+    from app.main import app
+
+    with TestClient(app) as client:
+        def timed_get() -> float:
+            started = time.perf_counter()
+            response = client.get("/api/v1/analytics/lanes", headers=headers)
+            elapsed = (time.perf_counter() - started) * 1000
+            assert response.status_code == 200, response.text
+            return elapsed
+
+        client.get("/api/v1/users/me", headers=headers) # Warm the principal cache
+        cold = timed_get()
+        warm = min(timed_get() for _ in range(20))
+        for i in range(args.new):
+            shipment_id = delivered + 1 + i % max(args.shipments - delivered, 1)
+            client.put(f"/api/v1/shipments/{shipment_id}", json={"status": "In Transit"}, headers=headers)
+            client.put(f"/api/v1/shipments/{shipment_id}", json={"status": "Delivered"}, headers=headers)
+        incremental = timed_get()
+        lane_stats.invalidate()
+        rebuild = timed_get()
+        lanes = client.get("/api/v1/analytics/lanes", headers=headers).json()["data"]
+
+    print(f"{delivered} deliveries on {len(lanes['lanes'])} lanes ({lanes['deliveries']} after the new ones)")
+    print(f"cold         {cold:8.1f} ms")
+    print(f"warm         {warm:8.1f} ms")
+    print(f"incremental  {incremental:8.1f} ms  (+{args.new} deliveries)")
+    print(f"rebuild      {rebuild:8.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
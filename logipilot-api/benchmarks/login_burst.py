@@ -0,0 +1,86 @@
+"""
+Login-burst benchmark: latency of unrelated GET endpoints while many logins run at once.
+
+    python benchmarks/login_burst.py                 # bcrypt in the bounded hashing pool
+    python benchmarks/login_burst.py --mode inline   # bcrypt on the event loop (old behaviour)
+
+Everything runs in one event loop, like a single uvicorn worker. Pollers hit
+/health and /api/v1/clients/ continuously; the script reports their latency
+before and during the burst, plus how many logins succeeded or were shed with 503.
+"""
+import argparse
+import asyncio
+import time
+from collections import Counter
+
+from common import configure_database, create_schema, seed_users, format_latency_ms
+
+PASSWORD = "bench-password"
+
+
+async def poll(client, path, headers, stop: asyncio.Event, latencies: list) -> None:
+    while not stop.is_set():
+        started = time.perf_counter()
+        await client.get(path, headers=headers)
+        latencies.append(time.perf_counter() - started)
+        await asyncio.sleep(0.005)
+
+
+async def login(client, email: str) -> int:
+    response = await client.post("/api/v1/auth/login", data={"username": email, "password": PASSWORD})
+    return response.status_code
+
+
+async def run(args) -> None:
+    import httpx
+    from app.main import app
+    from app.auth import jwt as jwt_auth
+    from app.auth import security
+
+    if args.mode == "inline":
+        async def verify_inline(plain_password, hashed_password):
+            return security.verify_password(plain_password, hashed_password)
+        security.verify_password_async = verify_inline
+
+    emails = seed_users(args.logins, PASSWORD)
+    token = jwt_auth.create_access_token(data={"sub": emails[0], "role": "manager"})
+    auth_headers = {"Authorization": f"Bearer {token}"}
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        for phase in ("idle", "burst"):
+            stop = asyncio.Event()
+            latencies = {"/health": [], "/api/v1/clients/": []}
+            pollers = [
+                asyncio.create_task(poll(client, path, auth_headers, stop, values))
+                for path, values in latencies.items()
+            ]
+            started = time.perf_counter()
+            statuses = Counter()
+            if phase == "idle":
+                await asyncio.sleep(args.idle_seconds)
+            else:
+                statuses.update(await asyncio.gather(*(login(client, email) for email in emails)))
+            elapsed = time.perf_counter() - started
+            stop.set()
+            await asyncio.gather(*pollers)
+
+            print(f"[{args.mode}] {phase}: {elapsed:.2f}s" + (f", login statuses {dict(statuses)}" if statuses else ""))
+            for path, values in latencies.items():
+                print(f"    GET {path:<18} {format_latency_ms(values)}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--mode", choices=["pool", "inline"], default="pool")
+    parser.add_argument("--logins", type=int, default=200, help="Concurrent login attempts in the burst")
+    parser.add_argument("--idle-seconds", type=float, default=1.0)
+    args = parser.parse_args()
+
+    configure_database("login_burst")
+    create_schema()
+    asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,175 @@
+"""
+Query-plan regression check for the crud read queries on SQLite.
+
+    python benchmarks/query_plans.py
+    python benchmarks/query_plans.py --verbose
+
+Builds a scratch database with the Alembic migrations, runs each get_*/count_* function
+in app/crud with representative filters and cursors, and asks SQLite for the
+EXPLAIN QUERY PLAN of every statement it issued. A query fails the check if
+SQLite needs a temporary B-tree to sort (or group) its rows, or if it reads a
+table with a full SCAN where an index seek was expected.
+
+It also checks that the indexes created by the migrations match the ones the
+ORM models declare, so the two cannot drift apart silently.
+
+Exits with status 1 if any check fails.
+"""
+import argparse
+import os
+import sys
+from datetime import datetime, timezone
+
+from common import API_DIR, configure_database, seed_shipments, seed_users
+
+
+def migrate() -> None:
+    from alembic import command
+    from alembic.config import Config
+    config = Config(os.path.join(API_DIR, "alembic.ini"))
+    config.set_main_option("script_location", os.path.join(API_DIR, "alembic"))
+    command.upgrade(config, "head")
+
+
+def index_mismatches() -> list:
+    from sqlalchemy import inspect
+    from app.database import Base, engine
+    from app.models import user, client, shipment, alert, refresh_token, counter, change, shipment_status_history, location  # noqa: F401 (register tables)
+
+    inspector = inspect(engine)
+    problems = []
+    for table in ("clients", "shipments", "alerts", "changes", "shipment_status_history", "locations"):
+        declared = {
+            index.name: [column.name for column in index.columns]
+            for index in Base.metadata.tables[table].indexes
+        }
+        migrated = {index["name"]: index["column_names"] for index in inspector.get_indexes(table)}
+        for name in sorted(set(declared) | set(migrated)):
+            if declared.get(name) != migrated.get(name):
+                problems.append(f"{table}.{name}: models={declared.get(name)} migrations={migrated.get(name)}")
+    return problems
+
+
+def cases():
+    """(label, crud call, whether a full table scan is acceptable)"""
+    from app.crud import crud_alert, crud_change, crud_client, crud_counter, crud_refresh_token, crud_shipment, crud_user, lane_stats
+    from app.schemas.alert import AlertSeverity
+    from app.schemas.client import ClientStatus
+    from app.schemas.shipment import ShipmentStatus
+
+    created = datetime(2025, 1, 2, tzinfo=timezone.utc)
+    return [
+        ("get_shipment", lambda db: crud_shipment.get_shipment(db, shipment_id=42), False),
+        ("get_shipments", lambda db: crud_shipment.get_shipments(db, limit=20), False),
+        ("get_shipments skip", lambda db: crud_shipment.get_shipments(db, skip=500, limit=20), False),
+        ("get_shipments after", lambda db: crud_shipment.get_shipments(db, limit=20, after=(created, 900)), False),
+        ("get_shipments before", lambda db: crud_shipment.get_shipments(db, limit=20, before=(created, 900)), False),
+        ("get_shipments client_id", lambda db: crud_shipment.get_shipments(db, limit=20, client_id=7), False),
+        ("get_shipments client_id after",
+         lambda db: crud_shipment.get_shipments(db, limit=20, client_id=7, after=(created, 900)), False),
+        ("get_shipments status",
+         lambda db: crud_shipment.get_shipments(db, limit=20, status=ShipmentStatus.IN_TRANSIT), False),
+        ("get_shipments status after",
+         lambda db: crud_shipment.get_shipments(db, limit=20, status=ShipmentStatus.IN_TRANSIT, after=(created, 900)), False),
+        ("count_shipments", lambda db: crud_shipment.count_shipments(db), False),
+        ("count_shipments client_id status",
+         lambda db: crud_shipment.count_shipments(db, client_id=7, status=ShipmentStatus.IN_TRANSIT), False),
+        ("get_alert", lambda db: crud_alert.get_alert(db, alert_id=42), False),
+        ("get_alerts", lambda db: crud_alert.get_alerts(db, limit=20), False),
+        ("get_alerts after", lambda db: crud_alert.get_alerts(db, limit=20, after=(created, 900)), False),
+        ("get_alerts shipment_id", lambda db: crud_alert.get_alerts(db, limit=20, shipment_id=7), False),
+        ("get_alerts severity",
+         lambda db: crud_alert.get_alerts(db, limit=20, severity=AlertSeverity.CRITICAL), False),
+        ("get_alerts severity before",
+         lambda db: crud_alert.get_alerts(db, limit=20, severity=AlertSeverity.CRITICAL, before=(created, 900)), False),
+        ("count_alerts severity", lambda db: crud_alert.count_alerts(db, severity=AlertSeverity.CRITICAL), False),
+        ("get_client", lambda db: crud_client.get_client(db, client_id=42), False),
+        ("get_client_by_email", lambda db: crud_client.get_client_by_email(db, email="client42@example.com"), False),
+        ("get_clients", lambda db: crud_client.get_clients(db, limit=20), False),
+        ("get_clients after", lambda db: crud_client.get_clients(db, limit=20, after=("Client 000100", 101)), False),
+        ("get_clients status", lambda db: crud_client.get_clients(db, limit=20, status=ClientStatus.ACTIVE), False),
+        ("get_clients status before",
+         lambda db: crud_client.get_clients(db, limit=20, status=ClientStatus.ACTIVE, before=("Client 000100", 101)), False),
+        ("count_clients status", lambda db: crud_client.count_clients(db, status=ClientStatus.ACTIVE), False),
+        ("get_user", lambda db: crud_user.get_user(db, user_id=1), False),
+        ("get_user_by_email", lambda db: crud_user.get_user_by_email(db, email="bench0@logipilot.com"), False),
+        # Unordered listing of a small table; reading it front to back is the plan we want
+        ("get_users", lambda db: crud_user.get_users(db, limit=20), True),
+        ("get_refresh_token_by_hash", lambda db: crud_refresh_token.get_refresh_token_by_hash(db, token_hash="0" * 64), False),
+        # ETag checks: primary-key reads only
+        ("get_shipment_version", lambda db: crud_shipment.get_shipment_version(db, shipment_id=42), False),
+        ("get_client_version", lambda db: crud_client.get_client_version(db, client_id=42), False),
+        ("get_generations", lambda db: crud_counter.get_generations(db, ["shipments", "clients"]), False),
+        # Change feed: range scans from `since`
+        ("get_feed_bounds", lambda db: crud_change.get_feed_bounds(db), False),
+        ("get_changes", lambda db: crud_change.get_changes(db, since=100, limit=100), False),
+        ("get_changes entity", lambda db: crud_change.get_changes(db, since=100, limit=100, entity="alerts"), False),
+        # Lane statistics: the deliveries after the cache's watermark, each with its departure lookup
+        ("deliveries_after", lambda db: lane_stats.deliveries_after(db, after_id=100), False),
+    ]
+
+
+def plan_problems(plan: list, allow_scan: bool) -> list:
+    problems = []
+    for detail in plan:
+        if "TEMP B-TREE" in detail:
+            problems.append(detail)
+        elif detail.startswith("SCAN ") and " USING " not in detail and detail != "SCAN CONSTANT ROW" and not allow_scan:
+            problems.append(detail)
+    return problems
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--verbose", action="store_true", help="Print every plan, not only the failing ones")
+    args = parser.parse_args()
+
+    configure_database("query_plans")
+    migrate()
+    seed_users(1, "bench-password")
+    seed_shipments(n_clients=500, n_shipments=5000, alerts_per_shipment=2)
+
+    from sqlalchemy import event
+    from app.database import SessionLocal, engine
+
+    failures = 0
+    for problem in index_mismatches():
+        print(f"FAIL index drift: {problem}")
+        failures += 1
+
+    captured = []
+
+    def capture(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith("SELECT"):
+            captured.append((statement, parameters))
+
+    event.listen(engine, "before_cursor_execute", capture)
+    for label, call, allow_scan in cases():
+        captured.clear()
+        db = SessionLocal()
+        try:
+            call(db)
+        finally:
+            db.close()
+
+        for statement, parameters in captured:
+            with engine.connect() as conn:
+                rows = conn.exec_driver_sql(f"EXPLAIN QUERY PLAN {statement}", parameters).fetchall()
+            plan = [row[-1] for row in rows]
+            problems = plan_problems(plan, allow_scan)
+            status = "FAIL" if problems else "ok"
+            if problems or args.verbose:
+                print(f"{status:4} {label}")
+                for detail in plan:
+                    print(f"       {detail}")
+            else:
+                print(f"ok   {label}")
+            failures += bool(problems)
+    event.remove(engine, "before_cursor_execute", capture)
+
+    print(f"{failures} failing check(s)")
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,62 @@
+"""
+Response cache: latency of the read endpoints when answered by the route vs from the cache.
+
+    python benchmarks/response_cache.py
+    python benchmarks/response_cache.py --backend sqlite --repeat 500
+
+Seeds clients, shipments and alerts, then requests a few dashboard reads through the
+ASGI app: once with a write (a cache invalidation) before every request, so each one
+runs the route, and once repeating the same request, so each one is a cache hit.
+Reports the latency of both and the cache's counters at the end.
+"""
+import argparse
+import os
+import tempfile
+import time
+
+from common import configure_database, create_schema, seed_users, seed_shipments, bearer_headers, format_latency_ms
+
+PATHS = ["/api/v1/shipments/?limit={limit}", "/api/v1/alerts/?limit={limit}&severity=High", "/api/v1/clients/?limit={limit}", "/api/v1/summary", "/api/v1/shipments/42"]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--shipments", type=int, default=20000)
+    parser.add_argument("--clients", type=int, default=1000)
+    parser.add_argument("--limit", type=int, default=50)
+    parser.add_argument("--repeat", type=int, default=200)
+    parser.add_argument("--backend", choices=["memory", "sqlite"], default="memory")
+    args = parser.parse_args()
+
+    os.environ["RESPONSE_CACHE_TTL_SECONDS"] = "300"
+    os.environ["RESPONSE_CACHE_BACKEND"] = args.backend
+    os.environ["RESPONSE_CACHE_SQLITE_PATH"] = os.path.join(tempfile.mkdtemp(prefix="logipilot-bench-"), "response_cache.db")
+    configure_database("response_cache")
+    create_schema()
+    emails = seed_users(1, "bench-password")
+    seed_shipments(n_clients=args.clients, n_shipments=args.shipments, alerts_per_shipment=1)
+    headers = bearer_headers(emails[0])
+
+    from fastapi.testclient import TestClient
+    from app.main import app
+    from app.response_cache import response_cache
+
+    with TestClient(app) as client:
+        client.get("/api/v1/users/me", headers=headers)  # Warm the principal cache
+        for template in PATHS:
+            path = template.format(limit=args.limit)
+            for label in ("route", "cached"):
+                timings = []
+                for _ in range(args.repeat):
+                    if label == "route":
+                        response_cache.invalidate("shipments", "alerts", "clients")
+                    started = time.perf_counter()
+                    response = client.get(path, headers=headers)
+                    timings.append(time.perf_counter() - started)
+                    assert response.status_code == 200, response.text
+                print(f"{path:44} {label:7} x-cache={response.headers['x-cache']:5} {format_latency_ms(timings)}")
+        print(response_cache.stats.snapshot())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,102 @@
+"""
+Per-schema serialization cost of the response envelopes in app/schemas.
+
+    python benchmarks/schema_serialization.py
+    python benchmarks/schema_serialization.py --rows 500 --repeat 200
+
+For every response schema, builds the envelope a route returns (a page of ORM rows, or
+the dicts the summary/search/error paths produce) and times, per envelope:
+
+    validate   the route's single validation pass (pre-built TypeAdapter, from_attributes)
+    dump_json  pydantic-core straight to bytes, as FastAPI does for a response_model
+    encoder    jsonable_encoder + json.dumps, the path hand-built JSONResponses used to take
+
+ClientPublic is also timed with the EmailStr output field it used to have, for reference.
+"""
+import argparse
+import json
+import time
+from typing import List
+
+from common import configure_database, create_schema, seed_users, seed_shipments
+
+
+def timed(fn, repeat: int) -> float:
+    fn()
+    started = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return (time.perf_counter() - started) / repeat * 1000
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=100, help="Rows per list envelope (the list endpoints' page size)")
+    parser.add_argument("--repeat", type=int, default=100)
+    args = parser.parse_args()
+
+    configure_database("schema_serialization")
+    create_schema()
+    seed_users(args.rows, "bench-password")
+    seed_shipments(n_clients=args.rows, n_shipments=args.rows, alerts_per_shipment=1)
+
+    from fastapi.encoders import jsonable_encoder
+    from pydantic import EmailStr, TypeAdapter
+    from sqlalchemy.orm import selectinload
+    from app.database import SessionLocal
+    from app.models.alert import Alert
+    from app.models.client import Client
+    from app.models.shipment import Shipment
+    from app.models.user import User
+    from app.schemas.alert import AlertPublic
+    from app.schemas.client import ClientPublic, ClientSuggestion
+    from app.schemas.response import StandardResponse, PaginatedResponse, PageInfo, ErrorResponse, ErrorDetail, BatchResult
+    from app.schemas.search import SearchResultItem
+    from app.schemas.shipment import ShipmentPublic, ShipmentPublicWithClientId
+    from app.schemas.summary import SummaryData
+    from app.schemas.user import UserPublic, TokenResponse
+
+    class ClientPublicEmailStr(ClientPublic):
+        email: EmailStr
+
+    db = SessionLocal()
+    clients = db.query(Client).limit(args.rows).all()
+    shipments = db.query(Shipment).options(selectinload(Shipment.client)).limit(args.rows).all()
+    alerts = db.query(Alert).limit(args.rows).all()
+    users = db.query(User).limit(args.rows).all()
+    page = PageInfo(next_cursor="WyIyMDI1LTAxLTAxIiwxXQ", has_more=True)
+    summary = {
+        "metrics": [{"title": "Active Shipments", "value": "1,305", "iconName": "Package", "color": "c", "bgColor": "b"}] * 4,
+        "recentShipments": [{"id": "SHP001", "client": "Acme", "status": "In Transit", "destination": "Lyon"}] * 5,
+        "activeAlerts": [{"id": "ALT001", "title": "Delay", "description": "Late truck", "severity": "high"}] * 5,
+        "shipmentsByStatus": {"Pending": 10, "In Transit": 5}, "alertsBySeverity": {"High": 3}, "clientsByStatus": {"Active": 7},
+    }
+
+    cases = [
+        ("ShipmentPublic list", PaginatedResponse[List[ShipmentPublic]], {"data": shipments, "page": page}),
+        ("ShipmentPublicWithClientId list", PaginatedResponse[List[ShipmentPublicWithClientId]], {"data": shipments, "page": page}),
+        ("ShipmentPublic batch", StandardResponse[BatchResult[ShipmentPublic]], {"data": {"items": shipments, "missing": [0]}}),
+        ("ClientPublic list", PaginatedResponse[List[ClientPublic]], {"data": clients, "page": page}),
+        ("  (EmailStr output, before)", PaginatedResponse[List[ClientPublicEmailStr]], {"data": clients, "page": page}),
+        ("AlertPublic list", PaginatedResponse[List[AlertPublic]], {"data": alerts, "page": page}),
+        ("UserPublic list", StandardResponse[List[UserPublic]], {"data": users}),
+        ("TokenResponse", StandardResponse[TokenResponse], {"data": {"access_token": "x" * 160, "token_type": "bearer", "user": users[0], "refresh_token": "y" * 43}}),
+        ("ClientSuggestion list", StandardResponse[List[ClientSuggestion]], {"data": [{"id": c.id, "name": c.name, "email": c.email} for c in clients[:10]]}),
+        ("SearchResultItem list", StandardResponse[List[SearchResultItem]], {"data": [{"type": "Shipment", "id": str(s.id), "title": s.origin, "description": s.destination, "link": f"/shipments/{s.id}"} for s in shipments[:20]]}),
+        ("SummaryData", StandardResponse[SummaryData], {"data": summary}),
+        ("ErrorResponse", StandardResponse, {"error": ErrorResponse(message="Validation failed", details=[ErrorDetail(code="VALIDATION_ERROR", message="field required", field="body -> origin")] * 3)}),
+    ]
+
+    print(f"{'schema':34} {'validate':>9} {'dump_json':>10} {'encoder':>9}   ({args.rows} rows per list)")
+    for label, response_type, content in cases:
+        adapter = TypeAdapter(response_type)
+        value = adapter.validate_python(content, from_attributes=True)
+        validate_ms = timed(lambda: adapter.validate_python(content, from_attributes=True), args.repeat)
+        dump_ms = timed(lambda: adapter.dump_json(value), args.repeat)
+        encoder_ms = timed(lambda: json.dumps(jsonable_encoder(value)).encode(), args.repeat)
+        print(f"{label:34} {validate_ms:7.3f}ms {dump_ms:8.3f}ms {encoder_ms:7.3f}ms")
+    db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+"""
+Global search latency: FTS5 index vs LIKE '%q%' scans.
+
+    python benchmarks/search.py
+    python benchmarks/search.py --shipments 1000000
+
+Seeds clients, shipments and one alert per shipment (the search index is filled by
+its triggers as the rows go in), then times crud_search.search for a few query
+shapes and the same terms through the LIKE fallback used on other backends.
+"""
+import argparse
+import time
+
+from common import configure_database, create_schema, seed_shipments, percentile
+
+QUERIES = [
+    ("client name", "Client 004242"),
+    ("email prefix", "client4242"),
+    ("phone digits", "15550004242"),
+    ("two words", "shipment 4242"),
+    ("rare prefix", "client0042"),
+    ("common city", "oslo"),
+]
+
+
+def timed(call, repeat: int) -> list:
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        call()
+        timings.append(time.perf_counter() - started)
+    return timings
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--shipments", type=int, default=200000)
+    parser.add_argument("--clients", type=int, default=10000)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    configure_database("search")
+    create_schema()
+    started = time.perf_counter()
+    seed_shipments(n_clients=args.clients, n_shipments=args.shipments, alerts_per_shipment=1)
+    print(f"seeded {args.clients} clients, {args.shipments} shipments and alerts in {time.perf_counter() - started:.1f}s")
+
+    from app.database import SessionLocal
+    from app.crud import crud_search
+
+    db = SessionLocal()
+    try:
+        for label, q in QUERIES:
+            terms = crud_search.search_terms(q)
+            hits = crud_search.search(db, q, limit=20)
+            fts = timed(lambda: crud_search.search(db, q, limit=20), args.repeat)
+            like = timed(lambda: crud_search._search_like(db, terms, 20), max(1, args.repeat // 10))
+            print(
+                f"{label:13} {q!r:18} {len(hits):2} hits  "
+                f"fts p50 {percentile(fts, 50) * 1000:7.2f}ms p99 {percentile(fts, 99) * 1000:7.2f}ms   "
+                f"like p50 {percentile(like, 50) * 1000:8.1f}ms"
+            )
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+"""
+ShipmentPublic list serialization throughput: Pydantic v1 idioms vs v2-native schemas.
+
+    python benchmarks/shipment_serialization.py
+    python benchmarks/shipment_serialization.py --rows 1000 --repeat 50
+
+Loads a page of shipments (with their clients) and converts it to JSON three ways:
+
+    v1 idioms       from_orm() per row, .dict(), jsonable_encoder + json.dumps
+                    (schemas declared with `class Config: orm_mode = True`)
+    v1 Config class the same legacy schemas, but one list validation + dump_json
+    v2 native       app/schemas (model_config = ConfigDict(from_attributes=True)),
+                    one list validation + dump_json, as the routes do
+
+and reports rows per second for each.
+"""
+import argparse
+import json
+import time
+import warnings
+from datetime import datetime
+from typing import List, Optional
+
+from common import configure_database, create_schema, seed_shipments
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=100)
+    parser.add_argument("--repeat", type=int, default=100)
+    args = parser.parse_args()
+
+    configure_database("shipment_serialization")
+    create_schema()
+    seed_shipments(n_clients=max(args.rows // 10, 1), n_shipments=args.rows)
+
+    from fastapi.encoders import jsonable_encoder
+    from pydantic import BaseModel, TypeAdapter
+    from sqlalchemy.orm import selectinload
+    from app.database import SessionLocal
+    from app.models.client import ClientStatusEnum
+    from app.models.shipment import Shipment, ShipmentStatusEnum
+    from app.schemas.shipment import ShipmentPublic
+
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore")  # The v1 idioms are deprecated; that's the point
+
+        class LegacyClient(BaseModel):
+            name: str
+            email: str
+            phone: Optional[str] = None
+            status: ClientStatusEnum
+            id: int
+            createdAt: datetime
+
+            class Config:
+                orm_mode = True
+                from_attributes = True
+
+        class LegacyShipment(BaseModel):
+            client_id: int
+            status: ShipmentStatusEnum
+            origin: str
+            destination: str
+            id: int
+            createdAt: datetime
+            client: Optional[LegacyClient] = None
+
+            class Config:
+                orm_mode = True
+                from_attributes = True
+
+        db = SessionLocal()
+        rows = db.query(Shipment).options(selectinload(Shipment.client)).limit(args.rows).all()
+        legacy_adapter = TypeAdapter(List[LegacyShipment])
+        adapter = TypeAdapter(List[ShipmentPublic])
+
+        variants = [
+            ("v1 idioms", lambda: json.dumps(jsonable_encoder([LegacyShipment.from_orm(row).dict() for row in rows])).encode()),
+            ("v1 Config class", lambda: legacy_adapter.dump_json(legacy_adapter.validate_python(rows, from_attributes=True))),
+            ("v2 native", lambda: adapter.dump_json(adapter.validate_python(rows, from_attributes=True))),
+        ]
+        assert json.loads(variants[0][1]()) == json.loads(variants[2][1]())
+        for label, fn in variants:
+            fn()
+            started = time.perf_counter()
+            for _ in range(args.repeat):
+                fn()
+            elapsed = (time.perf_counter() - started) / args.repeat
+            print(f"{label:16} {elapsed * 1000:7.3f} ms per {len(rows)} rows  {len(rows) / elapsed:10,.0f} rows/s")
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+"""
+Request coalescing: database statements per burst of identical concurrent GETs.
+
+    python benchmarks/single_flight.py
+    python benchmarks/single_flight.py --burst 100 --bursts 20
+
+Seeds clients, shipments and alerts, then fires bursts of identical requests at the
+ASGI app concurrently (the "alert fired, every dashboard refreshes" case), with
+coalescing off and on. The response cache is off, so every burst starts cold. Reports
+the statements run and the latency per burst.
+"""
+import argparse
+import asyncio
+import time
+
+from common import configure_database, create_schema, seed_users, seed_shipments, bearer_headers, format_latency_ms
+
+PATHS = ["/api/v1/alerts/?severity=Critical", "/api/v1/shipments/?limit=50", "/api/v1/summary"]
+
+
+async def run(args, headers) -> None:
+    import httpx
+    from sqlalchemy import event
+    from app.database import async_engine
+    from app.main import app
+    from app.response_cache import request_flights
+
+    statements = []
+
+    def count(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as client:
+        await client.get("/api/v1/users/me", headers=headers)  # Warm the principal cache
+        event.listen(async_engine.sync_engine, "before_cursor_execute", count)
+        for path in PATHS:
+            for enabled in (False, True):
+                request_flights.enabled = enabled
+                timings = []
+                statements.clear()
+                for _ in range(args.bursts):
+                    started = time.perf_counter()
+                    responses = await asyncio.gather(*(client.get(path, headers=headers) for _ in range(args.burst)))
+                    timings.append(time.perf_counter() - started)
+                    assert all(r.status_code == 200 for r in responses)
+                    assert len({r.content for r in responses}) == 1
+                shared = sum(r.headers.get("x-cache") == "SHARED" for r in responses)
+                print(
+                    f"{path:36} coalescing={'on ' if enabled else 'off'} {len(statements) / args.bursts:6.1f} stmt/burst "
+                    f"(last burst: {shared}/{args.burst} shared)  burst {format_latency_ms(timings)}"
+                )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--shipments", type=int, default=20000)
+    parser.add_argument("--clients", type=int, default=1000)
+    parser.add_argument("--burst", type=int, default=50, help="Concurrent identical requests per burst")
+    parser.add_argument("--bursts", type=int, default=10)
+    args = parser.parse_args()
+
+    configure_database("single_flight")
+    create_schema()
+    emails = seed_users(1, "bench-password")
+    seed_shipments(n_clients=args.clients, n_shipments=args.shipments, alerts_per_shipment=1)
+    asyncio.run(run(args, bearer_headers(emails[0])))
+
+
+if __name__ == "__main__":
+    main()
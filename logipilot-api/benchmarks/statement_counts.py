@@ -0,0 +1,101 @@
+"""
+SQL statements per write endpoint.
+
+    python benchmarks/statement_counts.py
+
+Calls each create/update endpoint (success and constraint-failure cases) once,
+counts the statements sent to the database and compares them to a budget.
+Creates and updates go out as a single INSERT/UPDATE .. RETURNING (shipments add
+one primary-key lookup of the nested client), and FK/unique violations come back
+from that same statement rather than from a validation SELECT. Creates, and updates
+that change a status/severity, add one upsert of the summary counters (other
+updates add the same upsert to advance the table's change generation for ETags).
+Successful writes add one INSERT into the change log behind GET /changes, and
+shipment status changes one INSERT .. SELECT into the status history.
+The batch fetches are one IN query (shipments add one selectinload of their clients).
+A request that fails must not advance any change generation, or it would invalidate
+every client's ETags; that is checked after each 4xx case.
+
+The principal cache is warmed first, so authentication adds no statements.
+Exits with status 1 if any endpoint exceeds its budget or returns an unexpected status.
+"""
+import sys
+
+from common import configure_database, create_schema, seed_users, seed_shipments, bearer_headers
+
+# (label, method, path, json body, expected status, max statements)
+CASES = [
+    ("create client", "POST", "/api/v1/clients/", {"name": "Acme", "email": "acme@example.com"}, 201, 3),
+    ("create client, duplicate email", "POST", "/api/v1/clients/", {"name": "Acme", "email": "acme@example.com"}, 400, 1),
+    ("update client", "PUT", "/api/v1/clients/1", {"phone": "+15550000000", "status": "On Hold"}, 200, 3),
+    ("update client, email taken", "PUT", "/api/v1/clients/1", {"email": "client1@example.com"}, 400, 1),
+    ("update client, missing", "PUT", "/api/v1/clients/999999", {"name": "Nobody"}, 404, 1),
+    ("create shipment", "POST", "/api/v1/shipments/", {"client_id": 1, "origin": "Paris", "destination": "Lyon"}, 201, 4),
+    ("create shipment, missing client", "POST", "/api/v1/shipments/", {"client_id": 999999, "origin": "Paris", "destination": "Lyon"}, 404, 1),
+    ("update shipment", "PUT", "/api/v1/shipments/1", {"status": "Delivered"}, 200, 5),
+    ("update shipment, no status", "PUT", "/api/v1/shipments/1", {"origin": "Berlin"}, 200, 4),
+    ("update shipment, missing client", "PUT", "/api/v1/shipments/1", {"client_id": 999999}, 404, 1),
+    ("update shipment, missing", "PUT", "/api/v1/shipments/999999", {"status": "Delivered"}, 404, 3),
+    ("create alert", "POST", "/api/v1/alerts/", {"shipment_id": 1, "message": "Truck delayed"}, 201, 3),
+    ("create alert, missing shipment", "POST", "/api/v1/alerts/", {"shipment_id": 999999, "message": "Truck delayed"}, 404, 1),
+    ("update alert", "PUT", "/api/v1/alerts/1", {"severity": "Critical"}, 200, 3),
+    ("update alert, missing", "PUT", "/api/v1/alerts/999999", {"severity": "Critical"}, 404, 2),
+    ("create user", "POST", "/api/v1/users/", {"email": "new@logipilot.com", "password": "password1", "role": "driver"}, 201, 1),
+    ("create user, duplicate email", "POST", "/api/v1/users/", {"email": "new@logipilot.com", "password": "password1", "role": "driver"}, 400, 1),
+    ("update user", "PUT", "/api/v1/users/2", {"role": "manager"}, 200, 1),
+    ("update user, missing", "PUT", "/api/v1/users/999999", {"is_active": False}, 404, 1),
+    ("batch shipments", "GET", "/api/v1/shipments/batch?ids=5,3,999999,1,2,4", None, 200, 2),
+    ("batch shipments, POST", "POST", "/api/v1/shipments/batch", {"ids": list(range(1, 11))}, 200, 2),
+    ("batch alerts", "GET", "/api/v1/alerts/batch?ids=2,1,999999", None, 200, 1),
+    ("batch clients", "POST", "/api/v1/clients/batch", {"ids": [3, 1, 999999]}, 200, 1),
+]
+
+
+def main() -> None:
+    configure_database("statement_counts")
+    create_schema()
+    emails = seed_users(1, "bench-password", role="admin")
+    seed_shipments(n_clients=10, n_shipments=10, alerts_per_shipment=1)
+    headers = bearer_headers(emails[0], role="admin")
+
+    from fastapi.testclient import TestClient
+    from sqlalchemy import event
+    from app.crud import crud_counter
+    from app.database import SessionLocal, async_engine
+    from app.main import app
+
+    statements = []
+
+    def count(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement.split(None, 1)[0].upper())
+
+    def generations():
+        # Through the sync engine, so these reads aren't counted
+        with SessionLocal() as db:
+            return crud_counter.get_generations(db, list(crud_counter.COUNTED))
+
+    failures = 0
+    with TestClient(app) as client:
+        client.get("/api/v1/users/me", headers=headers)  # Warm the principal cache
+        event.listen(async_engine.sync_engine, "before_cursor_execute", count)
+        for label, method, path, body, expected_status, budget in CASES:
+            before = generations()
+            statements.clear()
+            response = client.request(method, path, json=body, headers=headers)
+            ok = response.status_code == expected_status and len(statements) <= budget
+            note = ""
+            if response.status_code >= 400 and generations() != before:
+                ok, note = False, " (advanced a change generation)"
+            failures += not ok
+            print(
+                f"{'ok' if ok else 'FAIL':4} {label:34} {method:4} {path:26} -> {response.status_code} "
+                f"{len(statements)} stmt (budget {budget}) {' '.join(statements)}{note}"
+            )
+        event.remove(async_engine.sync_engine, "before_cursor_execute", count)
+
+    print(f"{failures} failing check(s)")
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()